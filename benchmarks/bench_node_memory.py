@@ -0,0 +1,113 @@
+"""
+Measure the heap used per node by the HTML and text node trees.
+
+    python3 benchmarks/bench_node_memory.py [--pages 100] [--seed 0]
+
+Every corpus document is parsed, then its trees are copied once into the
+current slotted classes and once into dict-backed copies of the classes as
+they were before __slots__. Both copies share the same strings, so the
+difference is the per-node overhead alone.
+"""
+import argparse
+import gc
+import os
+import sys
+import tracemalloc
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src"))
+from block_markdown import markdown_to_blocks, markdown_to_html_node
+from htmlnode import LeafNode, ParentNode
+from inline_markdown import text_to_textnodes
+from textnode import TextNode
+
+import corpus
+
+
+class DictLeafNode:
+    def __init__(self, tag, value, props=None):
+        self.tag = tag
+        self.value = value
+        self.children = None
+        self.props = props
+
+
+class DictParentNode:
+    def __init__(self, tag, children, props=None):
+        self.tag = tag
+        self.value = None
+        self.children = children
+        self.props = props
+
+
+class DictTextNode:
+    def __init__(self, text, text_type, url=None):
+        self.text = text
+        self.text_type = text_type
+        self.url = url
+
+
+def copy_tree(node, leaf_class, parent_class):
+    props = dict(node.props) if node.props else None
+    if node.children is None:
+        return leaf_class(node.tag, node.value, props)
+    return parent_class(node.tag, [copy_tree(child, leaf_class, parent_class) for child in node.children], props)
+
+
+def count_nodes(node):
+    if node.children is None:
+        return 1
+    return 1 + sum(count_nodes(child) for child in node.children)
+
+
+def measure(build):
+    gc.collect()
+    tracemalloc.start()
+    result = build()
+    size, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del result
+    return size
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Bytes per node, dict-backed vs slotted classes")
+    parser.add_argument("--pages", type=int, default=100, help="copies of every corpus document")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    html_trees = []
+    text_nodes = []
+    for seed in range(args.seed, args.seed + args.pages):
+        for generate in corpus.DOCUMENTS.values():
+            markdown = generate(seed)
+            html_trees.append(markdown_to_html_node(markdown))
+            for block in markdown_to_blocks(markdown):
+                try:
+                    text_nodes.append(text_to_textnodes(block))
+                except ValueError:
+                    # Code blocks may hold unbalanced delimiters, skip them
+                    pass
+
+    html_count = sum(count_nodes(tree) for tree in html_trees)
+    text_count = sum(len(nodes) for nodes in text_nodes)
+
+    def copy_html(leaf_class, parent_class):
+        return lambda: [copy_tree(tree, leaf_class, parent_class) for tree in html_trees]
+
+    def copy_text(node_class):
+        return lambda: [[node_class(n.text, n.text_type, n.url) for n in nodes] for nodes in text_nodes]
+
+    rows = [
+        ("HTMLNode", html_count,
+         measure(copy_html(DictLeafNode, DictParentNode)), measure(copy_html(LeafNode, ParentNode))),
+        ("TextNode", text_count,
+         measure(copy_text(DictTextNode)), measure(copy_text(TextNode))),
+    ]
+
+    print(f"{'nodes':10} {'count':>10} {'dict B/node':>12} {'slots B/node':>13} {'saved':>7}")
+    for name, count, before, after in rows:
+        print(f"{name:10} {count:10} {before / count:12.1f} {after / count:13.1f} {1 - after / before:7.1%}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,53 @@
+"""
+Time split_nodes_link / split_nodes_image on paragraphs with many links.
+
+    python3 benchmarks/bench_split_links.py [--links 10000] [--repeat 5]
+"""
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src"))
+from inline_markdown import split_nodes_image, split_nodes_link
+from textnode import TextNode, TextType
+
+
+def link_paragraph(count):
+    return " and ".join(f"[link {i}](https://example.com/{i})" for i in range(count))
+
+
+def image_paragraph(count):
+    return " ".join(f"![badge {i}](https://img.shields.io/{i}.svg)" for i in range(count))
+
+
+def best_time(func, nodes, repeat):
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func(nodes)
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--links", type=int, default=10000)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    for name, func, make_text in [
+        ("split_nodes_link", split_nodes_link, link_paragraph),
+        ("split_nodes_image", split_nodes_image, image_paragraph),
+    ]:
+        # Doubling the size should roughly double the time if splitting is linear
+        for count in (args.links // 2, args.links):
+            text = make_text(count)
+            elapsed = best_time(func, [TextNode(text, TextType.TEXT)], args.repeat)
+            print(f"{name:18} {count:>7} matches {len(text) / 1e6:6.2f} MB "
+                  f"{elapsed * 1000:9.2f} ms  {len(text) / elapsed / 1e6:7.1f} MB/s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,127 @@
+"""
+Deterministic synthetic markdown for the benchmarks.
+
+Every generator takes a seed, so two runs (or two machines) time exactly the
+same input. The output only uses syntax the parser supports: no blank lines
+inside code blocks and no delimiter characters inside URLs.
+"""
+import os
+import random
+
+WORDS = (
+    "the quick brown fox jumps over lazy dog elves of rivendell ring bearer "
+    "mountain river forest shire wizard grey white tower road journey song "
+    "ancient stone light shadow fellowship council valley star bright old"
+).split()
+
+
+def sentence(rng, words=12):
+    return " ".join(rng.choice(WORDS) for _ in range(words)).capitalize() + "."
+
+
+def inline_text(rng, words=40):
+    # Plain words mixed with every inline construct the parser knows
+    parts = []
+    for i in range(words):
+        word = rng.choice(WORDS)
+        roll = rng.random()
+        if roll < 0.05:
+            parts.append(f"**{word}**")
+        elif roll < 0.10:
+            parts.append(f"_{word}_")
+        elif roll < 0.13:
+            parts.append(f"`{word}`")
+        elif roll < 0.16:
+            parts.append(f"[{word}](https://example.com/{word}/{i})")
+        elif roll < 0.17:
+            parts.append(f"![{word}](/images/{word}.png)")
+        else:
+            parts.append(word)
+    return " ".join(parts)
+
+
+def long_paragraphs(seed=0, paragraphs=20, words=400):
+    rng = random.Random(seed)
+    blocks = ["# Long paragraphs"]
+    for _ in range(paragraphs):
+        # Wrapped over several lines like hand-written markdown
+        text = inline_text(rng, words).split(" ")
+        lines = [" ".join(text[i:i + 12]) for i in range(0, len(text), 12)]
+        blocks.append("\n".join(lines))
+    return "\n\n".join(blocks) + "\n"
+
+
+def deep_lists(seed=0, lists=20, items=200):
+    rng = random.Random(seed)
+    blocks = ["# Lists"]
+    for n in range(lists):
+        if n % 2:
+            blocks.append("\n".join(f"{i + 1}. {inline_text(rng, 8)}" for i in range(items)))
+        else:
+            blocks.append("\n".join(f"- {inline_text(rng, 8)}" for _ in range(items)))
+    return "\n\n".join(blocks) + "\n"
+
+
+def link_heavy(seed=0, paragraphs=10, links=1000):
+    rng = random.Random(seed)
+    blocks = ["# Links"]
+    for p in range(paragraphs):
+        links_text = []
+        for i in range(links):
+            word = rng.choice(WORDS)
+            if i % 10 == 0:
+                links_text.append(f"![{word} badge](https://img.example.com/{p}/{i}.svg)")
+            else:
+                links_text.append(f"[{word}](https://example.com/{p}/{i})")
+        blocks.append(" ".join(links_text))
+    return "\n\n".join(blocks) + "\n"
+
+
+def large_code_blocks(seed=0, blocks_count=10, lines=2000):
+    rng = random.Random(seed)
+    blocks = ["# Code"]
+    for _ in range(blocks_count):
+        code = [f"def {rng.choice(WORDS)}{i}(x):    return x * {i}  # {sentence(rng, 6)}"
+                for i in range(lines)]
+        blocks.append("```\n" + "\n".join(code) + "\n```")
+        blocks.append(sentence(rng))
+    return "\n\n".join(blocks) + "\n"
+
+
+def blog_post(seed=0, sections=4):
+    # A typical page: headings, paragraphs, a list, a quote and some code
+    rng = random.Random(seed)
+    blocks = [f"# {sentence(rng, 5)[:-1]}", inline_text(rng, 60)]
+    for s in range(sections):
+        blocks.append(f"## {sentence(rng, 4)[:-1]}")
+        blocks.append(inline_text(rng, 80))
+        blocks.append("\n".join(f"- {inline_text(rng, 6)}" for _ in range(5)))
+        blocks.append("> " + sentence(rng) + "\n> " + sentence(rng))
+        if s % 2:
+            blocks.append("```\n" + "\n".join(sentence(rng, 6) for _ in range(6)) + "\n```")
+    return "\n\n".join(blocks) + "\n"
+
+
+DOCUMENTS = {
+    "long_paragraphs": long_paragraphs,
+    "deep_lists": deep_lists,
+    "link_heavy": link_heavy,
+    "large_code_blocks": large_code_blocks,
+    "blog_post": blog_post,
+}
+
+
+def write_site(content_dir, pages, seed=0, per_dir=100):
+    """
+    Write a content tree of `pages` blog posts, `per_dir` pages per directory.
+    Returns the total number of markdown bytes written.
+    """
+    total = 0
+    for i in range(pages):
+        page_dir = os.path.join(content_dir, f"section{i // per_dir:05d}", f"post{i:07d}")
+        os.makedirs(page_dir, exist_ok=True)
+        markdown = blog_post(seed + i)
+        with open(os.path.join(page_dir, "index.md"), 'w', encoding='utf-8') as f:
+            f.write(markdown)
+        total += len(markdown.encode("utf-8"))
+    return total
@@ -0,0 +1,224 @@
+"""
+Benchmark the markdown -> HTML pipeline stage by stage.
+
+    python3 benchmarks/run.py                          # document stages + 1k-page tree
+    python3 benchmarks/run.py --tree-pages 10000 100000
+    python3 benchmarks/run.py --output new.json --compare old.json
+
+Each synthetic document from corpus.py is timed through block split, block
+typing, inline parse, serialization and write. Content trees are timed end to
+end through generate_pages_recursive. Results can be saved as JSON and compared
+with an earlier run.
+"""
+import argparse
+import contextlib
+import io
+import json
+import os
+import platform
+import shutil
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src"))
+from block_markdown import scan_block_lines, block_lines_type, block_lines_to_html_node
+from htmlnode import ParentNode
+from inline_markdown import cached_text_to_tokens
+from main import generate_pages_recursive
+
+import corpus
+
+STAGES = ["block_split", "block_typing", "inline_parse", "serialization", "write"]
+
+TEMPLATE = """<!doctype html>
+<html>
+  <head>
+    <title>{{ Title }}</title>
+    <link href="/index.css" rel="stylesheet" />
+  </head>
+  <body>
+    <article>{{ Content }}</article>
+  </body>
+</html>"""
+
+
+def time_document(markdown, out_path):
+    # Every run parses from a cold inline cache, otherwise repeats only time
+    # the hits left behind by the first run
+    cached_text_to_tokens.cache_clear()
+    timings = {}
+
+    start = time.perf_counter()
+    blocks = list(scan_block_lines(markdown.split("\n")))
+    timings["block_split"] = time.perf_counter() - start
+
+    start = time.perf_counter()
+    block_types = [block_lines_type(block_lines) for block_lines in blocks]
+    timings["block_typing"] = time.perf_counter() - start
+
+    start = time.perf_counter()
+    node = ParentNode("div", [block_lines_to_html_node(b, t) for b, t in zip(blocks, block_types)])
+    timings["inline_parse"] = time.perf_counter() - start
+
+    start = time.perf_counter()
+    html = node.to_html()
+    timings["serialization"] = time.perf_counter() - start
+
+    start = time.perf_counter()
+    with open(out_path, 'w', encoding='utf-8') as f:
+        f.write(html)
+    timings["write"] = time.perf_counter() - start
+
+    return timings, len(html.encode("utf-8"))
+
+
+def bench_documents(seed, repeat, work_dir):
+    results = {}
+    out_path = os.path.join(work_dir, "out.html")
+    for name, generate in corpus.DOCUMENTS.items():
+        markdown = generate(seed)
+        markdown_bytes = len(markdown.encode("utf-8"))
+
+        # Keep the best time per stage, the least disturbed by other processes
+        best = {}
+        for _ in range(repeat):
+            timings, html_bytes = time_document(markdown, out_path)
+            for stage, seconds in timings.items():
+                best[stage] = min(seconds, best.get(stage, seconds))
+
+        stages = {}
+        for stage in STAGES:
+            # Everything up to serialization consumes markdown, write consumes HTML
+            size = html_bytes if stage == "write" else markdown_bytes
+            stages[stage] = {
+                "seconds": best[stage],
+                "mb_per_s": size / best[stage] / 1e6 if best[stage] else None,
+            }
+        total = sum(best.values())
+        results[name] = {
+            "markdown_bytes": markdown_bytes,
+            "html_bytes": html_bytes,
+            "total_seconds": total,
+            "mb_per_s": markdown_bytes / total / 1e6 if total else None,
+            "stages": stages,
+        }
+    return results
+
+
+def bench_tree(pages, seed, jobs, work_dir):
+    tree_dir = os.path.join(work_dir, f"tree{pages}")
+    content_dir = os.path.join(tree_dir, "content")
+    out_dir = os.path.join(tree_dir, "docs")
+    template_path = os.path.join(tree_dir, "template.html")
+    markdown_bytes = corpus.write_site(content_dir, pages, seed)
+    with open(template_path, 'w', encoding='utf-8') as f:
+        f.write(TEMPLATE)
+
+    cached_text_to_tokens.cache_clear()
+    start = time.perf_counter()
+    with contextlib.redirect_stdout(io.StringIO()):
+        generate_pages_recursive(content_dir, template_path, out_dir, "/", jobs)
+    seconds = time.perf_counter() - start
+
+    shutil.rmtree(tree_dir)
+    return {
+        "pages": pages,
+        "jobs": jobs,
+        "markdown_bytes": markdown_bytes,
+        "seconds": seconds,
+        "pages_per_s": pages / seconds,
+        "mb_per_s": markdown_bytes / seconds / 1e6,
+    }
+
+
+def print_results(results):
+    print(f"{'document':20} {'stage':14} {'ms':>10} {'MB/s':>9}")
+    for name, document in results["documents"].items():
+        for stage, timing in document["stages"].items():
+            print(f"{name:20} {stage:14} {timing['seconds'] * 1000:10.2f} {timing['mb_per_s'] or 0:9.1f}")
+        print(f"{name:20} {'total':14} {document['total_seconds'] * 1000:10.2f} {document['mb_per_s'] or 0:9.1f}")
+    for tree in results["trees"].values():
+        print(f"tree {tree['pages']} pages, {tree['jobs']} job(s): {tree['seconds']:.2f} s, "
+              f"{tree['pages_per_s']:.0f} pages/s, {tree['mb_per_s']:.1f} MB/s")
+
+
+def compare_results(old, new, threshold):
+    """
+    Print the relative change of every timing present in both runs and return
+    the number of regressions slower than the threshold.
+    """
+    regressions = 0
+
+    def report(label, old_seconds, new_seconds):
+        nonlocal regressions
+        change = (new_seconds - old_seconds) / old_seconds if old_seconds else 0.0
+        flag = ""
+        if change > threshold:
+            flag = "  REGRESSION"
+            regressions += 1
+        print(f"{label:40} {old_seconds * 1000:10.2f} -> {new_seconds * 1000:10.2f} ms {change:+7.1%}{flag}")
+
+    for name, document in new["documents"].items():
+        old_document = old.get("documents", {}).get(name)
+        if old_document is None:
+            continue
+        for stage, timing in document["stages"].items():
+            old_timing = old_document["stages"].get(stage)
+            if old_timing is not None:
+                report(f"{name}/{stage}", old_timing["seconds"], timing["seconds"])
+    for key, tree in new["trees"].items():
+        old_tree = old.get("trees", {}).get(key)
+        if old_tree is not None:
+            report(f"tree/{key}", old_tree["seconds"], tree["seconds"])
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the markdown -> HTML pipeline")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--repeat", type=int, default=5,
+                        help="runs per document, the best time is kept (default: 5)")
+    parser.add_argument("--tree-pages", type=int, nargs="*", default=[1000],
+                        help="content tree sizes to build end to end (default: 1000)")
+    parser.add_argument("--jobs", type=int, default=1, help="processes for tree builds")
+    parser.add_argument("--output", help="write the results to this JSON file")
+    parser.add_argument("--compare", help="JSON results of an earlier run to compare with")
+    parser.add_argument("--threshold", type=float, default=0.10,
+                        help="relative slowdown reported as a regression (default: 0.10)")
+    args = parser.parse_args()
+
+    work_dir = tempfile.mkdtemp(prefix="ssg-bench-")
+    try:
+        results = {
+            "meta": {
+                "python": platform.python_version(),
+                "platform": platform.platform(),
+                "seed": args.seed,
+                "repeat": args.repeat,
+                "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            },
+            "documents": bench_documents(args.seed, args.repeat, work_dir),
+            "trees": {},
+        }
+        for pages in args.tree_pages:
+            results["trees"][f"{pages}x{args.jobs}"] = bench_tree(pages, args.seed, args.jobs, work_dir)
+    finally:
+        shutil.rmtree(work_dir)
+
+    print_results(results)
+
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(results, f, indent=2)
+
+    if args.compare:
+        with open(args.compare, 'r', encoding='utf-8') as f:
+            old = json.load(f)
+        print()
+        if compare_results(old, results, args.threshold):
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,9 +1,8 @@
 import re
 from enum import Enum
 
-from htmlnode import ParentNode, LeafNode
-from inline_markdown import text_to_textnodes
-from textnode import TextNode, TextType
+from htmlnode import ParentNode, LeafNode, text_node_to_html_node
+from inline_markdown import text_to_tokens
 
 
 class BlockType(Enum):
@@ -15,84 +14,136 @@ class BlockType(Enum):
     ORDERED_LIST = "ordered_list"
 
 
+FENCE = "```"
+HEADING_PATTERN = re.compile(r"#{1,6} ")
+
+
+def scan_block_lines(lines):
+    """
+    Yield the blocks of markdown given as an iterable of lines, with or
+    without their line endings, such as an open file. Each block is a list of
+    its lines, stripped as a whole like str.strip() would strip the block.
+    Blocks are separated by empty lines, except inside a ``` fence. Only the
+    current block is held in memory.
+    """
+    block_lines = []
+    in_fence = False
+    for line in lines:
+        if line.endswith("\n"):
+            line = line[:-1]
+        if in_fence:
+            block_lines.append(line)
+            if line.rstrip().endswith(FENCE):
+                in_fence = False
+        elif line == "":
+            if block_lines:
+                yield strip_block_lines(block_lines)
+                block_lines = []
+        elif block_lines:
+            block_lines.append(line)
+        else:
+            stripped = line.lstrip()
+            # Whitespace before the first text is stripped away
+            if stripped:
+                block_lines.append(stripped)
+                # A fence opened by the block's first line, unless it also closes there
+                stripped = stripped.rstrip()
+                in_fence = stripped.startswith(FENCE) and (
+                    len(stripped) < 2 * len(FENCE) or not stripped.endswith(FENCE)
+                )
+    if block_lines:
+        yield strip_block_lines(block_lines)
+
+
+def strip_block_lines(block_lines):
+    # The first line is already left-stripped, drop trailing whitespace
+    while not block_lines[-1].strip():
+        block_lines.pop()
+    block_lines[-1] = block_lines[-1].rstrip()
+    return block_lines
+
+
+def scan_blocks(lines):
+    for block_lines in scan_block_lines(lines):
+        yield "\n".join(block_lines)
+
+
+def iter_blocks(lines):
+    # Blocks as their lines, typed as they are scanned
+    for block_lines in scan_block_lines(lines):
+        yield block_lines, block_lines_type(block_lines)
+
+
 def markdown_to_blocks(markdown):
-    blocks = markdown.split("\n\n")
-    filtered_blocks = []
-    for block in blocks:
-        stripped_block = block.strip()
-        if stripped_block:  # Only include non-empty blocks
-            filtered_blocks.append(stripped_block)
-    return filtered_blocks
+    return list(scan_blocks(markdown.split("\n")))
 
 
 def block_to_block_type(block):
-    lines = block.split("\n")
-    
-    # Check for heading (1-6 # characters followed by space)
-    if re.match(r"^#{1,6} ", block):
+    return block_lines_type(block.split("\n"))
+
+
+def block_lines_type(lines):
+    """
+    Classify a block from its lines. The first line decides which block type
+    is possible at all, so every line is checked at most once.
+    """
+    for matches, block_type in BLOCK_MATCHERS:
+        if matches(lines):
+            return block_type
+
+    first = lines[0]
+
+    # Heading (1-6 # characters followed by space)
+    if HEADING_PATTERN.match(first):
         return BlockType.HEADING
-    
-    # Check for code block (starts and ends with 3 backticks)
-    if block.startswith("```") and block.endswith("```"):
+
+    # Code block (starts and ends with 3 backticks)
+    if first.startswith(FENCE) and lines[-1].endswith(FENCE):
         return BlockType.CODE
-    
-    # Check for quote block (every line starts with > followed by space or is just >)
-    if all(line.startswith("> ") or line == ">" for line in lines):
+
+    marker = first[:1]
+    if marker == ">":
+        # Every line starts with > followed by space or is just >
+        for line in lines:
+            if not (line.startswith("> ") or line == ">"):
+                return BlockType.PARAGRAPH
         return BlockType.QUOTE
-    
-    # Check for unordered list (every line starts with "- ")
-    if all(line.startswith("- ") for line in lines):
+
+    if marker == "-":
+        # Every line starts with "- "
+        for line in lines:
+            if not line.startswith("- "):
+                return BlockType.PARAGRAPH
         return BlockType.UNORDERED_LIST
-    
-    # Check for ordered list (every line starts with number. )
-    if len(lines) > 0:
-        is_ordered_list = True
-        for i, line in enumerate(lines):
-            expected_number = i + 1
-            if not line.startswith(f"{expected_number}. "):
-                is_ordered_list = False
-                break
-        if is_ordered_list:
-            return BlockType.ORDERED_LIST
-    
-    # Default to paragraph
+
+    if marker == "1":
+        # Lines numbered "1. ", "2. ", ... in order
+        for number, line in enumerate(lines, 1):
+            if not line.startswith(f"{number}. "):
+                return BlockType.PARAGRAPH
+        return BlockType.ORDERED_LIST
+
     return BlockType.PARAGRAPH
 
 
 def text_to_children(text):
-    text_nodes = text_to_textnodes(text)
+    # Tokens carry the same attributes as TextNodes
+    tokens = text_to_tokens(text)
     children = []
-    for text_node in text_nodes:
-        html_node = text_node_to_html_node(text_node)
+    for token in tokens:
+        html_node = text_node_to_html_node(token)
         children.append(html_node)
     return children
 
 
-def text_node_to_html_node(text_node):
-    if text_node.text_type == TextType.TEXT:
-        return LeafNode(None, text_node.text)
-    elif text_node.text_type == TextType.BOLD:
-        return LeafNode("b", text_node.text)
-    elif text_node.text_type == TextType.ITALIC:
-        return LeafNode("i", text_node.text)
-    elif text_node.text_type == TextType.CODE:
-        return LeafNode("code", text_node.text)
-    elif text_node.text_type == TextType.LINK:
-        return LeafNode("a", text_node.text, {"href": text_node.url})
-    elif text_node.text_type == TextType.IMAGE:
-        return LeafNode("img", "", {"src": text_node.url, "alt": text_node.text})
-    else:
-        raise ValueError(f"Unsupported TextType: {text_node.text_type}")
-
-
-def paragraph_to_html_node(block):
-    lines = block.split("\n")
+def paragraph_to_html_node(lines):
     paragraph = " ".join(lines)
     children = text_to_children(paragraph)
     return ParentNode("p", children)
 
 
-def heading_to_html_node(block):
+def heading_to_html_node(lines):
+    block = "\n".join(lines)
     level = 0
     for char in block:
         if char == "#":
@@ -106,66 +157,92 @@ def heading_to_html_node(block):
     return ParentNode(f"h{level}", children)
 
 
-def code_to_html_node(block):
+def code_to_html_node(lines):
+    block = "\n".join(lines)
     if not block.startswith("```") or not block.endswith("```"):
         raise ValueError("Invalid code block")
     text = block[4:-3]
     return ParentNode("pre", [LeafNode("code", text)])
 
 
-def olist_to_html_node(block):
+def olist_to_html_node(lines):
     items = []
-    for line in block.split("\n"):
+    for line in lines:
         text = line[3:]
         children = text_to_children(text)
         items.append(ParentNode("li", children))
     return ParentNode("ol", items)
 
 
-def ulist_to_html_node(block):
+def ulist_to_html_node(lines):
     items = []
-    for line in block.split("\n"):
+    for line in lines:
         text = line[2:]
         children = text_to_children(text)
         items.append(ParentNode("li", children))
     return ParentNode("ul", items)
 
 
-def quote_to_html_node(block):
-    lines = []
-    for line in block.split("\n"):
+def quote_to_html_node(lines):
+    quote_lines = []
+    for line in lines:
         if line == ">":
-            lines.append("")
+            quote_lines.append("")
         elif line.startswith("> "):
-            lines.append(line[2:])  # Remove "> "
+            quote_lines.append(line[2:])  # Remove "> "
         else:
             raise ValueError("Invalid quote line")
-    content = " ".join(lines)
+    content = " ".join(quote_lines)
     children = text_to_children(content)
     return ParentNode("blockquote", children)
 
 
+# Block type -> function turning a block's lines into an HTML node
+BLOCK_CONVERTERS = {
+    BlockType.PARAGRAPH: paragraph_to_html_node,
+    BlockType.HEADING: heading_to_html_node,
+    BlockType.CODE: code_to_html_node,
+    BlockType.ORDERED_LIST: olist_to_html_node,
+    BlockType.UNORDERED_LIST: ulist_to_html_node,
+    BlockType.QUOTE: quote_to_html_node,
+}
+
+# (matches, block_type) pairs for extension block types, tried in order
+# before the built-in types
+BLOCK_MATCHERS = []
+
+
+def register_block_type(block_type, converter, matches=None):
+    """
+    Register a converter from a block's lines to an HTML node. block_type may
+    be any hashable, and replaces the built-in converter if it is a BlockType.
+    With matches, a function of a block's lines, every block it accepts is
+    given block_type ahead of the built-in types.
+    """
+    BLOCK_CONVERTERS[block_type] = converter
+    if matches is not None:
+        BLOCK_MATCHERS.append((matches, block_type))
+
+
+def block_lines_to_html_node(lines, block_type):
+    converter = BLOCK_CONVERTERS.get(block_type)
+    if converter is None:
+        raise ValueError(f"Unsupported block type: {block_type}")
+    return converter(lines)
+
+
+def iter_block_nodes(lines):
+    # HTML nodes for the blocks of a markdown file, converted one at a time
+    for block_lines, block_type in iter_blocks(lines):
+        yield block_lines_to_html_node(block_lines, block_type)
+
+
+def block_title(lines, block_type):
+    # The text of a level 1 heading block, None for every other block
+    if block_type == BlockType.HEADING and lines[0].startswith("# "):
+        return lines[0][2:].strip() or None
+    return None
+
+
 def markdown_to_html_node(markdown):
-    blocks = markdown_to_blocks(markdown)
-    children = []
-    
-    for block in blocks:
-        block_type = block_to_block_type(block)
-        if block_type == BlockType.PARAGRAPH:
-            node = paragraph_to_html_node(block)
-        elif block_type == BlockType.HEADING:
-            node = heading_to_html_node(block)
-        elif block_type == BlockType.CODE:
-            node = code_to_html_node(block)
-        elif block_type == BlockType.ORDERED_LIST:
-            node = olist_to_html_node(block)
-        elif block_type == BlockType.UNORDERED_LIST:
-            node = ulist_to_html_node(block)
-        elif block_type == BlockType.QUOTE:
-            node = quote_to_html_node(block)
-        else:
-            raise ValueError(f"Unsupported block type: {block_type}")
-        
-        children.append(node)
-    
-    return ParentNode("div", children)
\ No newline at end of file
+    return ParentNode("div", list(iter_block_nodes(markdown.split("\n"))))
@@ -0,0 +1,62 @@
+import hashlib
+import json
+import os
+
+MANIFEST_VERSION = 1
+
+
+def hash_file(path):
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1 << 16), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def load_manifest(manifest_path):
+    # A missing, unreadable or outdated manifest means "rebuild everything"
+    if not os.path.exists(manifest_path):
+        return None
+    try:
+        with open(manifest_path, 'r', encoding='utf-8') as f:
+            manifest = json.load(f)
+    except (OSError, ValueError):
+        return None
+    if not isinstance(manifest, dict) or manifest.get("version") != MANIFEST_VERSION:
+        return None
+    return manifest
+
+
+def save_manifest(manifest_path, manifest):
+    manifest = dict(manifest, version=MANIFEST_VERSION)
+    tmp_path = manifest_path + ".tmp"
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(manifest, f, indent=2, sort_keys=True)
+    os.replace(tmp_path, manifest_path)
+
+
+class ChangeSet:
+    """
+    Paths, relative to the output directory, that a build wrote or deleted.
+    A deploy only needs to upload the changed paths and invalidate both.
+    """
+
+    def __init__(self):
+        self.changed = set()
+        self.deleted = set()
+
+    def mark_changed(self, relative_path):
+        relative_path = relative_path.replace(os.sep, "/")
+        self.deleted.discard(relative_path)
+        self.changed.add(relative_path)
+
+    def mark_deleted(self, relative_path):
+        relative_path = relative_path.replace(os.sep, "/")
+        self.changed.discard(relative_path)
+        self.deleted.add(relative_path)
+
+    def write(self, changed_path, deleted_path):
+        # One path per line, sorted, so the files diff well between builds
+        for path, paths in ((changed_path, self.changed), (deleted_path, self.deleted)):
+            with open(path, 'w', encoding='utf-8') as f:
+                f.writelines(f"{relative_path}\n" for relative_path in sorted(paths))
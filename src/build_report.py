@@ -0,0 +1,138 @@
+import contextlib
+import time
+
+# Stages of generate_page, in the order they run
+STAGES = [
+    "read",
+    "markdown_to_blocks",
+    "block_typing",
+    "inline_parse",
+    "to_html",
+    "template_fill",
+    "write",
+]
+
+
+class PageTimings:
+    """
+    Wall and CPU seconds spent in each stage while generating one page, plus
+    named event counters such as cache hits.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.wall = {}
+        self.cpu = {}
+        self.counters = {}
+
+    def count(self, name, n=1):
+        self.counters[name] = self.counters.get(name, 0) + n
+
+    @contextlib.contextmanager
+    def stage(self, name):
+        wall_start = time.perf_counter()
+        cpu_start = time.process_time()
+        try:
+            yield
+        finally:
+            self.wall[name] = self.wall.get(name, 0.0) + time.perf_counter() - wall_start
+            self.cpu[name] = self.cpu.get(name, 0.0) + time.process_time() - cpu_start
+
+    def total_wall(self):
+        return sum(self.wall.values())
+
+    def total_cpu(self):
+        return sum(self.cpu.values())
+
+    def __repr__(self):
+        return f"PageTimings({self.path}, {self.total_wall():.6f}s)"
+
+
+class NullTimings:
+    # Stand-in used when profiling is off, every stage is a no-op context
+    _context = contextlib.nullcontext()
+
+    def stage(self, name):
+        return self._context
+
+    def count(self, name, n=1):
+        pass
+
+
+NULL_TIMINGS = NullTimings()
+
+
+def percentile(values, fraction):
+    # Nearest-rank percentile of an already sorted list
+    if not values:
+        return 0.0
+    index = min(len(values) - 1, max(0, round(fraction * len(values)) - 1))
+    return values[index]
+
+
+class BuildReport:
+    """
+    Collects PageTimings for a build and summarises them.
+    """
+
+    def __init__(self):
+        self.pages = []
+
+    def page(self, path):
+        timings = PageTimings(path)
+        self.pages.append(timings)
+        return timings
+
+    def add(self, timings):
+        # Timings measured in another process
+        self.pages.append(timings)
+
+    def stage_totals(self):
+        totals = {}
+        for stage in STAGES:
+            walls = [page.wall[stage] for page in self.pages if stage in page.wall]
+            cpus = [page.cpu[stage] for page in self.pages if stage in page.cpu]
+            if walls:
+                totals[stage] = (sum(walls), sum(cpus), sorted(walls))
+        return totals
+
+    def counter_totals(self):
+        totals = {}
+        for page in self.pages:
+            for name, n in page.counters.items():
+                totals[name] = totals.get(name, 0) + n
+        return totals
+
+    def summary(self, slowest=10):
+        lines = [f"Build report: {len(self.pages)} pages"]
+        if not self.pages:
+            return "\n".join(lines)
+
+        totals = self.stage_totals()
+        all_wall = sum(wall for wall, _, _ in totals.values()) or 1.0
+        lines.append(f"{'stage':20} {'wall s':>10} {'cpu s':>10} {'share':>7} {'p50 ms':>9} {'p90 ms':>9} {'p99 ms':>9}")
+        for stage, (wall, cpu, walls) in totals.items():
+            lines.append(
+                f"{stage:20} {wall:10.4f} {cpu:10.4f} {wall / all_wall:7.1%} "
+                f"{percentile(walls, 0.5) * 1000:9.3f} {percentile(walls, 0.9) * 1000:9.3f} "
+                f"{percentile(walls, 0.99) * 1000:9.3f}"
+            )
+
+        page_walls = sorted(page.total_wall() for page in self.pages)
+        lines.append(
+            f"Per page: p50 {percentile(page_walls, 0.5) * 1000:.3f} ms, "
+            f"p90 {percentile(page_walls, 0.9) * 1000:.3f} ms, "
+            f"p99 {percentile(page_walls, 0.99) * 1000:.3f} ms"
+        )
+
+        counters = self.counter_totals()
+        if counters:
+            lines.append("Counters:")
+            for name in sorted(counters):
+                lines.append(f"  {name:30} {counters[name]:>10}")
+
+        lines.append(f"Slowest pages:")
+        for page in sorted(self.pages, key=lambda p: p.total_wall(), reverse=True)[:slowest]:
+            worst_stage = max(page.wall, key=page.wall.get)
+            lines.append(f"  {page.total_wall() * 1000:9.3f} ms  {page.path} (mostly {worst_stage})")
+        return "\n".join(lines)
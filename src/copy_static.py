@@ -1,8 +1,12 @@
+import concurrent.futures
 import os
 import shutil
+import time
 
+from build_manifest import hash_file, load_manifest, save_manifest
 
-def copy_files_recursive(source_dir, dest_dir):
+
+def copy_files_recursive(source_dir, dest_dir, threads=1, verbose=True):
     # First, delete all contents of destination directory if it exists
     if os.path.exists(dest_dir):
         print(f"Deleting destination directory: {dest_dir}")
@@ -12,18 +16,162 @@ def copy_files_recursive(source_dir, dest_dir):
     print(f"Creating destination directory: {dest_dir}")
     os.mkdir(dest_dir)
     
-    # Get list of items in source directory
-    items = os.listdir(source_dir)
-    
-    for item in items:
-        source_path = os.path.join(source_dir, item)
-        dest_path = os.path.join(dest_dir, item)
-        
-        if os.path.isfile(source_path):
-            # It's a file, copy it
+    # Copy every file of the source tree
+    pairs = []
+    for relative_path in list_files(source_dir):
+        pairs.append((os.path.join(source_dir, relative_path), os.path.join(dest_dir, relative_path)))
+    return copy_files(pairs, threads=threads, verbose=verbose)
+
+
+def copy_files(pairs, link=False, threads=1, verbose=True):
+    """
+    Copy (source_path, dest_path) pairs with a pool of `threads` threads.
+    Destination directories are created up front, so the workers only copy.
+    Returns the number of files and bytes copied.
+    """
+    for dest_dir in sorted({os.path.dirname(dest_path) for _, dest_path in pairs}):
+        os.makedirs(dest_dir, exist_ok=True)
+
+    def copy_one(pair):
+        source_path, dest_path = pair
+        if verbose:
             print(f"Copying file: {source_path} -> {dest_path}")
-            shutil.copy(source_path, dest_path)
-        else:
-            # It's a directory, recursively copy it
-            print(f"Copying directory: {source_path} -> {dest_path}")
-            copy_files_recursive(source_path, dest_path)
\ No newline at end of file
+        copy_file(source_path, dest_path, link)
+        return os.path.getsize(dest_path)
+
+    start = time.perf_counter()
+    if threads <= 1 or len(pairs) <= 1:
+        total_bytes = sum(map(copy_one, pairs))
+    else:
+        # Copying is I/O bound, so threads overlap the waits on the disk
+        with concurrent.futures.ThreadPoolExecutor(max_workers=threads) as executor:
+            total_bytes = sum(executor.map(copy_one, pairs))
+    elapsed = time.perf_counter() - start
+
+    if pairs:
+        rate = total_bytes / elapsed / 1e6 if elapsed else 0.0
+        print(f"Copied {len(pairs)} files, {total_bytes / 1e6:.2f} MB in {elapsed:.3f} s ({rate:.1f} MB/s)")
+    return len(pairs), total_bytes
+
+
+def copy_file(source_path, dest_path, link=False):
+    # Never write through an existing file, it may be a hardlink to the source
+    if os.path.lexists(dest_path):
+        os.remove(dest_path)
+
+    if link:
+        try:
+            os.link(source_path, dest_path)
+            return
+        except OSError:
+            # Different filesystem or no hardlink support, fall back to a copy
+            pass
+
+    if hasattr(os, "copy_file_range"):
+        # Lets the kernel copy (or reflink) without passing data through Python
+        try:
+            with open(source_path, 'rb') as src, open(dest_path, 'wb') as dst:
+                while os.copy_file_range(src.fileno(), dst.fileno(), 1 << 30):
+                    pass
+            shutil.copystat(source_path, dest_path)
+            return
+        except OSError:
+            pass
+
+    shutil.copy2(source_path, dest_path)
+
+
+def list_files(source_dir):
+    files = []
+    for dirpath, dirnames, filenames in os.walk(source_dir):
+        dirnames.sort()
+        for filename in sorted(filenames):
+            files.append(os.path.relpath(os.path.join(dirpath, filename), source_dir))
+    return files
+
+
+def file_entry(path, compare):
+    stat = os.stat(path)
+    entry = {"size": stat.st_size, "mtime_ns": stat.st_mtime_ns}
+    if compare == "hash":
+        entry["sha256"] = hash_file(path)
+    return entry
+
+
+def is_up_to_date(source_entry, dest_path, old_entry, compare):
+    if not os.path.exists(dest_path):
+        return False
+    if compare == "hash":
+        return old_entry is not None and old_entry.get("sha256") == source_entry["sha256"]
+    # Copies keep the source mtime, so an unchanged file has the same size and mtime
+    stat = os.stat(dest_path)
+    return stat.st_size == source_entry["size"] and stat.st_mtime_ns == source_entry["mtime_ns"]
+
+
+def sync_files(source_dir, dest_dir, manifest_path, compare="mtime", link=False, threads=1, verbose=True, changes=None,
+               aliases=None):
+    """
+    Make dest_dir contain the files of source_dir, copying only new or changed
+    files. Files this function copied earlier (recorded in the manifest) are
+    removed once they disappear from source_dir; anything else in dest_dir,
+    such as generated pages, is left alone.
+
+    compare is "mtime" (size and modification time) or "hash" (content hash).
+    link=True hardlinks files instead of copying them where possible.
+    Changed files are copied with copy_files, using `threads` threads.
+    Copied and removed files are recorded in changes, a ChangeSet, if given.
+    aliases, if given, maps a relative path to a list of further relative
+    paths the file is also copied to.
+    """
+    manifest = load_manifest(manifest_path)
+    old_files = {} if manifest is None else manifest.get("files", {})
+
+    files = {}
+    pairs = []
+    for relative_path in list_files(source_dir):
+        source_path = os.path.join(source_dir, relative_path)
+        entry = file_entry(source_path, compare)
+        extra_paths = [] if aliases is None else list(aliases(relative_path))
+        if extra_paths:
+            entry["aliases"] = extra_paths
+        files[relative_path] = entry
+
+        old_entry = old_files.get(relative_path)
+        old_paths = [] if old_entry is None else [relative_path] + old_entry.get("aliases", [])
+        for dest_relative_path in [relative_path] + extra_paths:
+            dest_path = os.path.join(dest_dir, dest_relative_path)
+            if not is_up_to_date(entry, dest_path, old_entry if dest_relative_path in old_paths else None, compare):
+                pairs.append((source_path, dest_path))
+                if changes is not None:
+                    changes.mark_changed(dest_relative_path)
+    copied, _ = copy_files(pairs, link, threads, verbose)
+
+    removed = 0
+    for relative_path, old_entry in old_files.items():
+        # Gone from source_dir, or an alias the file is no longer copied to
+        entry = files.get(relative_path)
+        dest_paths = [] if entry is None else [relative_path] + entry.get("aliases", [])
+        for old_dest in [relative_path] + old_entry.get("aliases", []):
+            if old_dest in dest_paths:
+                continue
+            dest_path = os.path.join(dest_dir, old_dest)
+            if os.path.exists(dest_path):
+                print(f"Removing file: {dest_path}")
+                os.remove(dest_path)
+            remove_empty_dirs(os.path.dirname(dest_path), dest_dir)
+            removed += 1
+            if changes is not None:
+                changes.mark_deleted(old_dest)
+
+    total = sum(1 + len(entry.get("aliases", [])) for entry in files.values())
+    save_manifest(manifest_path, {"compare": compare, "files": files})
+    print(f"Static files: {copied} copied, {total - copied} unchanged, {removed} removed")
+    return copied, removed
+
+
+def remove_empty_dirs(path, root):
+    # Remove path and its parents while they are empty, stopping at root
+    root = os.path.abspath(root)
+    while os.path.abspath(path) != root and os.path.isdir(path) and not os.listdir(path):
+        os.rmdir(path)
+        path = os.path.dirname(path)
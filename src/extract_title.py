@@ -1,8 +1,18 @@
-import re
+NO_TITLE_MESSAGE = "No h1 header found in markdown"
+
 
 def extract_title(markdown):
-    for line in markdown.splitlines():
-        match = re.match(r"^# (.+)$", line.strip())
-        if match:
-            return match.group(1).strip()
-    raise Exception("No h1 header found in markdown")
+    return extract_title_from_lines(markdown.splitlines())
+
+
+def extract_title_from_lines(lines):
+    # Stops at the first H1, so a file object is only read up to its title.
+    # Pages are rendered with the title captured by the block parser, this
+    # standalone scan matches a "# " line anywhere.
+    for chunk in lines:
+        for line in chunk.splitlines():
+            line = line.strip()
+            # Stripped, so anything after "# " holds text
+            if line.startswith("# "):
+                return line[2:].strip()
+    raise Exception(NO_TITLE_MESSAGE)
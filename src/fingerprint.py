@@ -0,0 +1,107 @@
+import hashlib
+import json
+import os
+
+from build_manifest import hash_file, load_manifest, save_manifest
+from copy_static import list_files
+from output_writer import write_output
+
+# Written into the output directory: original path -> fingerprinted path
+ASSET_MANIFEST = "asset-manifest.json"
+
+# Assets that are only ever referenced from pages and templates; files with
+# well-known names (favicon.ico, robots.txt, ...) keep them
+FINGERPRINT_EXTENSIONS = {
+    ".css", ".js", ".mjs", ".png", ".jpg", ".jpeg", ".gif", ".svg", ".webp", ".avif", ".woff", ".woff2",
+}
+
+# Hex digits of the content hash put into a name
+FINGERPRINT_LENGTH = 10
+
+
+def is_fingerprinted(relative_path):
+    return os.path.splitext(relative_path)[1].lower() in FINGERPRINT_EXTENSIONS
+
+
+def fingerprint_name(relative_path, digest):
+    # images/logo.png -> images/logo.<hash>.png
+    root, ext = os.path.splitext(relative_path)
+    return f"{root}.{digest[:FINGERPRINT_LENGTH]}{ext}"
+
+
+def hash_assets(source_dir, cache_path):
+    """
+    Return {relative path: sha256} for the files in source_dir that get
+    fingerprinted and the number of files hashed. Hashes are kept in the
+    manifest at cache_path and reused while a file's size and mtime stay the
+    same.
+    """
+    manifest = load_manifest(cache_path)
+    old_files = {} if manifest is None else manifest.get("files", {})
+
+    files = {}
+    hashed = 0
+    for relative_path in list_files(source_dir):
+        if not is_fingerprinted(relative_path):
+            continue
+        path = os.path.join(source_dir, relative_path)
+        key = relative_path.replace(os.sep, "/")
+        stat = os.stat(path)
+        entry = old_files.get(key)
+        if entry is None or entry["size"] != stat.st_size or entry["mtime_ns"] != stat.st_mtime_ns:
+            entry = {"size": stat.st_size, "mtime_ns": stat.st_mtime_ns, "sha256": hash_file(path)}
+            hashed += 1
+        files[key] = entry
+
+    save_manifest(cache_path, {"files": files})
+    return {key: entry["sha256"] for key, entry in files.items()}, hashed
+
+
+class AssetMap:
+    """
+    Fingerprinted names of the static assets, {relative path: relative path}
+    with "/" separators, and the URL rewriting that points references at them.
+    Plain data, so templates holding one can be pickled for worker processes.
+    """
+
+    def __init__(self, names):
+        self.names = dict(names)
+        self.urls = {"/" + path: "/" + name for path, name in self.names.items()}
+        # Part of the template hash and the page cache key
+        self.digest = hashlib.sha256(json.dumps(self.names, sort_keys=True).encode("utf-8")).hexdigest()
+
+    def aliases(self, relative_path):
+        # Where a static file is copied to besides its own path, relative to
+        # the output directory. The original stays, so references the pages
+        # do not go through (url(...) in CSS, raw HTML) keep working
+        name = self.names.get(relative_path.replace(os.sep, "/"))
+        return [] if name is None else [name.replace("/", os.sep)]
+
+    def rewrite(self, url):
+        # Root-relative URLs only; a query string or fragment is kept
+        end = len(url)
+        for marker in "?#":
+            index = url.find(marker)
+            if index != -1:
+                end = min(end, index)
+        path = url[:end]
+        return self.urls.get(path, path) + url[end:]
+
+    def __repr__(self):
+        return f"AssetMap({len(self.names)} assets)"
+
+
+def build_asset_map(source_dir, cache_path):
+    digests, hashed = hash_assets(source_dir, cache_path)
+    names = {path: fingerprint_name(path, digest) for path, digest in digests.items()}
+    print(f"Fingerprinted {len(names)} assets ({hashed} hashed)")
+    return AssetMap(names)
+
+
+def write_asset_manifest(dest_dir, assets, changes=None):
+    manifest_path = os.path.join(dest_dir, ASSET_MANIFEST)
+    old_hash = hash_file(manifest_path) if os.path.exists(manifest_path) else None
+    _, written = write_output(manifest_path, json.dumps(assets.names, indent=2, sort_keys=True) + "\n", old_hash)
+    if written and changes is not None:
+        changes.mark_changed(ASSET_MANIFEST)
+    return written
@@ -1,41 +1,138 @@
-import os
-from block_markdown import markdown_to_html_node
-from extract_title import extract_title
+import itertools
+from block_markdown import scan_block_lines, block_lines_type, block_lines_to_html_node, block_title, iter_blocks
+from build_report import NULL_TIMINGS
+from extract_title import NO_TITLE_MESSAGE
+from htmlnode import ParentNode
+from inline_markdown import inline_cache_info
+from output_writer import AtomicOutput, write_output
+from search_index import PageTerms
+from template import ensure_template
 
 
-def generate_page(from_path, template_path, dest_path, basepath="/"):
-    print(f"Generating page from {from_path} to {dest_path} using {template_path}")
-    
+def markdown_to_page(markdown_content, timings=NULL_TIMINGS):
+    # Parse a page's markdown into its title and content node, timing each
+    # step the same way markdown_to_html_node runs them. The title is the text
+    # of the first level 1 heading block.
+    cache_before = inline_cache_info()
+    with timings.stage("markdown_to_blocks"):
+        blocks = list(scan_block_lines(markdown_content.split("\n")))
+    with timings.stage("block_typing"):
+        block_types = [block_lines_type(block_lines) for block_lines in blocks]
+    title = None
+    with timings.stage("inline_parse"):
+        children = []
+        for block_lines, block_type in zip(blocks, block_types):
+            children.append(block_lines_to_html_node(block_lines, block_type))
+            if title is None:
+                title = block_title(block_lines, block_type)
+        html_node = ParentNode("div", children)
+    cache_after = inline_cache_info()
+    timings.count("inline_cache_hits", cache_after.hits - cache_before.hits)
+    timings.count("inline_cache_misses", cache_after.misses - cache_before.misses)
+
+    if title is None:
+        raise Exception(NO_TITLE_MESSAGE)
+    return title, html_node
+
+
+def generate_page(from_path, template, dest_path, basepath="/", timings=None, cache=None, old_hash=None,
+                  collect_terms=False):
+    # template is either the path of the template file or a Template compiled
+    # for the same basepath, which lets a build read and split it only once.
+    # timings is an optional build_report.PageTimings to record each stage in,
+    # cache an optional page_cache.PageCache of rendered page bodies.
+    # old_hash is the output hash recorded when dest_path was last written, an
+    # identical page is then not written again. With collect_terms, the page's
+    # search terms are collected from its nodes. Returns the output hash,
+    # whether dest_path was written and (title, sorted terms) or None.
+    template = ensure_template(template, basepath)
+    print(f"Generating page from {from_path} to {dest_path}")
+    profiling = timings is not None
+    if timings is None:
+        timings = NULL_TIMINGS
+
+    # A template repeating or lacking {{ Content }} needs the buffered page
+    if not profiling and cache is None and template.content_slots == 1:
+        return stream_page(from_path, template, dest_path, old_hash, collect_terms)
+
     # Read the markdown file
+    with timings.stage("read"):
+        markdown_content = read_markdown(from_path)
+
+    full_html, document = render_page(markdown_content, template, timings, cache, collect_terms)
+
+    with timings.stage("write"):
+        output_hash, written = write_output(dest_path, full_html, old_hash)
+    return output_hash, written, document
+
+
+def read_markdown(from_path):
     with open(from_path, 'r', encoding='utf-8') as f:
-        markdown_content = f.read()
-    
-    # Read the template file
-    with open(template_path, 'r', encoding='utf-8') as f:
-        template_content = f.read()
-    
-    # Convert markdown to HTML
-    html_node = markdown_to_html_node(markdown_content)
-    html_content = html_node.to_html()
-    
-    # Extract the title
-    title = extract_title(markdown_content)
-    
-    # Replace placeholders in template
-    full_html = template_content.replace("{{ Title }}", title)
-    full_html = full_html.replace("{{ Content }}", html_content)
-    
-    # Replace absolute paths with basepath
-    if basepath != "/":
-        # Only replace if basepath is not the default "/"
-        full_html = full_html.replace('href="/', f'href="{basepath}')
-        full_html = full_html.replace('src="/', f'src="{basepath}')
-    
-    # Create destination directory if it doesn't exist
-    dest_dir = os.path.dirname(dest_path)
-    if dest_dir and not os.path.exists(dest_dir):
-        os.makedirs(dest_dir)
-    
-    # Write the final HTML to destination
-    with open(dest_path, 'w', encoding='utf-8') as f:
-        f.write(full_html)
\ No newline at end of file
+        return f.read()
+
+
+def render_page(markdown_content, template, timings=NULL_TIMINGS, cache=None, collect_terms=False):
+    """
+    Render markdown into the full HTML of a page with a compiled Template,
+    reusing and filling cache when given. Returns the HTML and, with
+    collect_terms, (title, sorted search terms), otherwise None.
+    """
+    cached = None
+    if cache is not None:
+        cache_key = cache.key(markdown_content, template.basepath, template.assets_digest)
+        cached = cache.get(cache_key)
+        if cached is not None and collect_terms and cached[2] is None:
+            # Cached by a build without a search index
+            cached = None
+        timings.count("page_cache_hits" if cached is not None else "page_cache_misses")
+
+    terms = None
+    if cached is not None:
+        # Unchanged markdown, skip parsing entirely
+        title, html_content, terms = cached
+    else:
+        # Convert markdown to HTML
+        title, html_node = markdown_to_page(markdown_content, timings)
+        if collect_terms:
+            terms = PageTerms().add_node_terms(html_node)
+
+        # Build the page as a string, which also lets each step be timed on its
+        # own. The basepath is applied to link and image URLs as they are written.
+        with timings.stage("to_html"):
+            html_content = html_node.to_html(template.rewrite_url)
+        if cache is not None:
+            cache.put(cache_key, title, html_content, terms)
+
+    with timings.stage("template_fill"):
+        full_html = template.render(title, html_content)
+    return full_html, ((title, terms) if collect_terms else None)
+
+
+def stream_page(from_path, template, dest_path, old_hash=None, collect_terms=False):
+    # Render a page block by block while the markdown is read line by line, so
+    # neither the markdown, its node tree nor its HTML is ever held whole
+    with open(from_path, 'r', encoding='utf-8') as src:
+        # The title is written before the content, so blocks are only held
+        # until the first level 1 heading, usually the first block
+        blocks = iter_blocks(src)
+        # Terms are taken from each block's nodes as they are made
+        page_terms = PageTerms() if collect_terms else None
+        add_node = page_terms.add_node if collect_terms else lambda node: node
+        head = []
+        title = None
+        for block_lines, block_type in blocks:
+            head.append(add_node(block_lines_to_html_node(block_lines, block_type)))
+            title = block_title(block_lines, block_type)
+            if title is not None:
+                break
+        if title is None:
+            raise Exception(NO_TITLE_MESSAGE)
+
+        # ParentNode consumes its children once, a generator keeps one block alive
+        rest = (add_node(block_lines_to_html_node(block_lines, block_type)) for block_lines, block_type in blocks)
+        html_node = ParentNode("div", itertools.chain(head, rest))
+        # A failed page leaves no half-written output behind
+        with AtomicOutput(dest_path, old_hash) as output:
+            template.write(output, title, html_node)
+    document = (title, page_terms.sorted()) if collect_terms else None
+    return output.digest, output.written, document
@@ -1,22 +1,40 @@
 from textnode import TextType
 
+# Props holding a URL, passed through the rewrite_url function given to a
+# serialization, which returns the URL to write (e.g. with a basepath)
+URL_PROPS = frozenset(("href", "src"))
+
 
 class HTMLNode:
+    # Slots instead of a per-node __dict__, a page's tree holds a node for
+    # every inline span. Subclasses add no fields and declare empty slots.
+    __slots__ = ("tag", "value", "children", "props")
+
     def __init__(self, tag=None, value=None, children=None, props=None):
         self.tag = tag
         self.value = value
         self.children = children
-        self.props = props
+        # None is the shared "no props" value, empty dicts are not kept per node
+        self.props = props or None
+
+    def to_html(self, rewrite_url=None):
+        return "".join(self.iter_html(rewrite_url))
 
-    def to_html(self):
-        raise NotImplementedError("to_html method must be implemented by subclasses")
+    def iter_html(self, rewrite_url=None):
+        raise NotImplementedError("iter_html method must be implemented by subclasses")
 
-    def props_to_html(self):
+    def write_html(self, fp, rewrite_url=None):
+        # Stream the fragments to a file object without joining them first
+        fp.writelines(self.iter_html(rewrite_url))
+
+    def props_to_html(self, rewrite_url=None):
         if self.props is None:
             return ""
         
         props_html = ""
         for key, value in self.props.items():
+            if rewrite_url is not None and key in URL_PROPS:
+                value = rewrite_url(value)
             props_html += f' {key}="{value}"'
         
         return props_html
@@ -26,49 +44,85 @@ class HTMLNode:
 
 
 class LeafNode(HTMLNode):
+    __slots__ = ()
+
     def __init__(self, tag, value, props=None):
         super().__init__(tag, value, None, props)
 
-    def to_html(self):
+    def iter_html(self, rewrite_url=None):
         if self.value is None:
             raise ValueError("All leaf nodes must have a value")
         
         if self.tag is None:
-            return self.value
+            yield self.value
+            return
         
-        return f"<{self.tag}{self.props_to_html()}>{self.value}</{self.tag}>"
+        yield f"<{self.tag}{self.props_to_html(rewrite_url)}>{self.value}</{self.tag}>"
 
 
 class ParentNode(HTMLNode):
+    __slots__ = ()
+
     def __init__(self, tag, children, props=None):
         super().__init__(tag, None, children, props)
 
-    def to_html(self):
+    def iter_html(self, rewrite_url=None):
         if self.tag is None:
             raise ValueError("ParentNode must have a tag")
         
         if self.children is None:
             raise ValueError("ParentNode must have children")
         
-        children_html = ""
+        # Children are yielded as fragments, so no level of the tree copies
+        # the HTML of its descendants
+        yield f"<{self.tag}{self.props_to_html(rewrite_url)}>"
         for child in self.children:
-            children_html += child.to_html()
-        
-        return f"<{self.tag}{self.props_to_html()}>{children_html}</{self.tag}>"
+            yield from child.iter_html(rewrite_url)
+        yield f"</{self.tag}>"
+
+
+def text_to_leaf(text_node):
+    return LeafNode(None, text_node.text)
+
+
+def bold_to_leaf(text_node):
+    return LeafNode("b", text_node.text)
+
+
+def italic_to_leaf(text_node):
+    return LeafNode("i", text_node.text)
+
+
+def code_to_leaf(text_node):
+    return LeafNode("code", text_node.text)
+
+
+def link_to_leaf(text_node):
+    return LeafNode("a", text_node.text, {"href": text_node.url})
+
+
+def image_to_leaf(text_node):
+    return LeafNode("img", "", {"src": text_node.url, "alt": text_node.text})
+
+
+# Text type -> function turning a text node into an HTML node. Keys are not
+# limited to TextType, extensions may register their own inline types.
+TEXT_RENDERERS = {
+    TextType.TEXT: text_to_leaf,
+    TextType.BOLD: bold_to_leaf,
+    TextType.ITALIC: italic_to_leaf,
+    TextType.CODE: code_to_leaf,
+    TextType.LINK: link_to_leaf,
+    TextType.IMAGE: image_to_leaf,
+}
+
+
+def register_text_renderer(text_type, renderer):
+    TEXT_RENDERERS[text_type] = renderer
 
 
 def text_node_to_html_node(text_node):
-    if text_node.text_type == TextType.TEXT:
-        return LeafNode(None, text_node.text)
-    elif text_node.text_type == TextType.BOLD:
-        return LeafNode("b", text_node.text)
-    elif text_node.text_type == TextType.ITALIC:
-        return LeafNode("i", text_node.text)
-    elif text_node.text_type == TextType.CODE:
-        return LeafNode("code", text_node.text)
-    elif text_node.text_type == TextType.LINK:
-        return LeafNode("a", text_node.text, {"href": text_node.url})
-    elif text_node.text_type == TextType.IMAGE:
-        return LeafNode("img", "", {"src": text_node.url, "alt": text_node.text})
-    else:
-        raise ValueError(f"Unsupported TextType: {text_node.text_type}")
\ No newline at end of file
+    renderer = TEXT_RENDERERS.get(text_node.text_type)
+    if renderer is None:
+        raise ValueError(f"Unsupported TextType: {text_node.text_type}")
+    return renderer(text_node)
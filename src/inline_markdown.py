@@ -1,4 +1,7 @@
+import functools
 import re
+from collections import namedtuple
+
 from textnode import TextNode, TextType
 
 
@@ -29,19 +32,19 @@ def split_nodes_delimiter(old_nodes, delimiter, text_type):
     return new_nodes
 
 
+IMAGE_PATTERN = re.compile(r"!\[([^\[\]]*?)\]\(([^\(\)]*?)\)")
+LINK_PATTERN = re.compile(r"(?<!!)\[([^\[\]]*?)\]\(([^\(\)]*?)\)")
+
+
 def extract_markdown_images(text):
-    pattern = r"!\[([^\[\]]*?)\]\(([^\(\)]*?)\)"
-    matches = re.findall(pattern, text)
-    return matches
+    return IMAGE_PATTERN.findall(text)
 
 
 def extract_markdown_links(text):
-    pattern = r"(?<!!)\[([^\[\]]*?)\]\(([^\(\)]*?)\)"
-    matches = re.findall(pattern, text)
-    return matches
+    return LINK_PATTERN.findall(text)
 
 
-def split_nodes_image(old_nodes):
+def split_nodes_pattern(old_nodes, pattern, text_type):
     new_nodes = []
     
     for old_node in old_nodes:
@@ -49,78 +52,126 @@ def split_nodes_image(old_nodes):
             new_nodes.append(old_node)
             continue
         
-        current_text = old_node.text
-        images = extract_markdown_images(current_text)
+        # Slice around each match's offsets instead of re-splitting the
+        # remaining text, so the cost stays linear in the text length
+        text = old_node.text
+        pos = 0
+        for match in pattern.finditer(text):
+            # Add text before the match (if any)
+            if match.start() > pos:
+                new_nodes.append(TextNode(text[pos:match.start()], TextType.TEXT))
+            new_nodes.append(TextNode(match.group(1), text_type, match.group(2)))
+            pos = match.end()
         
-        if not images:
+        if pos == 0:
+            # Nothing matched, keep the original node
             new_nodes.append(old_node)
-            continue
-        
-        for alt_text, url in images:
-            # Find the full markdown syntax in the text
-            image_markdown = f"![{alt_text}]({url})"
-            sections = current_text.split(image_markdown, 1)
-            
-            # Add text before the image (if any)
-            if sections[0]:
-                new_nodes.append(TextNode(sections[0], TextType.TEXT))
-            
-            # Add the image node
-            new_nodes.append(TextNode(alt_text, TextType.IMAGE, url))
-            
-            # Continue with the remaining text
-            current_text = sections[1] if len(sections) > 1 else ""
-        
-        # Add any remaining text after the last image
-        if current_text:
-            new_nodes.append(TextNode(current_text, TextType.TEXT))
+        elif pos < len(text):
+            # Add any remaining text after the last match
+            new_nodes.append(TextNode(text[pos:], TextType.TEXT))
     
     return new_nodes
 
 
+def split_nodes_image(old_nodes):
+    return split_nodes_pattern(old_nodes, IMAGE_PATTERN, TextType.IMAGE)
+
+
 def split_nodes_link(old_nodes):
-    new_nodes = []
-    
-    for old_node in old_nodes:
-        if old_node.text_type != TextType.TEXT:
-            new_nodes.append(old_node)
-            continue
-        
-        current_text = old_node.text
-        links = extract_markdown_links(current_text)
-        
-        if not links:
-            new_nodes.append(old_node)
-            continue
-        
-        for link_text, url in links:
-            # Find the full markdown syntax in the text
-            link_markdown = f"[{link_text}]({url})"
-            sections = current_text.split(link_markdown, 1)
-            
-            # Add text before the link (if any)
-            if sections[0]:
-                new_nodes.append(TextNode(sections[0], TextType.TEXT))
-            
-            # Add the link node
-            new_nodes.append(TextNode(link_text, TextType.LINK, url))
-            
-            # Continue with the remaining text
-            current_text = sections[1] if len(sections) > 1 else ""
-        
-        # Add any remaining text after the last link
-        if current_text:
-            new_nodes.append(TextNode(current_text, TextType.TEXT))
-    
-    return new_nodes
+    return split_nodes_pattern(old_nodes, LINK_PATTERN, TextType.LINK)
+
+
+DELIMITER_TYPES = {
+    "**": TextType.BOLD,
+    "*": TextType.ITALIC,
+    "_": TextType.ITALIC,
+    "`": TextType.CODE,
+}
+
+# Delimiters bind in the order "**", "*", "_", "`", then images, then links.
+# Image and link parts can't contain delimiter characters, as those would have
+# split them apart first.
+INLINE_TOKEN_PATTERN = re.compile(
+    r"(?P<delimiter>\*\*|\*|_|`)"
+    r"|!\[(?P<alt>[^\[\]*_`]*)\]\((?P<src>[^()*_`]*)\)"
+    r"|(?<!!)\[(?P<anchor>[^\[\]*_`]*)\]\((?P<href>[^()*_`]*)\)"
+)
+
+# Inside an open section, the delimiters that bind at least as tightly as the
+# opening one. Meeting any of them other than the opening delimiter itself
+# means the section is never closed.
+SECTION_END_PATTERNS = {
+    "*": re.compile(r"\*\*|\*"),
+    "_": re.compile(r"\*|_"),
+    "`": re.compile(r"\*|_|`"),
+}
+
+
+def find_section_end(text, start, delimiter):
+    if delimiter == "**":
+        return text.find("**", start)
+    match = SECTION_END_PATTERNS[delimiter].search(text, start)
+    if match is None or match.group() != delimiter:
+        return -1
+    return match.start()
 
 
 def text_to_textnodes(text):
-    nodes = [TextNode(text, TextType.TEXT)]
-    nodes = split_nodes_delimiter(nodes, "**", TextType.BOLD)
-    nodes = split_nodes_delimiter(nodes, "*", TextType.ITALIC)
-    nodes = split_nodes_delimiter(nodes, "_", TextType.ITALIC)
-    nodes = split_nodes_delimiter(nodes, "`", TextType.CODE)
-    nodes = split_nodes_image(nodes)
-    nodes = split_nodes_link(nodes)
-    return nodes
\ No newline at end of file
+    # Single left-to-right scan, equivalent to running split_nodes_delimiter
+    # for "**", "*", "_" and "`" followed by split_nodes_image and
+    # split_nodes_link, without rebuilding the node list six times
+    nodes = []
+    pos = 0
+    while pos < len(text):
+        match = INLINE_TOKEN_PATTERN.search(text, pos)
+        if match is None:
+            nodes.append(TextNode(text[pos:], TextType.TEXT))
+            break
+
+        if match.start() > pos:
+            nodes.append(TextNode(text[pos:match.start()], TextType.TEXT))
+
+        delimiter = match.group("delimiter")
+        if delimiter is not None:
+            end = find_section_end(text, match.end(), delimiter)
+            if end == -1:
+                raise ValueError(f"Invalid markdown, formatted section not closed")
+            if end > match.end():
+                nodes.append(TextNode(text[match.end():end], DELIMITER_TYPES[delimiter]))
+            pos = end + len(delimiter)
+        elif match.group("src") is not None:
+            nodes.append(TextNode(match.group("alt"), TextType.IMAGE, match.group("src")))
+            pos = match.end()
+        else:
+            nodes.append(TextNode(match.group("anchor"), TextType.LINK, match.group("href")))
+            pos = match.end()
+
+    return nodes
+
+
+# Read-only counterpart of TextNode with the same attributes, safe to share
+# between every caller that parses the same text
+InlineToken = namedtuple("InlineToken", ["text", "text_type", "url"])
+
+INLINE_CACHE_SIZE = 8192
+# Long paragraphs rarely repeat, caching them would only evict short lines
+INLINE_CACHE_MAX_TEXT = 512
+
+
+@functools.lru_cache(maxsize=INLINE_CACHE_SIZE)
+def cached_text_to_tokens(text):
+    return tuple(InlineToken(node.text, node.text_type, node.url) for node in text_to_textnodes(text))
+
+
+def text_to_tokens(text):
+    """
+    Like text_to_textnodes, but returns a tuple of InlineTokens and memoizes
+    short texts, so repeated list items and boilerplate lines are parsed once.
+    """
+    if len(text) > INLINE_CACHE_MAX_TEXT:
+        return tuple(InlineToken(node.text, node.text_type, node.url) for node in text_to_textnodes(text))
+    return cached_text_to_tokens(text)
+
+
+def inline_cache_info():
+    return cached_text_to_tokens.cache_info()
@@ -1,65 +1,414 @@
+import argparse
+import concurrent.futures
+import cProfile
+import functools
 import os
-import shutil
 import sys
 from textnode import TextNode, TextType
-from copy_static import copy_files_recursive
+from copy_static import sync_files, remove_empty_dirs, list_files
 from generate_page import generate_page
+from output_writer import output_entry, recorded_hash
+from build_manifest import hash_file, load_manifest, save_manifest, ChangeSet
+from template import ensure_template, load_template
+from build_report import BuildReport, PageTimings
+from page_cache import PageCache, DEFAULT_MAX_BYTES
+from pipeline import generate_pages_async
+from fingerprint import ASSET_MANIFEST, build_asset_map, write_asset_manifest
+from search_index import SEARCH_DIR, SearchIndex, page_url
+from precompress import precompress_files, remove_stale_siblings, compressed_siblings
+from shard import SHARD_MANIFEST, parse_shard, in_shard, write_shard_manifest
 
 
-def generate_pages_recursive(dir_path_content, template_path, dest_dir_path, basepath="/"):
+def page_dest_path(relative_path, dest_dir_path):
+    # Only the file name changes extension, directories are kept as-is
+    relative_dir, filename = os.path.split(relative_path)
+    return os.path.join(dest_dir_path, relative_dir, filename.replace('.md', '.html'))
+
+
+def find_pages(dir_path_content, relative_dir=""):
     """
-    Recursively generate HTML pages from all markdown files in a directory.
+    Recursively collect the relative paths of all markdown files in a directory.
     """
-    for item in os.listdir(dir_path_content):
-        item_path = os.path.join(dir_path_content, item)
-        
+    pages = []
+    current_dir = os.path.join(dir_path_content, relative_dir)
+    for item in sorted(os.listdir(current_dir)):
+        item_path = os.path.join(current_dir, item)
+        relative_path = os.path.join(relative_dir, item)
+
         if os.path.isfile(item_path) and item.endswith('.md'):
-            # It's a markdown file, generate HTML
-            relative_path = os.path.relpath(item_path, dir_path_content)
-            dest_path = os.path.join(dest_dir_path, relative_path.replace('.md', '.html'))
-            generate_page(item_path, template_path, dest_path, basepath)
-            
+            pages.append(relative_path)
         elif os.path.isdir(item_path):
-            # It's a directory, recurse into it
-            relative_dir = os.path.relpath(item_path, dir_path_content)
-            dest_subdir = os.path.join(dest_dir_path, relative_dir)
-            generate_pages_recursive(item_path, template_path, dest_subdir, basepath)
-
-
-def main():
-    # Get basepath from command line argument, default to "/"
-    basepath = "/"
-    if len(sys.argv) > 1:
-        basepath = sys.argv[1]
-    
+            pages.extend(find_pages(dir_path_content, relative_path))
+    return pages
+
+
+def generate_page_task(task, profile=False, cache=None, collect_terms=False):
+    from_path, template, dest_path, basepath, old_hash = task
+    timings = PageTimings(from_path) if profile else None
+    try:
+        output_hash, written, document = generate_page(from_path, template, dest_path, basepath, timings, cache,
+                                                       old_hash, collect_terms)
+    except Exception as e:
+        # Re-raised in the parent process, so the message must name the page
+        raise RuntimeError(f"Failed to generate page from {from_path}: {e}") from e
+    return dest_path, output_hash, written, document, timings
+
+
+def generate_pages(tasks, jobs=1, report=None, cache=None, io_threads=0, collect_terms=False):
+    """
+    Render (from_path, template, dest_path, basepath, old_hash) tasks, in a
+    process pool when jobs > 1. Every page is rendered independently, so the
+    output is the same as a serial build. Stage timings are added to report if
+    given, and rendered page bodies are reused from and stored in cache if
+    given. With io_threads > 0, pages are read and written that many at a time
+    in an asyncio pipeline, overlapping with rendering.
+
+    old_hash is the output hash recorded when dest_path was last written, or
+    None; a page rendering to the same bytes is not written again. Returns
+    {dest_path: (output_hash, written, document)}, document being the page's
+    (title, search terms) with collect_terms, otherwise None.
+    """
+    if io_threads > 0 and tasks:
+        return generate_pages_async(tasks, jobs, io_threads, report, cache, collect_terms)
+
+    task_func = functools.partial(generate_page_task, profile=report is not None, cache=cache,
+                                  collect_terms=collect_terms)
+    if jobs <= 1 or len(tasks) <= 1:
+        return collect_results(map(task_func, tasks), report)
+
+    # Hand pages to workers in batches to keep the IPC overhead per page low
+    chunksize = max(1, len(tasks) // (jobs * 4))
+    with concurrent.futures.ProcessPoolExecutor(max_workers=jobs) as executor:
+        return collect_results(executor.map(task_func, tasks, chunksize=chunksize), report)
+
+
+def collect_results(results, report):
+    # Consuming the results is what runs (or waits for) every task
+    outputs = {}
+    for dest_path, output_hash, written, document, timings in results:
+        outputs[dest_path] = (output_hash, written, document)
+        if report is not None:
+            report.add(timings)
+    return outputs
+
+
+def generate_pages_recursive(dir_path_content, template, dest_dir_path, basepath="/", jobs=1, report=None, cache=None,
+                             io_threads=0, shard=None):
+    """
+    Recursively generate HTML pages from all markdown files in a directory,
+    or only from those in shard, an (i, N) tuple, if given.
+    """
+    template = ensure_template(template, basepath)
+    tasks = []
+    for relative_path in find_pages(dir_path_content):
+        if not in_shard(relative_path, shard):
+            continue
+        from_path = os.path.join(dir_path_content, relative_path)
+        dest_path = page_dest_path(relative_path, dest_dir_path)
+        tasks.append((from_path, template, dest_path, basepath, None))
+    generate_pages(tasks, jobs, report, cache, io_threads)
+
+
+def remove_page_output(dest_path, dest_dir_path):
+    if os.path.exists(dest_path):
+        print(f"Removing stale page: {dest_path}")
+        os.remove(dest_path)
+
+    # Prune directories left empty by the removal, but never dest_dir_path itself
+    remove_empty_dirs(os.path.dirname(dest_path), dest_dir_path)
+
+
+def generate_pages_incremental(dir_path_content, template, dest_dir_path, manifest_path, basepath="/", jobs=1, report=None,
+                               cache=None, io_threads=0, shard=None, force=False, changes=None, search=None):
+    """
+    Regenerate only the pages whose markdown, template or basepath changed since
+    the build recorded in the manifest, and remove pages whose source is gone.
+    With shard, an (i, N) tuple, pages outside the shard count as gone. force
+    renders every page. Either way a page whose output hashes to the value in
+    the manifest is not written again. Written and removed pages are recorded
+    in changes, a ChangeSet, if given. search, a search_index.SearchIndex, is
+    updated with the rendered pages, and pages it holds no current terms for
+    are rendered as well.
+    """
+    template = ensure_template(template, basepath)
+    manifest = load_manifest(manifest_path)
+    template_hash = template.hash
+
+    # A different template or basepath affects every page
+    full_rebuild = (
+        force
+        or manifest is None
+        or manifest.get("template") != template_hash
+        or manifest.get("basepath") != basepath
+    )
+    old_pages = {} if manifest is None else manifest.get("pages", {})
+    old_outputs = {} if manifest is None else manifest.get("outputs", {})
+
+    pages = {}
+    tasks = []
+    for relative_path in find_pages(dir_path_content):
+        if not in_shard(relative_path, shard):
+            continue
+        from_path = os.path.join(dir_path_content, relative_path)
+        dest_path = page_dest_path(relative_path, dest_dir_path)
+        source_hash = hash_file(from_path)
+        pages[relative_path] = source_hash
+        # None for a missing output, or one changed since the last build
+        old_hash = recorded_hash(dest_path, old_outputs.get(relative_path))
+
+        if (
+            full_rebuild
+            or old_pages.get(relative_path) != source_hash
+            or old_hash is None
+            or (search is not None and not search.is_current(relative_path, source_hash))
+        ):
+            tasks.append((from_path, template, dest_path, basepath, old_hash))
+    results = generate_pages(tasks, jobs, report, cache, io_threads, search is not None)
+    rendered = len(tasks)
+
+    # Pages that were not rendered keep the output entry of their last build
+    outputs = {relative_path: old_outputs[relative_path] for relative_path in pages if relative_path in old_outputs}
+    written = 0
+    for relative_path in pages:
+        dest_path = page_dest_path(relative_path, dest_dir_path)
+        if dest_path not in results:
+            continue
+        output_hash, page_written, document = results[dest_path]
+        outputs[relative_path] = output_entry(dest_path, output_hash)
+        if search is not None:
+            title, terms = document
+            search.update_page(relative_path, page_url(page_dest_path(relative_path, ""), basepath), title, terms,
+                               pages[relative_path])
+        if page_written:
+            written += 1
+            if changes is not None:
+                changes.mark_changed(page_dest_path(relative_path, ""))
+
+    removed = 0
+    for relative_path in old_pages:
+        if relative_path not in pages:
+            remove_page_output(page_dest_path(relative_path, dest_dir_path), dest_dir_path)
+            removed += 1
+            if changes is not None:
+                changes.mark_deleted(page_dest_path(relative_path, ""))
+
+    if search is not None:
+        search.retain(pages)
+
+    save_manifest(manifest_path, {
+        "template": template_hash,
+        "basepath": basepath,
+        "pages": pages,
+        "outputs": outputs,
+    })
+
+    print(f"Pages: {rendered} generated ({written} written), {len(pages) - rendered} unchanged, {removed} removed")
+    return rendered, removed
+
+
+def remove_untracked_files(dest_dir_path, tracked, changes=None):
+    """
+    Delete files in dest_dir_path whose relative path is not in tracked, such
+    as the output of pages and static files that a full build no longer
+    produces, and prune the directories this leaves empty.
+    """
+    tracked = {relative_path.replace(os.sep, "/") for relative_path in tracked}
+    removed = 0
+    for relative_path in list_files(dest_dir_path):
+        if relative_path.replace(os.sep, "/") in tracked:
+            continue
+        path = os.path.join(dest_dir_path, relative_path)
+        print(f"Removing untracked file: {path}")
+        os.remove(path)
+        remove_empty_dirs(os.path.dirname(path), dest_dir_path)
+        removed += 1
+        if changes is not None:
+            changes.mark_deleted(relative_path)
+    return removed
+
+
+def check_output_dir(dest_dir_path, project_root):
+    """
+    Raise ValueError unless dest_dir_path is safe for a full build to empty of
+    untracked files: not the project root or a directory holding it, and not
+    a directory with content/, static/ or src/ in it.
+    """
+    real_dest = os.path.realpath(dest_dir_path)
+    real_root = os.path.realpath(project_root)
+    if os.path.commonpath([real_dest, real_root]) == real_dest:
+        raise ValueError(f"Refusing to build into {dest_dir_path}: it contains the project")
+    for name in ("content", "static", "src"):
+        if os.path.isdir(os.path.join(real_dest, name)):
+            raise ValueError(f"Refusing to build into {dest_dir_path}: it contains {name}/")
+
+
+def parse_args(argv):
+    parser = argparse.ArgumentParser(description="Build the static site into docs/")
+    parser.add_argument("basepath", nargs="?", default="/",
+                        help="URL prefix the site is served from (default: /)")
+    parser.add_argument("--output", metavar="DIR", help="directory the site is built into (default: docs/)")
+    parser.add_argument("--shard", type=parse_shard, metavar="i/N",
+                        help="render only the i-th of N deterministic slices of the pages, "
+                             "combine the outputs with 'main.py merge'")
+    parser.add_argument("--incremental", action="store_true",
+                        help="only regenerate pages whose sources changed since the last build")
+    parser.add_argument("--static-compare", choices=["mtime", "hash"], default="mtime",
+                        help="how unchanged static files are detected (default: mtime)")
+    parser.add_argument("--link-static", action="store_true",
+                        help="hardlink static files into docs/ instead of copying them")
+    parser.add_argument("--copy-threads", type=int, default=8,
+                        help="threads used to copy static files (default: 8)")
+    parser.add_argument("--verbose-copy", action="store_true",
+                        help="print every static file that is copied")
+    parser.add_argument("--fingerprint", action="store_true",
+                        help="also copy CSS, JS, images and fonts as name.<hash>.ext, point page and template "
+                             "references at them and write docs/" + ASSET_MANIFEST)
+    parser.add_argument("--search-index", action="store_true",
+                        help="write a sharded client-side search index of the pages to docs/" + SEARCH_DIR)
+    parser.add_argument("--precompress", action="store_true",
+                        help="write .gz siblings of text outputs (and .br/.zst when brotli/zstandard are installed)")
+    parser.add_argument("-j", "--jobs", type=int, default=1,
+                        help="number of processes used to render pages, 0 for one per CPU (default: 1)")
+    parser.add_argument("--io-threads", type=int, default=0,
+                        help="read and write pages this many at a time while others render, "
+                             "for slow or network storage (default: 0, off)")
+    parser.add_argument("--cache", action="store_true",
+                        help="reuse rendered page bodies from the page cache when the markdown is unchanged")
+    parser.add_argument("--cache-dir", help="page cache directory, implies --cache (default: .ssg-cache)")
+    parser.add_argument("--cache-size", type=int, default=DEFAULT_MAX_BYTES // (1024 * 1024),
+                        help="page cache size limit in MB (default: %(default)s)")
+    parser.add_argument("--profile", action="store_true", default=os.environ.get("SSG_PROFILE") == "1",
+                        help="time every stage of every page and print a build report (or set SSG_PROFILE=1)")
+    parser.add_argument("--profile-output", metavar="FILE",
+                        help="also write cProfile stats of the main process to FILE")
+    args = parser.parse_args(argv)
+    if args.search_index and args.shard is not None:
+        # Each shard would only index its own pages, and merge cannot combine them
+        parser.error("--search-index cannot be combined with --shard")
+    return args
+
+
+def main(argv=None):
+    argv = sys.argv[1:] if argv is None else argv
+    if argv and argv[0] == "serve":
+        from serve import serve_main
+        return serve_main(argv[1:])
+    if argv and argv[0] == "merge":
+        from shard import merge_main
+        return merge_main(argv[1:])
+
+    args = parse_args(argv)
+    basepath = args.basepath
+    jobs = args.jobs if args.jobs > 0 else (os.cpu_count() or 1)
+
     # Get the project root directory (parent of src)
     current_dir = os.path.dirname(os.path.abspath(__file__))
     project_root = os.path.dirname(current_dir)
-    
+
     # Define paths - now using docs instead of public
     static_dir = os.path.join(project_root, "static")
-    docs_dir = os.path.join(project_root, "docs")
+    docs_dir = args.output or os.path.join(project_root, "docs")
     content_dir = os.path.join(project_root, "content")
     template_path = os.path.join(project_root, "template.html")
-    
+    manifest_path = os.path.join(project_root, ".ssg-manifest.json")
+    static_manifest_path = os.path.join(project_root, ".ssg-static.json")
+    asset_hashes_path = os.path.join(project_root, ".ssg-assets.json")
+    search_state_path = os.path.join(project_root, ".ssg-search.json")
+    try:
+        # A full build deletes whatever it did not write in docs_dir
+        check_output_dir(docs_dir, project_root)
+    except ValueError as e:
+        print(e)
+        return 1
+    shard = args.shard
+    if shard is not None:
+        # Every shard keeps its own record of the pages it rendered
+        manifest_path = os.path.join(project_root, f".ssg-manifest-{shard[0]}-of-{shard[1]}.json")
+        print(f"Building shard {shard[0]}/{shard[1]}")
+    # Static files are copied by the first shard only
+    copy_static = shard is None or shard[0] == 1
+
     print("Starting static site generator...")
     print(f"Using basepath: {basepath}")
-    
-    # Delete anything in the docs directory
-    if os.path.exists(docs_dir):
-        shutil.rmtree(docs_dir)
-    os.makedirs(docs_dir)
-    
-    # Copy static files to docs directory
-    print(f"Copying files from {static_dir} to {docs_dir}")
-    copy_files_recursive(static_dir, docs_dir)
-    
-    # Generate all pages recursively
+
+    report = BuildReport() if args.profile else None
+    cache = None
+    if args.cache or args.cache_dir:
+        cache = PageCache(args.cache_dir or os.path.join(project_root, ".ssg-cache"),
+                          args.cache_size * 1024 * 1024)
+    profiler = None
+    if args.profile_output:
+        profiler = cProfile.Profile()
+        profiler.enable()
+
+    # Every shard computes the same names, but only the first copies the assets
+    assets = build_asset_map(static_dir, asset_hashes_path) if args.fingerprint else None
+
+    # Read and compile the template once for all pages
+    template = load_template(template_path, basepath, assets)
+
+    # Outputs are rewritten in place, so unchanged files keep their mtime
+    os.makedirs(docs_dir, exist_ok=True)
+    changes = ChangeSet()
+
+    # Copy new and changed static files to docs directory
+    if copy_static:
+        print(f"Copying files from {static_dir} to {docs_dir}")
+        sync_files(static_dir, docs_dir, static_manifest_path, args.static_compare, args.link_static,
+                   args.copy_threads, args.verbose_copy, changes, None if assets is None else assets.aliases)
+        if assets is not None:
+            write_asset_manifest(docs_dir, assets, changes)
+
+    # Generate pages; the manifest is written in both modes so a full build
+    # can be followed by incremental ones
     print(f"Generating pages from {content_dir} to {docs_dir}")
-    generate_pages_recursive(content_dir, template_path, docs_dir, basepath)
-    
+    search = SearchIndex(docs_dir, search_state_path) if args.search_index else None
+    generate_pages_incremental(content_dir, template, docs_dir, manifest_path, basepath, jobs, report, cache,
+                               args.io_threads, shard, not args.incremental, changes, search)
+    pages = find_pages(content_dir)
+    shard_pages = [page_dest_path(page, "") for page in pages if in_shard(page, shard)]
+    static_files = list_files(static_dir) if copy_static else []
+    if assets is not None and copy_static:
+        static_files += [alias for relative_path in static_files for alias in assets.aliases(relative_path)] + [ASSET_MANIFEST]
+    tracked = shard_pages + static_files
+    if search is not None:
+        tracked += search.write(changes)
+    if args.precompress:
+        # Runs after pages and static files are written, siblings of unchanged files are kept
+        precompress_files(docs_dir, tracked, jobs=jobs, changes=changes)
+        remove_stale_siblings(docs_dir, static_files, changes)
+        tracked += [sibling for relative_path in tracked for sibling in compressed_siblings(relative_path)]
+    if not args.incremental:
+        # A full build leaves exactly the current pages and static files
+        remove_untracked_files(docs_dir, tracked + [SHARD_MANIFEST], changes)
+    if shard is not None:
+        write_shard_manifest(
+            docs_dir, shard,
+            [page_dest_path(page, "") for page in pages],
+            shard_pages,
+            static_files,
+        )
+
+    # For deploys: what to upload and what to invalidate
+    suffix = "" if shard is None else f"-{shard[0]}-of-{shard[1]}"
+    changes.write(os.path.join(project_root, f"changed{suffix}.txt"),
+                  os.path.join(project_root, f"deleted{suffix}.txt"))
+    print(f"Changes: {len(changes.changed)} changed, {len(changes.deleted)} deleted")
+
+    if cache is not None:
+        entries, size = cache.prune()
+        print(f"Page cache: {entries} entries, {size / 1e6:.2f} MB in {cache.cache_dir}")
+
+    if profiler is not None:
+        # Worker processes are not profiled, use --jobs 1 for a complete profile
+        profiler.disable()
+        profiler.dump_stats(args.profile_output)
+        print(f"cProfile stats written to {args.profile_output}")
+    if report is not None:
+        print(report.summary())
+
     print("Static site generation complete!")
 
 
 if __name__ == "__main__":
-    main()
+    sys.exit(main())
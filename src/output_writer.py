@@ -0,0 +1,126 @@
+import hashlib
+import os
+
+# Characters collected before a streamed page is encoded, hashed and written
+FLUSH_CHARS = 1 << 16
+
+
+def temp_path(dest_path):
+    # Unique per process, so parallel builds never share a temporary file
+    return f"{dest_path}.{os.getpid()}.tmp"
+
+
+def replace_file(tmp_path, dest_path, digest, old_hash):
+    """
+    Move a finished temporary file into place, or drop it when the content
+    hashes to old_hash and dest_path exists, which leaves the file and its
+    mtime untouched. Returns whether dest_path was written.
+    """
+    if digest == old_hash and os.path.exists(dest_path):
+        os.remove(tmp_path)
+        return False
+    os.replace(tmp_path, dest_path)
+    return True
+
+
+def ensure_parent_dir(dest_path):
+    dest_dir = os.path.dirname(dest_path)
+    if dest_dir and not os.path.exists(dest_dir):
+        os.makedirs(dest_dir, exist_ok=True)
+
+
+def output_entry(dest_path, digest):
+    # What a manifest records for an output: its hash, and the size and mtime
+    # that tell whether the file was changed outside the build since
+    stat = os.stat(dest_path)
+    return {"sha256": digest, "size": stat.st_size, "mtime_ns": stat.st_mtime_ns}
+
+
+def recorded_hash(dest_path, entry):
+    """
+    The hash in entry, an output_entry() from the last build, if dest_path is
+    still the file that build wrote. None when the file is missing or its size
+    or mtime differ, so the output is written again.
+    """
+    if not isinstance(entry, dict):
+        return None
+    try:
+        stat = os.stat(dest_path)
+    except FileNotFoundError:
+        return None
+    if stat.st_size != entry.get("size") or stat.st_mtime_ns != entry.get("mtime_ns"):
+        return None
+    return entry.get("sha256")
+
+
+def write_output(dest_path, text, old_hash=None):
+    """
+    Write text (UTF-8) to dest_path through a temporary file and an atomic
+    rename, unless it hashes to old_hash, the hash recorded when the file was
+    last written. Returns the content hash and whether the file was written.
+    """
+    data = text.encode("utf-8")
+    digest = hashlib.sha256(data).hexdigest()
+    if digest == old_hash and os.path.exists(dest_path):
+        return digest, False
+
+    ensure_parent_dir(dest_path)
+    tmp_path = temp_path(dest_path)
+    with open(tmp_path, 'wb') as f:
+        f.write(data)
+    os.replace(tmp_path, dest_path)
+    return digest, True
+
+
+class AtomicOutput:
+    """
+    A text file object for streaming a page to dest_path. Everything goes to a
+    temporary file and is hashed on the way, and on a clean exit the file is
+    renamed into place unless the hash equals old_hash. On an error the
+    temporary file is removed and dest_path is left as it was.
+    """
+
+    def __init__(self, dest_path, old_hash=None):
+        self.dest_path = dest_path
+        self.old_hash = old_hash
+        self.digest = None
+        self.written = False
+        self.hasher = hashlib.sha256()
+        self.pending = []
+        self.pending_chars = 0
+
+    def __enter__(self):
+        ensure_parent_dir(self.dest_path)
+        self.tmp_path = temp_path(self.dest_path)
+        self.fp = open(self.tmp_path, 'wb')
+        return self
+
+    def write(self, text):
+        self.pending.append(text)
+        self.pending_chars += len(text)
+        if self.pending_chars >= FLUSH_CHARS:
+            self.flush()
+
+    def writelines(self, fragments):
+        for text in fragments:
+            self.write(text)
+
+    def flush(self):
+        data = "".join(self.pending).encode("utf-8")
+        self.pending = []
+        self.pending_chars = 0
+        self.hasher.update(data)
+        self.fp.write(data)
+
+    def __exit__(self, exc_type, exc, tb):
+        try:
+            if exc_type is None:
+                self.flush()
+        finally:
+            self.fp.close()
+        if exc_type is not None:
+            os.remove(self.tmp_path)
+            return False
+        self.digest = self.hasher.hexdigest()
+        self.written = replace_file(self.tmp_path, self.dest_path, self.digest, self.old_hash)
+        return False
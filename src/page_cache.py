@@ -0,0 +1,97 @@
+import hashlib
+import json
+import os
+
+# Bump whenever a parser or serializer change alters the HTML for the same
+# markdown, so entries rendered by older code are never used
+PARSER_VERSION = "3"
+
+DEFAULT_MAX_BYTES = 512 * 1024 * 1024
+
+
+class PageCache:
+    """
+    On-disk cache of rendered page bodies: (markdown, basepath, asset names)
+    hash -> (title, HTML, search terms or None).
+
+    Entries are small JSON files fanned out over subdirectories. A hit bumps
+    the entry's mtime, and prune() evicts the least recently used entries
+    until the cache fits in max_bytes. Writes go through a temporary file and
+    a rename, so worker processes can share one cache directory.
+    """
+
+    def __init__(self, cache_dir, max_bytes=DEFAULT_MAX_BYTES):
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+
+    def key(self, markdown_content, basepath="/", assets_digest=None):
+        # The basepath and the fingerprinted asset names are part of the rendered URLs
+        prefix = f"{PARSER_VERSION}\0{basepath}\0"
+        if assets_digest is not None:
+            prefix += f"{assets_digest}\0"
+        digest = hashlib.sha256(prefix.encode("utf-8"))
+        digest.update(markdown_content.encode("utf-8"))
+        return digest.hexdigest()
+
+    def entry_path(self, key):
+        return os.path.join(self.cache_dir, key[:2], key + ".json")
+
+    def get(self, key):
+        path = self.entry_path(key)
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                entry = json.load(f)
+        except (OSError, ValueError):
+            return None
+        # Valid JSON of another shape (an older or foreign entry) is a miss too
+        if not isinstance(entry, dict) or not isinstance(entry.get("title"), str) \
+                or not isinstance(entry.get("html"), str) or not isinstance(entry.get("terms", []), list):
+            return None
+        try:
+            # Mark as recently used for LRU eviction
+            os.utime(path)
+        except OSError:
+            pass
+        return entry["title"], entry["html"], entry.get("terms")
+
+    def put(self, key, title, html, terms=None):
+        path = self.entry_path(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            entry = {"title": title, "html": html}
+            if terms is not None:
+                # The page's search terms, kept when a search index is built
+                entry["terms"] = terms
+            json.dump(entry, f)
+        os.replace(tmp_path, path)
+
+    def prune(self):
+        """
+        Evict least recently used entries until the cache fits in max_bytes.
+        Returns the number of entries and bytes left.
+        """
+        entries = []
+        if os.path.isdir(self.cache_dir):
+            for dirpath, _, filenames in os.walk(self.cache_dir):
+                for filename in filenames:
+                    path = os.path.join(dirpath, filename)
+                    try:
+                        stat = os.stat(path)
+                    except FileNotFoundError:
+                        continue
+                    entries.append((stat.st_mtime_ns, stat.st_size, path))
+
+        total = sum(size for _, size, _ in entries)
+        entries.sort()
+        evicted = 0
+        for _, size, path in entries:
+            if total <= self.max_bytes:
+                break
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+            total -= size
+            evicted += 1
+        return len(entries) - evicted, total
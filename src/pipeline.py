@@ -0,0 +1,110 @@
+import asyncio
+import concurrent.futures
+
+from build_report import NULL_TIMINGS, PageTimings
+from generate_page import read_markdown, render_page
+from output_writer import write_output
+
+# Pages waiting between two stages, bounds the memory held by a fast reader or
+# a slow writer
+QUEUE_SIZE = 64
+
+
+def render_task(from_path, markdown_content, template, timings, cache, collect_terms):
+    # Runs in a worker, which may be another process
+    try:
+        html, document = render_page(markdown_content, template, timings, cache, collect_terms)
+    except Exception as e:
+        raise RuntimeError(f"Failed to generate page from {from_path}: {e}") from e
+    return html, document, timings
+
+
+def read_task(from_path, timings):
+    try:
+        with timings.stage("read"):
+            return read_markdown(from_path)
+    except Exception as e:
+        raise RuntimeError(f"Failed to read page {from_path}: {e}") from e
+
+
+def write_task(dest_path, html, old_hash, timings):
+    with timings.stage("write"):
+        return write_output(dest_path, html, old_hash)
+
+
+async def run_pipeline(tasks, jobs=1, io_threads=8, report=None, cache=None, collect_terms=False):
+    """
+    Render (from_path, template, dest_path, basepath, old_hash) tasks in three stages
+    joined by bounded queues: io_threads concurrent reads, rendering in jobs
+    processes (or one thread), and io_threads concurrent writes. Reading and
+    writing other pages overlaps with rendering, which hides the latency of
+    network storage. Returns {dest_path: (output_hash, written, document)},
+    document being (title, search terms) with collect_terms, otherwise None.
+    """
+    loop = asyncio.get_running_loop()
+    profile = report is not None
+    read_queue = asyncio.Queue(QUEUE_SIZE)
+    write_queue = asyncio.Queue(QUEUE_SIZE)
+    pending = iter(tasks)
+    outputs = {}
+
+    # Keep one page queued per process, so none waits on the event loop
+    renderers = 2 * jobs if jobs > 1 else 1
+    io_executor = concurrent.futures.ThreadPoolExecutor(io_threads)
+    if jobs > 1:
+        render_executor = concurrent.futures.ProcessPoolExecutor(jobs)
+    else:
+        render_executor = concurrent.futures.ThreadPoolExecutor(1)
+
+    async def read_pages():
+        # Readers share the task iterator, it only advances between awaits
+        for from_path, template, dest_path, _, old_hash in pending:
+            timings = PageTimings(from_path) if profile else NULL_TIMINGS
+            markdown_content = await loop.run_in_executor(io_executor, read_task, from_path, timings)
+            await read_queue.put((from_path, template, dest_path, old_hash, markdown_content, timings))
+
+    async def render_pages():
+        while (item := await read_queue.get()) is not None:
+            from_path, template, dest_path, old_hash, markdown_content, timings = item
+            print(f"Generating page from {from_path} to {dest_path}")
+            html, document, timings = await loop.run_in_executor(
+                render_executor, render_task, from_path, markdown_content, template, timings, cache, collect_terms
+            )
+            await write_queue.put((dest_path, html, old_hash, document, timings))
+
+    async def write_pages():
+        while (item := await write_queue.get()) is not None:
+            dest_path, html, old_hash, document, timings = item
+            output_hash, written = await loop.run_in_executor(io_executor, write_task, dest_path, html, old_hash, timings)
+            outputs[dest_path] = (output_hash, written, document)
+            if profile:
+                report.add(timings)
+
+    async def finish(workers, queue, count):
+        # Once a stage is done, tell every worker of the next one to stop
+        await asyncio.gather(*workers)
+        for _ in range(count):
+            await queue.put(None)
+
+    reader_tasks = [asyncio.create_task(read_pages()) for _ in range(io_threads)]
+    render_tasks = [asyncio.create_task(render_pages()) for _ in range(renderers)]
+    writer_tasks = [asyncio.create_task(write_pages()) for _ in range(io_threads)]
+    stages = reader_tasks + render_tasks + writer_tasks
+    stages.append(asyncio.create_task(finish(reader_tasks, read_queue, renderers)))
+    stages.append(asyncio.create_task(finish(render_tasks, write_queue, io_threads)))
+    try:
+        await asyncio.gather(*stages)
+    except BaseException:
+        # A failed page stops the build, no stage may be left waiting on a queue
+        for task in stages:
+            task.cancel()
+        await asyncio.gather(*stages, return_exceptions=True)
+        raise
+    finally:
+        io_executor.shutdown()
+        render_executor.shutdown()
+    return outputs
+
+
+def generate_pages_async(tasks, jobs=1, io_threads=8, report=None, cache=None, collect_terms=False):
+    return asyncio.run(run_pipeline(tasks, jobs, io_threads, report, cache, collect_terms))
@@ -0,0 +1,141 @@
+import concurrent.futures
+import functools
+import gzip
+import os
+
+from copy_static import list_files, remove_empty_dirs
+from output_writer import temp_path
+
+# Optional encoders, used when the module is installed
+try:
+    import brotli
+except ImportError:
+    brotli = None
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+# Outputs worth precompressing; images and fonts are compressed already
+TEXT_EXTENSIONS = {".html", ".htm", ".css", ".js", ".mjs", ".json", ".svg", ".xml", ".txt", ".map"}
+
+# Every suffix a compressed sibling can have, installed encoder or not
+SUFFIXES = (".gz", ".br", ".zst")
+
+
+def compress_gzip(data):
+    # mtime=0 keeps the output identical between builds
+    return gzip.compress(data, compresslevel=9, mtime=0)
+
+
+def compress_brotli(data):
+    return brotli.compress(data, quality=11)
+
+
+def compress_zstd(data):
+    return zstandard.ZstdCompressor(level=19).compress(data)
+
+
+COMPRESSORS = {".gz": compress_gzip, ".br": compress_brotli, ".zst": compress_zstd}
+
+
+def available_suffixes():
+    suffixes = [".gz"]
+    if brotli is not None:
+        suffixes.append(".br")
+    if zstandard is not None:
+        suffixes.append(".zst")
+    return suffixes
+
+
+def is_compressible(relative_path):
+    return os.path.splitext(relative_path)[1].lower() in TEXT_EXTENSIONS
+
+
+def compressed_siblings(relative_path, suffixes=SUFFIXES):
+    if not is_compressible(relative_path):
+        return []
+    return [relative_path + suffix for suffix in suffixes]
+
+
+def compress_file(path, force, suffixes):
+    """
+    Write path + suffix for every suffix whose file is missing or older than
+    path, or for every suffix if force is true. Returns the suffixes that were written.
+    """
+    mtime = os.stat(path).st_mtime_ns
+    data = None
+    written = []
+    for suffix in suffixes:
+        sibling = path + suffix
+        try:
+            if not force and os.stat(sibling).st_mtime_ns >= mtime:
+                continue
+        except FileNotFoundError:
+            pass
+        if data is None:
+            with open(path, 'rb') as f:
+                data = f.read()
+        tmp_path = temp_path(sibling)
+        with open(tmp_path, 'wb') as f:
+            f.write(COMPRESSORS[suffix](data))
+        os.replace(tmp_path, sibling)
+        written.append(suffix)
+    return written
+
+
+def precompress_files(dest_dir, relative_paths, suffixes=None, jobs=1, changes=None):
+    """
+    Write compressed siblings (index.html.gz, ...) of the text files among
+    relative_paths, in a process pool when jobs > 1. suffixes defaults to
+    every encoding whose module is installed. Siblings newer than their file
+    are kept, so only new and changed outputs are compressed again.
+
+    changes, a ChangeSet, records the written siblings if given. Files it
+    already lists as changed are always compressed, since a copied static
+    file keeps its source mtime, which can be older than a stale sibling.
+    """
+    suffixes = available_suffixes() if suffixes is None else suffixes
+    paths = [relative_path for relative_path in relative_paths if is_compressible(relative_path)]
+    changed = set() if changes is None else changes.changed
+    full_paths = [os.path.join(dest_dir, relative_path) for relative_path in paths]
+    forced = [relative_path.replace(os.sep, "/") in changed for relative_path in paths]
+    task_func = functools.partial(compress_file, suffixes=suffixes)
+    if jobs <= 1 or len(paths) <= 1:
+        results = list(map(task_func, full_paths, forced))
+    else:
+        chunksize = max(1, len(paths) // (jobs * 4))
+        with concurrent.futures.ProcessPoolExecutor(max_workers=jobs) as executor:
+            results = list(executor.map(task_func, full_paths, forced, chunksize=chunksize))
+
+    written = 0
+    for relative_path, written_suffixes in zip(paths, results):
+        for suffix in written_suffixes:
+            written += 1
+            if changes is not None:
+                changes.mark_changed(relative_path + suffix)
+    print(f"Precompressed ({', '.join(suffixes)}): {written} files written, {len(paths)} text files")
+    return written
+
+
+def remove_stale_siblings(dest_dir, keep=(), changes=None):
+    """
+    Delete compressed siblings whose file no longer exists, unless their
+    relative path is in keep (a static file that merely looks like one).
+    """
+    keep = {relative_path.replace(os.sep, "/") for relative_path in keep}
+    removed = 0
+    for relative_path in list_files(dest_dir):
+        source_path, suffix = os.path.splitext(relative_path)
+        if suffix not in SUFFIXES or not is_compressible(source_path):
+            continue
+        if relative_path.replace(os.sep, "/") in keep or os.path.exists(os.path.join(dest_dir, source_path)):
+            continue
+        path = os.path.join(dest_dir, relative_path)
+        print(f"Removing stale compressed file: {path}")
+        os.remove(path)
+        remove_empty_dirs(os.path.dirname(path), dest_dir)
+        removed += 1
+        if changes is not None:
+            changes.mark_deleted(relative_path)
+    return removed
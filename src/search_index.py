@@ -0,0 +1,311 @@
+import heapq
+import json
+import os
+import re
+
+from build_manifest import load_manifest, save_manifest
+from copy_static import remove_empty_dirs
+from output_writer import output_entry, recorded_hash, write_output
+
+# The index lives in this directory of the output:
+#   index.json             shard counts, term limits and the hash below
+#   terms-<i>-of-<N>.json  {term: [page id, ...]} for the terms hashing to i
+#   docs-<k>.json          [[url, title] or null, ...] for page ids from k * DOCS_PER_SHARD
+# A browser loads index.json, then only the shards of the terms it looks up.
+SEARCH_DIR = "search"
+INDEX_VERSION = 1
+
+# Term shards are split (their number doubled) once one serializes larger
+MAX_SHARD_BYTES = 64 * 1024
+MAX_TERM_SHARDS = 4096
+DOCS_PER_SHARD = 500
+
+TOKEN_PATTERN = re.compile(r"\w+")
+MIN_TERM_LENGTH = 2
+MAX_TERM_LENGTH = 32
+
+
+def tokenize(text):
+    for term in TOKEN_PATTERN.findall(text.lower()):
+        if MIN_TERM_LENGTH <= len(term) <= MAX_TERM_LENGTH:
+            yield term
+
+
+def term_shard(term, count):
+    # 32-bit FNV-1a of the UTF-8 bytes, a few lines to repeat in the browser
+    value = 0x811c9dc5
+    for byte in term.encode("utf-8"):
+        value = ((value ^ byte) * 0x01000193) & 0xffffffff
+    return value % count
+
+
+def node_text(node):
+    # Leaf values are the text of the TextNodes they were made from, images
+    # keep theirs in the alt prop
+    if node.children is None:
+        if node.value:
+            yield node.value
+        if node.props is not None and "alt" in node.props:
+            yield node.props["alt"]
+        return
+    for child in node.children:
+        yield from node_text(child)
+
+
+class PageTerms:
+    """
+    The distinct terms of one page, collected block by block as it is
+    rendered, so a streamed page never has its whole text in memory.
+    """
+
+    def __init__(self):
+        self.terms = set()
+
+    def add_node(self, node):
+        # Returns node, to be used inline while blocks are generated
+        for text in node_text(node):
+            self.terms.update(tokenize(text))
+        return node
+
+    def add_node_terms(self, node):
+        # Collect from a whole tree and return its sorted terms
+        self.add_node(node)
+        return self.sorted()
+
+    def sorted(self):
+        return sorted(self.terms)
+
+
+def dump_json(value):
+    return json.dumps(value, separators=(",", ":"), ensure_ascii=False, sort_keys=True)
+
+
+def page_url(relative_html_path, basepath="/"):
+    # blog/tom/index.html -> <basepath>blog/tom/
+    relative_html_path = relative_html_path.replace(os.sep, "/")
+    if relative_html_path == "index.html" or relative_html_path.endswith("/index.html"):
+        relative_html_path = relative_html_path[:-len("index.html")]
+    return basepath + relative_html_path
+
+
+class SearchIndex:
+    """
+    Inverted index of the site's pages, written as shards into dest_dir.
+
+    The pages (id, url, title, terms and the hash of the markdown they were
+    taken from) are kept between builds in the state
+    file at state_path. update_page and remove_page only record which
+    postings change, and write() loads, patches and rewrites just the shards
+    holding them. The shards are rebuilt from the state when the files are
+    missing or a shard has to be split.
+    """
+
+    def __init__(self, dest_dir, state_path):
+        self.dest_dir = dest_dir
+        self.state_path = state_path
+        state = load_manifest(state_path)
+        if state is None or state.get("index_version") != INDEX_VERSION:
+            state = {}
+        self.pages = state.get("pages", {})
+        self.shard_count = state.get("shards", 1)
+        self.outputs = state.get("outputs", {})
+
+        # term -> {page id: whether the page now contains the term}
+        self.term_changes = {}
+        # page id -> [url, title], or None for a removed page
+        self.doc_changes = {}
+
+        used = {page["id"] for page in self.pages.values()}
+        self.next_id = max(used) + 1 if used else 0
+        self.free_ids = [doc_id for doc_id in range(self.next_id) if doc_id not in used]
+        heapq.heapify(self.free_ids)
+
+    def is_current(self, relative_path, source_hash):
+        # False for pages not indexed yet, or changed by a build without the index
+        page = self.pages.get(relative_path.replace(os.sep, "/"))
+        return page is not None and page.get("source") == source_hash
+
+    def allocate_id(self):
+        # Reuse the ids of removed pages, which keeps the docs shards dense
+        if self.free_ids:
+            return heapq.heappop(self.free_ids)
+        self.next_id += 1
+        return self.next_id - 1
+
+    def update_page(self, relative_path, url, title, terms, source_hash=None):
+        relative_path = relative_path.replace(os.sep, "/")
+        terms = sorted(terms)
+        old_page = self.pages.get(relative_path)
+        if old_page is not None and (old_page["url"], old_page["title"], old_page["terms"]) == (url, title, terms):
+            old_page["source"] = source_hash
+            return
+
+        doc_id = self.allocate_id() if old_page is None else old_page["id"]
+        old_terms = set() if old_page is None else set(old_page["terms"])
+        new_terms = set(terms)
+        for term in old_terms - new_terms:
+            self.term_changes.setdefault(term, {})[doc_id] = False
+        for term in new_terms - old_terms:
+            self.term_changes.setdefault(term, {})[doc_id] = True
+        self.doc_changes[doc_id] = [url, title]
+        self.pages[relative_path] = {"id": doc_id, "url": url, "title": title, "terms": terms, "source": source_hash}
+
+    def remove_page(self, relative_path):
+        page = self.pages.pop(relative_path.replace(os.sep, "/"), None)
+        if page is None:
+            return
+        for term in page["terms"]:
+            self.term_changes.setdefault(term, {})[page["id"]] = False
+        self.doc_changes[page["id"]] = None
+        heapq.heappush(self.free_ids, page["id"])
+
+    def retain(self, relative_paths):
+        # Drop the pages that are not among relative_paths
+        keep = {relative_path.replace(os.sep, "/") for relative_path in relative_paths}
+        for relative_path in [path for path in self.pages if path not in keep]:
+            self.remove_page(relative_path)
+
+    def term_file(self, index):
+        return f"{SEARCH_DIR}/terms-{index}-of-{self.shard_count}.json"
+
+    def docs_file(self, index):
+        return f"{SEARCH_DIR}/docs-{index}.json"
+
+    def doc_shard_count(self):
+        return (self.next_id + DOCS_PER_SHARD - 1) // DOCS_PER_SHARD
+
+    def load_file(self, relative_path):
+        with open(os.path.join(self.dest_dir, relative_path), 'r', encoding='utf-8') as f:
+            return json.load(f)
+
+    def build_shards(self):
+        # Every shard from the pages in the state
+        term_shards = [{} for _ in range(self.shard_count)]
+        shard_of = {}
+        for page in self.pages.values():
+            for term in page["terms"]:
+                index = shard_of.get(term)
+                if index is None:
+                    index = shard_of[term] = term_shard(term, self.shard_count)
+                term_shards[index].setdefault(term, []).append(page["id"])
+        for shard in term_shards:
+            for ids in shard.values():
+                ids.sort()
+
+        doc_shards = [[None] * DOCS_PER_SHARD for _ in range(self.doc_shard_count())]
+        for page in self.pages.values():
+            doc_shards[page["id"] // DOCS_PER_SHARD][page["id"] % DOCS_PER_SHARD] = [page["url"], page["title"]]
+        return dict(enumerate(term_shards)), dict(enumerate(doc_shards))
+
+    def patch_shards(self):
+        # Only the shards holding changed postings, loaded from the last build
+        term_shards = {}
+        for term, updates in self.term_changes.items():
+            index = term_shard(term, self.shard_count)
+            if index not in term_shards:
+                term_shards[index] = self.load_file(self.term_file(index))
+            ids = set(term_shards[index].get(term, []))
+            for doc_id, present in updates.items():
+                if present:
+                    ids.add(doc_id)
+                else:
+                    ids.discard(doc_id)
+            if ids:
+                term_shards[index][term] = sorted(ids)
+            else:
+                term_shards[index].pop(term, None)
+
+        doc_shards = {}
+        for doc_id, doc in self.doc_changes.items():
+            index = doc_id // DOCS_PER_SHARD
+            if index not in doc_shards:
+                relative_path = self.docs_file(index)
+                doc_shards[index] = self.load_file(relative_path) if relative_path in self.outputs else []
+            doc_shards[index].extend([None] * (DOCS_PER_SHARD - len(doc_shards[index])))
+            doc_shards[index][doc_id % DOCS_PER_SHARD] = doc
+        return term_shards, doc_shards
+
+    def expected_files(self):
+        return (
+            [f"{SEARCH_DIR}/index.json"]
+            + [self.term_file(index) for index in range(self.shard_count)]
+            + [self.docs_file(index) for index in range(self.doc_shard_count())]
+        )
+
+    def write(self, changes=None):
+        """
+        Write the changed shards and save the state. Returns the relative
+        paths of all index files; written and removed ones are recorded in
+        changes, a ChangeSet, if given.
+        """
+        # Patching needs the files of the last build as it wrote them; docs
+        # shards for new page ids do not exist yet
+        intact = all(
+            recorded_hash(os.path.join(self.dest_dir, relative_path), self.outputs.get(relative_path)) is not None
+            for relative_path in self.expected_files()
+            if relative_path in self.outputs or not relative_path.startswith(f"{SEARCH_DIR}/docs-")
+        )
+        term_shards = doc_shards = None
+        if intact:
+            try:
+                term_shards, doc_shards = self.patch_shards()
+            except (OSError, ValueError, KeyError):
+                term_shards = None
+        if term_shards is None:
+            term_shards, doc_shards = self.build_shards()
+
+        texts = {index: dump_json(shard) for index, shard in term_shards.items()}
+        # Split the shards while one is too large for a browser to fetch cheaply
+        while self.shard_count < MAX_TERM_SHARDS and any(len(text.encode("utf-8")) > MAX_SHARD_BYTES for text in texts.values()):
+            self.shard_count *= 2
+            term_shards, doc_shards = self.build_shards()
+            texts = {index: dump_json(shard) for index, shard in term_shards.items()}
+
+        files = {self.term_file(index): text for index, text in texts.items()}
+        for index, shard in doc_shards.items():
+            # Trailing unused ids are not written
+            while shard and shard[-1] is None:
+                shard.pop()
+            files[self.docs_file(index)] = dump_json(shard)
+        files[f"{SEARCH_DIR}/index.json"] = dump_json({
+            "version": INDEX_VERSION,
+            "pages": len(self.pages),
+            "term_shards": self.shard_count,
+            "term_hash": "fnv1a32",
+            "term_pattern": TOKEN_PATTERN.pattern,
+            "min_term_length": MIN_TERM_LENGTH,
+            "max_term_length": MAX_TERM_LENGTH,
+            "docs_per_shard": DOCS_PER_SHARD,
+            "doc_shards": self.doc_shard_count(),
+        })
+
+        written = 0
+        for relative_path, text in files.items():
+            path = os.path.join(self.dest_dir, relative_path)
+            output_hash, file_written = write_output(path, text, recorded_hash(path, self.outputs.get(relative_path)))
+            self.outputs[relative_path] = output_entry(path, output_hash)
+            if file_written:
+                written += 1
+                if changes is not None:
+                    changes.mark_changed(relative_path)
+
+        expected = self.expected_files()
+        for relative_path in [path for path in self.outputs if path not in expected]:
+            path = os.path.join(self.dest_dir, relative_path)
+            if os.path.exists(path):
+                os.remove(path)
+                remove_empty_dirs(os.path.dirname(path), self.dest_dir)
+            del self.outputs[relative_path]
+            if changes is not None:
+                changes.mark_deleted(relative_path)
+
+        self.term_changes = {}
+        self.doc_changes = {}
+        save_manifest(self.state_path, {
+            "index_version": INDEX_VERSION,
+            "pages": self.pages,
+            "shards": self.shard_count,
+            "outputs": self.outputs,
+        })
+        print(f"Search index: {len(self.pages)} pages, {self.shard_count} term shards, {written} files written")
+        return expected
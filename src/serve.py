@@ -0,0 +1,257 @@
+import argparse
+import http.server
+import os
+import threading
+import time
+
+from copy_static import sync_files
+from generate_page import markdown_to_page
+from main import find_pages, page_dest_path, remove_page_output
+from template import load_template
+from watcher import make_watcher
+
+LIVERELOAD_PATH = "/__livereload"
+LIVERELOAD_SCRIPT = (
+    "<script>new EventSource(\"" + LIVERELOAD_PATH + "\")"
+    ".onmessage = function () { location.reload(); };</script>"
+)
+
+
+class DevSite:
+    """
+    The site as kept in memory by the dev server. Every page's title and
+    rendered content is cached, so a markdown change re-renders one page and
+    a template change only refills the template for every page.
+    """
+
+    def __init__(self, content_dir, static_dir, template_path, dest_dir, static_manifest_path, basepath="/"):
+        self.content_dir = os.path.abspath(content_dir)
+        self.static_dir = os.path.abspath(static_dir)
+        self.template_path = os.path.abspath(template_path)
+        self.dest_dir = dest_dir
+        self.static_manifest_path = static_manifest_path
+        self.basepath = basepath
+        self.template = None
+        # relative markdown path -> (title, content HTML)
+        self.pages = {}
+
+    def build(self):
+        os.makedirs(self.dest_dir, exist_ok=True)
+        self.sync_static()
+        self.template = load_template(self.template_path, self.basepath)
+        for relative_path in find_pages(self.content_dir):
+            self.render_page(relative_path)
+
+    def sync_static(self):
+        sync_files(self.static_dir, self.dest_dir, self.static_manifest_path, verbose=False)
+
+    def render_page(self, relative_path):
+        with open(os.path.join(self.content_dir, relative_path), 'r', encoding='utf-8') as f:
+            markdown_content = f.read()
+        title, html_node = markdown_to_page(markdown_content)
+        self.pages[relative_path] = (title, html_node.to_html(self.template.rewrite_url))
+        self.write_page(relative_path)
+
+    def write_page(self, relative_path):
+        title, content = self.pages[relative_path]
+        dest_path = page_dest_path(relative_path, self.dest_dir)
+        os.makedirs(os.path.dirname(dest_path), exist_ok=True)
+        with open(dest_path, 'w', encoding='utf-8') as f:
+            f.write(self.template.render(title, content))
+
+    def remove_page(self, relative_path):
+        del self.pages[relative_path]
+        remove_page_output(page_dest_path(relative_path, self.dest_dir), self.dest_dir)
+
+    def reload_template(self):
+        # Markdown is not parsed again, only the template is refilled
+        self.template = load_template(self.template_path, self.basepath)
+        for relative_path in self.pages:
+            self.write_page(relative_path)
+
+    def content_changed(self, path):
+        relative_path = os.path.relpath(path, self.content_dir)
+        if os.path.isdir(path):
+            # A new or moved-in directory, render the pages it brought along
+            for page in find_pages(self.content_dir, relative_path):
+                self.render_page(page)
+        elif os.path.isfile(path):
+            if path.endswith('.md'):
+                self.render_page(relative_path)
+        else:
+            # Removed file or directory, drop every page that lived there
+            prefix = relative_path + os.sep
+            for page in [p for p in self.pages if p == relative_path or p.startswith(prefix)]:
+                self.remove_page(page)
+
+    def apply_changes(self, paths):
+        """
+        Update the output for a set of changed paths, returning True if
+        anything that affects the site changed.
+        """
+        changed = False
+        if self.template_path in paths:
+            self.reload_template()
+            changed = True
+        if any(self.is_below(path, self.static_dir) for path in paths):
+            self.sync_static()
+            changed = True
+        for path in sorted(paths):
+            if self.is_below(path, self.content_dir):
+                self.content_changed(path)
+                changed = True
+        return changed
+
+    @staticmethod
+    def is_below(path, directory):
+        return path == directory or path.startswith(directory + os.sep)
+
+
+class LiveReload:
+    """
+    Lets connected browsers wait for the next rebuild.
+    """
+
+    def __init__(self):
+        self.condition = threading.Condition()
+        self.version = 0
+
+    def notify(self):
+        with self.condition:
+            self.version += 1
+            self.condition.notify_all()
+
+    def wait(self, version, timeout):
+        with self.condition:
+            self.condition.wait_for(lambda: self.version != version, timeout)
+            return self.version
+
+
+def inject_livereload(html):
+    index = html.rfind("</body>")
+    if index == -1:
+        return html + LIVERELOAD_SCRIPT
+    return html[:index] + LIVERELOAD_SCRIPT + html[index:]
+
+
+def make_handler(directory, livereload):
+    class DevRequestHandler(http.server.SimpleHTTPRequestHandler):
+        def __init__(self, *args, **kwargs):
+            super().__init__(*args, directory=directory, **kwargs)
+
+        def do_GET(self):
+            if self.path == LIVERELOAD_PATH:
+                self.stream_reloads()
+                return
+            path = self.translate_path(self.path)
+            if os.path.isdir(path):
+                path = os.path.join(path, "index.html")
+            if path.endswith(".html") and os.path.isfile(path):
+                self.send_html(path)
+                return
+            super().do_GET()
+
+        def send_html(self, path):
+            with open(path, 'r', encoding='utf-8') as f:
+                body = inject_livereload(f.read()).encode("utf-8")
+            self.send_response(200)
+            self.send_header("Content-Type", "text/html; charset=utf-8")
+            self.send_header("Content-Length", str(len(body)))
+            self.send_header("Cache-Control", "no-store")
+            self.end_headers()
+            self.wfile.write(body)
+
+        def stream_reloads(self):
+            # Server-sent events, one "reload" message per rebuild
+            self.send_response(200)
+            self.send_header("Content-Type", "text/event-stream")
+            self.send_header("Cache-Control", "no-store")
+            self.end_headers()
+            version = livereload.version
+            try:
+                while True:
+                    new_version = livereload.wait(version, timeout=15)
+                    if new_version == version:
+                        # Keep idle connections open through proxies
+                        self.wfile.write(b": ping\n\n")
+                    else:
+                        self.wfile.write(b"data: reload\n\n")
+                        version = new_version
+                    self.wfile.flush()
+            except (BrokenPipeError, ConnectionResetError):
+                pass
+
+        def log_message(self, format, *args):
+            pass
+
+    return DevRequestHandler
+
+
+def watch(site, livereload, polling=False):
+    watcher = make_watcher([site.content_dir, site.static_dir, site.template_path], polling)
+    print(f"Watching for changes with {type(watcher).__name__}")
+    try:
+        while True:
+            paths = watcher.poll()
+            start = time.perf_counter()
+            try:
+                changed = site.apply_changes(paths)
+            except Exception as e:
+                # Keep serving the last good output while the source is broken
+                print(f"Rebuild failed: {e}")
+                continue
+            if changed:
+                livereload.notify()
+                print(f"Rebuilt {len(paths)} changed path(s) in {(time.perf_counter() - start) * 1000:.1f} ms")
+    finally:
+        watcher.close()
+
+
+def parse_args(argv):
+    parser = argparse.ArgumentParser(prog="main.py serve", description="Build the site into .ssg-dev/ and serve it")
+    parser.add_argument("--watch", action="store_true",
+                        help="rebuild changed pages and reload connected browsers")
+    parser.add_argument("--port", type=int, default=8888)
+    parser.add_argument("--bind", default="127.0.0.1")
+    parser.add_argument("--basepath", default="/")
+    parser.add_argument("--output", metavar="DIR", help="directory the dev site is built into (default: .ssg-dev/)")
+    parser.add_argument("--poll", action="store_true",
+                        help="watch by polling even where inotify is available")
+    return parser.parse_args(argv)
+
+
+def serve_main(argv):
+    args = parse_args(argv)
+
+    # Same layout as main(), but never docs/: the dev site has its own
+    # basepath and no build manifest, and a later build must not take its
+    # pages for its own
+    current_dir = os.path.dirname(os.path.abspath(__file__))
+    project_root = os.path.dirname(current_dir)
+    docs_dir = args.output or os.path.join(project_root, ".ssg-dev")
+    site = DevSite(
+        os.path.join(project_root, "content"),
+        os.path.join(project_root, "static"),
+        os.path.join(project_root, "template.html"),
+        docs_dir,
+        os.path.join(project_root, ".ssg-dev-static.json"),
+        args.basepath,
+    )
+    site.build()
+
+    livereload = LiveReload()
+    server = http.server.ThreadingHTTPServer((args.bind, args.port), make_handler(docs_dir, livereload))
+    server.daemon_threads = True
+    print(f"Serving {docs_dir} at http://{args.bind}:{args.port}/")
+
+    if not args.watch:
+        server.serve_forever()
+        return
+
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    try:
+        watch(site, livereload, args.poll)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.shutdown()
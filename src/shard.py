@@ -0,0 +1,150 @@
+import argparse
+import hashlib
+import json
+import os
+import shutil
+
+from copy_static import copy_files, list_files
+
+# Written into every shard's output, describes what the shard rendered
+SHARD_MANIFEST = ".ssg-shard.json"
+
+
+def parse_shard(value):
+    """
+    Parse an "i/N" shard spec (1 <= i <= N) into (i, N).
+    """
+    try:
+        index, count = (int(part) for part in value.split("/"))
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"shard must look like i/N, got {value!r}")
+    if count < 1 or not 1 <= index <= count:
+        raise argparse.ArgumentTypeError(f"shard index must be between 1 and N, got {value!r}")
+    return index, count
+
+
+def shard_of(relative_path, count):
+    # A stable hash of the path, the same on every machine and Python run
+    key = relative_path.replace(os.sep, "/").encode("utf-8")
+    return int.from_bytes(hashlib.sha256(key).digest()[:8], "big") % count + 1
+
+
+def in_shard(relative_path, shard):
+    # shard is an (i, N) tuple, None renders every page
+    return shard is None or shard_of(relative_path, shard[1]) == shard[0]
+
+
+def pages_digest(relative_paths):
+    digest = hashlib.sha256()
+    for relative_path in sorted(path.replace(os.sep, "/") for path in relative_paths):
+        digest.update(relative_path.encode("utf-8") + b"\0")
+    return digest.hexdigest()
+
+
+def write_shard_manifest(dest_dir, shard, all_pages, shard_pages, static_files):
+    """
+    Record which pages and static files a shard owns, and a digest of every
+    page of the site so the merge can tell whether a page is missing.
+    """
+    manifest = {
+        "shard": list(shard),
+        "pages_total": len(all_pages),
+        "pages_digest": pages_digest(all_pages),
+        "pages": sorted(path.replace(os.sep, "/") for path in shard_pages),
+        "files": sorted(path.replace(os.sep, "/") for path in static_files),
+    }
+    with open(os.path.join(dest_dir, SHARD_MANIFEST), 'w', encoding='utf-8') as f:
+        json.dump(manifest, f, indent=2)
+
+
+def load_shard_manifest(shard_dir):
+    path = os.path.join(shard_dir, SHARD_MANIFEST)
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, ValueError) as e:
+        raise ValueError(f"{shard_dir} is not a shard output: {e}")
+
+
+def merge_shards(shard_dirs, dest_dir, threads=8):
+    """
+    Combine shard outputs into dest_dir. Raises ValueError, before anything is
+    written, unless the directories hold every shard exactly once, every page
+    of the site is rendered by exactly one of them, no output path exists
+    in two shards and dest_dir neither is, contains nor sits inside a shard.
+    """
+    manifests = [load_shard_manifest(shard_dir) for shard_dir in shard_dirs]
+    count = manifests[0]["shard"][1]
+    problems = []
+
+    seen = {}
+    for shard_dir, manifest in zip(shard_dirs, manifests):
+        index, shard_count = manifest["shard"]
+        if shard_count != count:
+            problems.append(f"{shard_dir} is shard {index}/{shard_count}, expected N={count}")
+        elif index in seen:
+            problems.append(f"shard {index}/{count} appears twice: {seen[index]} and {shard_dir}")
+        seen[index] = shard_dir
+        if (manifest["pages_total"], manifest["pages_digest"]) != (manifests[0]["pages_total"], manifests[0]["pages_digest"]):
+            problems.append(f"{shard_dir} was built from a different set of pages")
+    for index in range(1, count + 1):
+        if index not in seen:
+            problems.append(f"shard {index}/{count} is missing")
+
+    # dest_dir is emptied before copying, which must not touch a shard
+    real_dest = os.path.realpath(dest_dir)
+    for shard_dir in shard_dirs:
+        real_shard = os.path.realpath(shard_dir)
+        if os.path.commonpath([real_dest, real_shard]) in (real_dest, real_shard):
+            problems.append(f"output directory {dest_dir} overlaps shard directory {shard_dir}")
+
+    pages = [page for manifest in manifests for page in manifest["pages"]]
+    if len(pages) != manifests[0]["pages_total"] or pages_digest(pages) != manifests[0]["pages_digest"]:
+        problems.append(f"shards rendered {len(pages)} pages, the site has {manifests[0]['pages_total']}")
+
+    # Every output path, and the shard it comes from
+    owners = {}
+    pairs = []
+    for shard_dir, manifest in zip(shard_dirs, manifests):
+        present = set(list_files(shard_dir))
+        present.discard(SHARD_MANIFEST)
+        for relative_path in manifest["pages"] + manifest["files"]:
+            if relative_path.replace("/", os.sep) not in present:
+                problems.append(f"{relative_path} is missing from {shard_dir}")
+        for relative_path in sorted(present):
+            if relative_path in owners:
+                problems.append(f"{relative_path} is in both {owners[relative_path]} and {shard_dir}")
+                continue
+            owners[relative_path] = shard_dir
+            pairs.append((os.path.join(shard_dir, relative_path), os.path.join(dest_dir, relative_path)))
+
+    if problems:
+        raise ValueError("Cannot merge shards:\n  " + "\n  ".join(problems))
+
+    if os.path.exists(dest_dir):
+        shutil.rmtree(dest_dir)
+    os.makedirs(dest_dir)
+    copy_files(pairs, threads=threads, verbose=False)
+    return len(pairs)
+
+
+def parse_merge_args(argv):
+    parser = argparse.ArgumentParser(prog="main.py merge",
+                                     description="Combine the outputs of a --shard i/N build into one site")
+    parser.add_argument("shard_dirs", nargs="+", help="output directory of every shard")
+    parser.add_argument("--output", help="merged site directory (default: docs/)")
+    parser.add_argument("--copy-threads", type=int, default=8)
+    return parser.parse_args(argv)
+
+
+def merge_main(argv):
+    args = parse_merge_args(argv)
+    current_dir = os.path.dirname(os.path.abspath(__file__))
+    dest_dir = args.output or os.path.join(os.path.dirname(current_dir), "docs")
+    try:
+        merged = merge_shards(args.shard_dirs, dest_dir, args.copy_threads)
+    except ValueError as e:
+        print(e)
+        return 1
+    print(f"Merged {len(args.shard_dirs)} shards, {merged} files into {dest_dir}")
+    return 0
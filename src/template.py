@@ -0,0 +1,115 @@
+import functools
+import hashlib
+import re
+
+PLACEHOLDER_PATTERN = re.compile(r"\{\{ (Title|Content) \}\}")
+URL_ATTRIBUTE_PATTERN = re.compile(r'\b(href|src)="([^"]*)"')
+
+
+def apply_basepath(basepath, url):
+    # Point a root-relative URL at the basepath
+    if url.startswith("/"):
+        return basepath + url[1:]
+    return url
+
+
+def basepath_rewriter(basepath):
+    """
+    Return a function pointing root-relative URLs at the basepath, or None
+    when the basepath is "/" and URLs stay as they are. A partial rather than
+    a closure, so templates can still be pickled for worker processes.
+    """
+    if basepath == "/":
+        return None
+    return functools.partial(apply_basepath, basepath)
+
+
+def apply_assets(assets, basepath, url):
+    # Point a reference to a static asset at its fingerprinted name, then
+    # apply the basepath
+    return apply_basepath(basepath, assets.rewrite(url))
+
+
+def url_rewriter(basepath, assets=None):
+    """
+    Like basepath_rewriter, also pointing asset references at the names in
+    assets, a fingerprint.AssetMap, if given.
+    """
+    if assets is None:
+        return basepath_rewriter(basepath)
+    return functools.partial(apply_assets, assets, basepath)
+
+
+def rewrite_urls(html, rewrite_url):
+    # Apply rewrite_url to the href/src attributes of raw HTML such as a template
+    if rewrite_url is None:
+        return html
+    return URL_ATTRIBUTE_PATTERN.sub(
+        lambda match: f'{match.group(1)}="{rewrite_url(match.group(2))}"', html
+    )
+
+
+class Template:
+    """
+    A page template split at its {{ Title }} / {{ Content }} placeholders, so
+    rendering a page is a single join instead of a replace per placeholder.
+    The basepath (and with assets, the fingerprinted asset names) is applied
+    to the template's URLs once here, and rewrite_url applies it to the
+    content's URLs while they are serialized.
+    """
+
+    def __init__(self, source, basepath="/", assets=None):
+        self.source = source
+        self.basepath = basepath
+        self.assets_digest = None if assets is None else assets.digest
+        digest = hashlib.sha256(source.encode("utf-8"))
+        if assets is not None:
+            # Renamed assets change the rendered pages like a template edit
+            digest.update(f"\0{assets.digest}".encode("utf-8"))
+        self.hash = digest.hexdigest()
+        self.rewrite_url = url_rewriter(basepath, assets)
+
+        # re.split with a capture group alternates static text and placeholder names
+        pieces = PLACEHOLDER_PATTERN.split(rewrite_urls(source, self.rewrite_url))
+        self.segments = pieces[:]
+        self.slots = []
+        for i in range(1, len(pieces), 2):
+            self.slots.append((i, pieces[i]))
+        # write() can only stream the content into a single slot
+        self.content_slots = sum(1 for _, name in self.slots if name == "Content")
+
+    def render(self, title, content):
+        values = {"Title": title, "Content": content}
+        parts = self.segments[:]
+        for i, name in self.slots:
+            parts[i] = values[name]
+        return "".join(parts)
+
+    def write(self, fp, title, content_node):
+        # Like render, but streams the content node's HTML straight into fp,
+        # with the basepath applied. A streamed node is only read once, so
+        # the template needs exactly one Content slot
+        if self.content_slots != 1:
+            raise ValueError(f"Cannot stream into a template with {self.content_slots} Content slots")
+        for i, segment in enumerate(self.segments):
+            if i % 2 == 0:
+                fp.write(segment)
+            elif segment == "Title":
+                fp.write(title)
+            else:
+                content_node.write_html(fp, self.rewrite_url)
+
+    def __repr__(self):
+        return f"Template({len(self.source)} chars, slots: {[name for _, name in self.slots]})"
+
+
+def load_template(template_path, basepath="/", assets=None):
+    with open(template_path, 'r', encoding='utf-8') as f:
+        return Template(f.read(), basepath, assets)
+
+
+def ensure_template(template, basepath="/", assets=None):
+    # Accept either a template path or an already compiled Template
+    if isinstance(template, Template):
+        return template
+    return load_template(template, basepath, assets)
@@ -1,6 +1,8 @@
+import io
 import unittest
 
-from block_markdown import markdown_to_blocks, block_to_block_type, BlockType, markdown_to_html_node
+from htmlnode import LeafNode, ParentNode
+from block_markdown import markdown_to_blocks, block_to_block_type, BlockType, markdown_to_html_node, scan_blocks, iter_blocks, block_lines_type, block_lines_to_html_node, register_block_type, BLOCK_CONVERTERS, BLOCK_MATCHERS, block_title
 
 
 class TestMarkdownToBlocks(unittest.TestCase):
@@ -167,6 +169,57 @@ Final paragraph."""
         )
 
 
+class TestScanBlocks(unittest.TestCase):
+    def test_code_block_with_blank_lines(self):
+        md = "Intro\n\n```\nfirst\n\n\nsecond\n```\n\nOutro"
+        self.assertEqual(
+            markdown_to_blocks(md),
+            ["Intro", "```\nfirst\n\n\nsecond\n```", "Outro"],
+        )
+
+    def test_single_line_fence(self):
+        self.assertEqual(markdown_to_blocks("```code```\n\nText"), ["```code```", "Text"])
+
+    def test_unclosed_fence_runs_to_end(self):
+        self.assertEqual(markdown_to_blocks("```\ncode\n\nmore"), ["```\ncode\n\nmore"])
+
+    def test_whitespace_line_does_not_separate(self):
+        self.assertEqual(markdown_to_blocks("one\n  \ntwo"), ["one\n  \ntwo"])
+
+    def test_lines_with_endings(self):
+        lines = io.StringIO("# Title\n\nSome text\nmore text\n\n- item\n")
+        self.assertEqual(list(scan_blocks(lines)), ["# Title", "Some text\nmore text", "- item"])
+
+    def test_lazy(self):
+        def lines():
+            yield "First block"
+            yield ""
+            raise AssertionError("read past the first block")
+
+        self.assertEqual(next(scan_blocks(lines())), "First block")
+
+    def test_iter_blocks_types(self):
+        md = "# Title\n\n```\ncode\n\ncode\n```\n\n- item"
+        self.assertEqual(
+            [block_type for _, block_type in iter_blocks(md.split("\n"))],
+            [BlockType.HEADING, BlockType.CODE, BlockType.UNORDERED_LIST],
+        )
+
+    def test_iter_blocks_yields_stripped_lines(self):
+        md = "\n  \n  first line\nsecond line  \n   \n\n1. one\n2. two"
+        self.assertEqual(
+            list(iter_blocks(md.split("\n"))),
+            [
+                (["first line", "second line"], BlockType.PARAGRAPH),
+                (["1. one", "2. two"], BlockType.ORDERED_LIST),
+            ],
+        )
+
+    def test_block_lines_to_html_node(self):
+        node = block_lines_to_html_node(["- one", "- **two**"], BlockType.UNORDERED_LIST)
+        self.assertEqual(node.to_html(), "<ul><li>one</li><li><b>two</b></li></ul>")
+
+
 class TestBlockToBlockType(unittest.TestCase):
     def test_block_to_block_type_paragraph(self):
         block = "This is a regular paragraph of text."
@@ -285,6 +338,24 @@ class TestBlockToBlockType(unittest.TestCase):
         self.assertEqual(block_to_block_type(block), BlockType.PARAGRAPH)
 
 
+class TestBlockLinesType(unittest.TestCase):
+    def test_matches_block_to_block_type(self):
+        blocks = [
+            "# Heading",
+            "```\ncode\n```",
+            "> quote\n>\n> more",
+            "> quote\nnot quote",
+            "- item\n- item",
+            "- item\n-item",
+            "1. one\n2. two\n3. three",
+            "1. one\n3. three",
+            "2. two",
+            "plain text",
+        ]
+        for block in blocks:
+            self.assertEqual(block_lines_type(block.split("\n")), block_to_block_type(block), block)
+
+
 class TestMarkdownToHtmlNode(unittest.TestCase):
     def test_paragraphs(self):
         md = """
@@ -416,5 +487,53 @@ code block
         self.assertEqual(html, "<div></div>")
 
 
+class TestBlockTitle(unittest.TestCase):
+    def test_level_one_heading(self):
+        self.assertEqual(block_title(["# The Title "], BlockType.HEADING), "The Title")
+
+    def test_other_blocks(self):
+        self.assertIsNone(block_title(["## Subheading"], BlockType.HEADING))
+        self.assertIsNone(block_title(["```", "# comment", "```"], BlockType.CODE))
+        self.assertIsNone(block_title(["# not a heading", "- item"], BlockType.PARAGRAPH))
+
+
+class TestRegisterBlockType(unittest.TestCase):
+    def setUp(self):
+        converters = dict(BLOCK_CONVERTERS)
+        matchers = list(BLOCK_MATCHERS)
+
+        def restore():
+            BLOCK_CONVERTERS.clear()
+            BLOCK_CONVERTERS.update(converters)
+            BLOCK_MATCHERS[:] = matchers
+        self.addCleanup(restore)
+
+    def test_custom_block_type(self):
+        def is_table(lines):
+            return all(line.startswith("|") for line in lines)
+
+        def table_to_html_node(lines):
+            rows = []
+            for line in lines:
+                cells = [ParentNode("td", [LeafNode(None, cell.strip())]) for cell in line.strip("|").split("|")]
+                rows.append(ParentNode("tr", cells))
+            return ParentNode("table", rows)
+
+        register_block_type("table", table_to_html_node, is_table)
+        html = markdown_to_html_node("# Data\n\n| a | b |\n| 1 | 2 |").to_html()
+        self.assertEqual(
+            html,
+            "<div><h1>Data</h1><table><tr><td>a</td><td>b</td></tr><tr><td>1</td><td>2</td></tr></table></div>",
+        )
+
+    def test_replace_builtin_converter(self):
+        register_block_type(BlockType.CODE, lambda lines: LeafNode("pre", "\n".join(lines[1:-1])))
+        self.assertEqual(markdown_to_html_node("```\nx\n```").to_html(), "<div><pre>x</pre></div>")
+
+    def test_unsupported_block_type(self):
+        with self.assertRaises(ValueError):
+            block_lines_to_html_node(["text"], "unknown")
+
+
 if __name__ == "__main__":
     unittest.main()
\ No newline at end of file
@@ -0,0 +1,93 @@
+import unittest
+import os
+import sys
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+from build_report import BuildReport, PageTimings, NULL_TIMINGS, percentile
+
+
+class TestPageTimings(unittest.TestCase):
+    def test_stage_records_wall_and_cpu(self):
+        timings = PageTimings("a.md")
+        with timings.stage("read"):
+            sum(range(1000))
+        self.assertIn("read", timings.wall)
+        self.assertIn("read", timings.cpu)
+        self.assertGreaterEqual(timings.wall["read"], 0.0)
+
+    def test_stage_accumulates(self):
+        timings = PageTimings("a.md")
+        with timings.stage("read"):
+            pass
+        first = timings.wall["read"]
+        with timings.stage("read"):
+            pass
+        self.assertGreaterEqual(timings.wall["read"], first)
+        self.assertEqual(len(timings.wall), 1)
+
+    def test_stage_records_on_error(self):
+        timings = PageTimings("a.md")
+        with self.assertRaises(ValueError):
+            with timings.stage("inline_parse"):
+                raise ValueError("bad markdown")
+        self.assertIn("inline_parse", timings.wall)
+
+    def test_null_timings(self):
+        with NULL_TIMINGS.stage("read"):
+            pass
+
+
+class TestBuildReport(unittest.TestCase):
+    def make_page(self, path, **stages):
+        timings = PageTimings(path)
+        timings.wall.update(stages)
+        timings.cpu.update(stages)
+        return timings
+
+    def test_percentile(self):
+        values = [float(i) for i in range(1, 101)]
+        self.assertEqual(percentile(values, 0.5), 50.0)
+        self.assertEqual(percentile(values, 0.9), 90.0)
+        self.assertEqual(percentile(values, 0.99), 99.0)
+        self.assertEqual(percentile([], 0.5), 0.0)
+
+    def test_stage_totals(self):
+        report = BuildReport()
+        report.add(self.make_page("a.md", read=1.0, write=2.0))
+        report.add(self.make_page("b.md", read=3.0))
+        totals = report.stage_totals()
+        self.assertEqual(totals["read"][0], 4.0)
+        self.assertEqual(totals["write"][0], 2.0)
+        self.assertEqual(list(totals), ["read", "write"])
+
+    def test_summary_lists_slowest_pages_first(self):
+        report = BuildReport()
+        report.add(self.make_page("fast.md", read=0.001))
+        report.add(self.make_page("slow.md", inline_parse=0.5, read=0.001))
+        summary = report.summary()
+        self.assertIn("Build report: 2 pages", summary)
+        self.assertLess(summary.index("slow.md"), summary.index("fast.md"))
+        self.assertIn("slow.md (mostly inline_parse)", summary)
+
+    def test_counters(self):
+        report = BuildReport()
+        first = self.make_page("a.md", read=0.1)
+        first.count("page_cache_hits")
+        second = self.make_page("b.md", read=0.1)
+        second.count("page_cache_hits")
+        second.count("page_cache_misses", 2)
+        report.add(first)
+        report.add(second)
+        self.assertEqual(report.counter_totals(), {"page_cache_hits": 2, "page_cache_misses": 2})
+        self.assertIn("page_cache_misses", report.summary())
+
+    def test_summary_empty(self):
+        self.assertEqual(BuildReport().summary(), "Build report: 0 pages")
+
+    def test_page_registers_timings(self):
+        report = BuildReport()
+        timings = report.page("a.md")
+        self.assertEqual(report.pages, [timings])
+
+
+if __name__ == "__main__":
+    unittest.main()
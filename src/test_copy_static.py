@@ -0,0 +1,164 @@
+import unittest
+import os
+import tempfile
+import shutil
+import sys
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+from build_manifest import ChangeSet
+from copy_static import sync_files, copy_file, copy_files, copy_files_recursive, list_files
+
+
+class TestSyncFiles(unittest.TestCase):
+    def setUp(self):
+        self.test_dir = tempfile.mkdtemp()
+        self.static_dir = os.path.join(self.test_dir, "static")
+        self.docs_dir = os.path.join(self.test_dir, "docs")
+        self.manifest_path = os.path.join(self.test_dir, ".ssg-static.json")
+        os.makedirs(os.path.join(self.static_dir, "images"))
+        os.makedirs(self.docs_dir)
+        self.write(os.path.join(self.static_dir, "index.css"), "body {}")
+        self.write(os.path.join(self.static_dir, "images", "logo.png"), "png")
+
+    def tearDown(self):
+        shutil.rmtree(self.test_dir)
+
+    def write(self, path, content):
+        with open(path, 'w') as f:
+            f.write(content)
+
+    def read(self, path):
+        with open(path, 'r') as f:
+            return f.read()
+
+    def sync(self, compare="mtime", link=False):
+        return sync_files(self.static_dir, self.docs_dir, self.manifest_path, compare, link)
+
+    def test_list_files(self):
+        self.assertEqual(list_files(self.static_dir), ["index.css", os.path.join("images", "logo.png")])
+
+    def test_first_sync_copies_everything(self):
+        self.assertEqual(self.sync(), (2, 0))
+        self.assertEqual(self.read(os.path.join(self.docs_dir, "index.css")), "body {}")
+        self.assertEqual(self.read(os.path.join(self.docs_dir, "images", "logo.png")), "png")
+
+    def test_unchanged_files_are_skipped(self):
+        self.sync()
+        self.assertEqual(self.sync(), (0, 0))
+
+    def test_changed_file_is_copied(self):
+        self.sync()
+        css = os.path.join(self.static_dir, "index.css")
+        self.write(css, "body { color: red }")
+        stat = os.stat(css)
+        os.utime(css, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10**9))
+        self.assertEqual(self.sync(), (1, 0))
+        self.assertEqual(self.read(os.path.join(self.docs_dir, "index.css")), "body { color: red }")
+
+    def test_hash_compare_ignores_mtime(self):
+        self.sync("hash")
+        css = os.path.join(self.static_dir, "index.css")
+        stat = os.stat(css)
+        os.utime(css, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10**9))
+        self.assertEqual(self.sync("hash"), (0, 0))
+
+    def test_removed_source_is_deleted_but_pages_are_kept(self):
+        self.sync()
+        page = os.path.join(self.docs_dir, "index.html")
+        self.write(page, "<html></html>")
+        os.remove(os.path.join(self.static_dir, "images", "logo.png"))
+        self.assertEqual(self.sync(), (0, 1))
+        self.assertFalse(os.path.exists(os.path.join(self.docs_dir, "images")))
+        self.assertTrue(os.path.exists(page))
+
+    def test_changes_record_copied_and_removed_files(self):
+        changes = ChangeSet()
+        sync_files(self.static_dir, self.docs_dir, self.manifest_path, changes=changes)
+        self.assertEqual(changes.changed, {"index.css", "images/logo.png"})
+
+        changes = ChangeSet()
+        os.remove(os.path.join(self.static_dir, "index.css"))
+        sync_files(self.static_dir, self.docs_dir, self.manifest_path, changes=changes)
+        self.assertEqual((changes.changed, changes.deleted), (set(), {"index.css"}))
+
+    def test_aliases(self):
+        names = {"index.css": "index.v1.css"}
+        aliases = lambda relative_path: [names[relative_path]] if relative_path in names else []
+        changes = ChangeSet()
+        sync_files(self.static_dir, self.docs_dir, self.manifest_path, aliases=aliases, changes=changes)
+        self.assertEqual(self.read(os.path.join(self.docs_dir, "index.css")), "body {}")
+        self.assertEqual(self.read(os.path.join(self.docs_dir, "index.v1.css")), "body {}")
+        self.assertEqual(changes.changed, {"index.css", "index.v1.css", "images/logo.png"})
+
+        # A new alias replaces the old one, the file under its own name is kept
+        names["index.css"] = "index.v2.css"
+        changes = ChangeSet()
+        self.assertEqual(sync_files(self.static_dir, self.docs_dir, self.manifest_path, aliases=aliases, changes=changes), (1, 1))
+        self.assertEqual((changes.changed, changes.deleted), ({"index.v2.css"}, {"index.v1.css"}))
+        self.assertEqual(sorted(os.listdir(self.docs_dir)), ["images", "index.css", "index.v2.css"])
+
+        # Without aliases only the original is left
+        changes = ChangeSet()
+        self.assertEqual(sync_files(self.static_dir, self.docs_dir, self.manifest_path, changes=changes), (0, 1))
+        self.assertEqual(changes.deleted, {"index.v2.css"})
+        self.assertEqual(sorted(os.listdir(self.docs_dir)), ["images", "index.css"])
+
+    def test_missing_destination_file_is_copied(self):
+        self.sync()
+        os.remove(os.path.join(self.docs_dir, "index.css"))
+        self.assertEqual(self.sync(), (1, 0))
+
+    def test_link(self):
+        self.sync(link=True)
+        source = os.stat(os.path.join(self.static_dir, "index.css"))
+        dest = os.stat(os.path.join(self.docs_dir, "index.css"))
+        self.assertEqual(source.st_ino, dest.st_ino)
+
+    def test_copy_does_not_write_through_hardlink(self):
+        source = os.path.join(self.static_dir, "index.css")
+        dest = os.path.join(self.docs_dir, "index.css")
+        other = os.path.join(self.test_dir, "other.css")
+        self.write(other, "other")
+        os.link(source, dest)
+        copy_file(other, dest)
+        self.assertEqual(self.read(dest), "other")
+        self.assertEqual(self.read(source), "body {}")
+
+    def test_sync_with_threads(self):
+        self.assertEqual(sync_files(self.static_dir, self.docs_dir, self.manifest_path, threads=4, verbose=False), (2, 0))
+        self.assertEqual(self.read(os.path.join(self.docs_dir, "images", "logo.png")), "png")
+
+
+class TestCopyFiles(unittest.TestCase):
+    def setUp(self):
+        self.test_dir = tempfile.mkdtemp()
+        self.static_dir = os.path.join(self.test_dir, "static")
+        self.dest_dir = os.path.join(self.test_dir, "public")
+        for i in range(20):
+            sub_dir = os.path.join(self.static_dir, f"dir{i % 3}", f"sub{i % 2}")
+            os.makedirs(sub_dir, exist_ok=True)
+            with open(os.path.join(sub_dir, f"file{i}.txt"), 'w') as f:
+                f.write("x" * i)
+
+    def tearDown(self):
+        shutil.rmtree(self.test_dir)
+
+    def test_copy_files_recursive_parallel(self):
+        os.makedirs(os.path.join(self.dest_dir, "stale"))
+        count, total_bytes = copy_files_recursive(self.static_dir, self.dest_dir, threads=4, verbose=False)
+        self.assertEqual(count, 20)
+        self.assertEqual(total_bytes, sum(range(20)))
+        self.assertEqual(list_files(self.dest_dir), list_files(self.static_dir))
+        self.assertFalse(os.path.exists(os.path.join(self.dest_dir, "stale")))
+
+    def test_copy_files_creates_directories(self):
+        source = os.path.join(self.static_dir, "dir1", "sub1", "file1.txt")
+        dest = os.path.join(self.dest_dir, "a", "b", "c.txt")
+        self.assertEqual(copy_files([(source, dest)], verbose=False), (1, 1))
+        self.assertTrue(os.path.exists(dest))
+
+    def test_copy_files_nothing_to_copy(self):
+        self.assertEqual(copy_files([], threads=4), (0, 0))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -2,7 +2,7 @@ import unittest
 import sys
 import os
 sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
-from extract_title import extract_title
+from extract_title import extract_title, extract_title_from_lines
 
 class TestExtractTitle(unittest.TestCase):
     def test_basic_h1(self):
@@ -29,5 +29,12 @@ class TestExtractTitle(unittest.TestCase):
     def test_h1_with_leading_spaces(self):
         self.assertEqual(extract_title("   # Leading"), "Leading")
 
+    def test_from_lines_stops_at_title(self):
+        def lines():
+            yield "Intro\n"
+            yield "# Title\n"
+            raise AssertionError("read past the title")
+        self.assertEqual(extract_title_from_lines(lines()), "Title")
+
 if __name__ == "__main__":
     unittest.main()
@@ -0,0 +1,93 @@
+import unittest
+import io
+import json
+import os
+import tempfile
+import shutil
+import sys
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+from contextlib import redirect_stdout
+from unittest import mock
+import fingerprint
+from fingerprint import AssetMap, ASSET_MANIFEST, build_asset_map, fingerprint_name, hash_assets, write_asset_manifest
+from build_manifest import hash_file, ChangeSet
+
+
+class TestFingerprint(unittest.TestCase):
+    def setUp(self):
+        self.test_dir = tempfile.mkdtemp()
+        self.static_dir = os.path.join(self.test_dir, "static")
+        self.cache_path = os.path.join(self.test_dir, ".ssg-assets.json")
+        os.makedirs(os.path.join(self.static_dir, "images"))
+        self.write("index.css", "body {}")
+        self.write(os.path.join("images", "logo.png"), "png")
+        self.write("robots.txt", "User-agent: *")
+
+    def tearDown(self):
+        shutil.rmtree(self.test_dir)
+
+    def write(self, relative_path, content):
+        with open(os.path.join(self.static_dir, relative_path), 'w') as f:
+            f.write(content)
+
+    def build(self):
+        with redirect_stdout(io.StringIO()):
+            return build_asset_map(self.static_dir, self.cache_path)
+
+    def test_fingerprint_name(self):
+        self.assertEqual(fingerprint_name("images/logo.png", "0123456789abcdef"), "images/logo.0123456789.png")
+
+    def test_asset_map(self):
+        assets = self.build()
+        digest = hash_file(os.path.join(self.static_dir, "index.css"))
+        self.assertEqual(assets.names["index.css"], f"index.{digest[:10]}.css")
+        self.assertNotIn("robots.txt", assets.names)
+        self.assertEqual(assets.aliases("robots.txt"), [])
+        self.assertEqual(assets.aliases(os.path.join("images", "logo.png")),
+                         [os.path.join("images", os.path.basename(assets.names["images/logo.png"]))])
+
+    def test_rewrite(self):
+        assets = AssetMap({"index.css": "index.1.css"})
+        self.assertEqual(assets.rewrite("/index.css"), "/index.1.css")
+        self.assertEqual(assets.rewrite("/index.css#top"), "/index.1.css#top")
+        self.assertEqual(assets.rewrite("/index.css?a=1#b"), "/index.1.css?a=1#b")
+        self.assertEqual(assets.rewrite("index.css"), "index.css")
+        self.assertEqual(assets.rewrite("https://example.com/index.css"), "https://example.com/index.css")
+
+    def test_hashes_are_cached_by_size_and_mtime(self):
+        # Only the fingerprinted files are hashed
+        digests, hashed = hash_assets(self.static_dir, self.cache_path)
+        self.assertEqual(hashed, 2)
+        self.assertNotIn("robots.txt", digests)
+        with mock.patch.object(fingerprint, "hash_file") as hash_mock:
+            digests, hashed = hash_assets(self.static_dir, self.cache_path)
+        hash_mock.assert_not_called()
+        self.assertEqual(hashed, 0)
+        self.assertEqual(digests["index.css"], hash_file(os.path.join(self.static_dir, "index.css")))
+
+        self.write("index.css", "body { color: red }")
+        digests, hashed = hash_assets(self.static_dir, self.cache_path)
+        self.assertEqual(hashed, 1)
+        self.assertEqual(digests["index.css"], hash_file(os.path.join(self.static_dir, "index.css")))
+
+    def test_changed_asset_changes_name_and_digest(self):
+        first = self.build()
+        self.write("index.css", "body { color: red }")
+        second = self.build()
+        self.assertNotEqual(first.names["index.css"], second.names["index.css"])
+        self.assertEqual(first.names["images/logo.png"], second.names["images/logo.png"])
+        self.assertNotEqual(first.digest, second.digest)
+
+    def test_write_asset_manifest(self):
+        assets = self.build()
+        dest_dir = os.path.join(self.test_dir, "docs")
+        changes = ChangeSet()
+        self.assertTrue(write_asset_manifest(dest_dir, assets, changes))
+        self.assertFalse(write_asset_manifest(dest_dir, assets))
+        self.assertEqual(changes.changed, {ASSET_MANIFEST})
+        with open(os.path.join(dest_dir, ASSET_MANIFEST)) as f:
+            self.assertEqual(json.load(f), assets.names)
+
+
+if __name__ == "__main__":
+    unittest.main()
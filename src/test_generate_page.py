@@ -4,7 +4,10 @@ import tempfile
 import shutil
 import sys
 sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
-from generate_page import generate_page
+from generate_page import generate_page, markdown_to_page
+from template import load_template
+from build_report import PageTimings, STAGES
+from page_cache import PageCache
 
 class TestGeneratePage(unittest.TestCase):
     def setUp(self):
@@ -83,5 +86,139 @@ This is a **test** page with some content.
         # Check that the nested directories were created
         self.assertTrue(os.path.exists(nested_output_path))
 
+    def test_generate_page_with_compiled_template(self):
+        # A pre-loaded template produces the same page as the template path
+        generate_page(self.markdown_path, self.template_path, self.output_path)
+        with open(self.output_path, 'r') as f:
+            from_path_html = f.read()
+
+        template = load_template(self.template_path)
+        generate_page(self.markdown_path, template, self.output_path)
+        with open(self.output_path, 'r') as f:
+            self.assertEqual(f.read(), from_path_html)
+
+    def test_generate_page_with_timings(self):
+        # Profiling times every stage and writes the same page
+        generate_page(self.markdown_path, self.template_path, self.output_path)
+        with open(self.output_path, 'r') as f:
+            expected = f.read()
+
+        timings = PageTimings(self.markdown_path)
+        generate_page(self.markdown_path, self.template_path, self.output_path, "/", timings)
+        with open(self.output_path, 'r') as f:
+            self.assertEqual(f.read(), expected)
+        self.assertEqual(sorted(timings.wall), sorted(STAGES))
+
+    def test_generate_page_with_cache(self):
+        generate_page(self.markdown_path, self.template_path, self.output_path)
+        with open(self.output_path, 'r') as f:
+            expected = f.read()
+
+        cache = PageCache(os.path.join(self.test_dir, "cache"))
+        first = PageTimings(self.markdown_path)
+        generate_page(self.markdown_path, self.template_path, self.output_path, "/", first, cache)
+        self.assertEqual(first.counters["page_cache_misses"], 1)
+        self.assertNotIn("page_cache_hits", first.counters)
+
+        second = PageTimings(self.markdown_path)
+        generate_page(self.markdown_path, self.template_path, self.output_path, "/", second, cache)
+        self.assertEqual(second.counters, {"page_cache_hits": 1})
+        self.assertNotIn("inline_parse", second.wall)
+        with open(self.output_path, 'r') as f:
+            self.assertEqual(f.read(), expected)
+
+    def test_generate_page_counts_inline_cache(self):
+        with open(self.markdown_path, 'w') as f:
+            f.write("# Repeats\n\n- same item\n- same item\n- same item")
+        timings = PageTimings(self.markdown_path)
+        generate_page(self.markdown_path, self.template_path, self.output_path, "/", timings)
+        self.assertGreaterEqual(timings.counters["inline_cache_hits"], 2)
+
+    def test_streamed_page_matches_buffered(self):
+        # The streaming path (no timings, no cache) writes the same page
+        with open(self.markdown_path, 'a') as f:
+            f.write("\n```\nfirst line\n\nafter a blank line\n```\n\nThe end\n")
+        generate_page(self.markdown_path, self.template_path, self.output_path)
+        with open(self.output_path, 'r') as f:
+            streamed = f.read()
+
+        generate_page(self.markdown_path, self.template_path, self.output_path, "/", PageTimings(self.markdown_path))
+        with open(self.output_path, 'r') as f:
+            self.assertEqual(f.read(), streamed)
+        self.assertIn("<pre><code>first line\n\nafter a blank line\n</code></pre>", streamed)
+
+    def test_repeated_content_slot(self):
+        with open(self.template_path, 'w') as f:
+            f.write("<title>{{ Title }}</title><main>{{ Content }}</main><aside>{{ Content }}</aside>")
+        pages = []
+        for timings in (None, PageTimings(self.markdown_path)):
+            generate_page(self.markdown_path, self.template_path, self.output_path, "/", timings)
+            with open(self.output_path, 'r') as f:
+                pages.append(f.read())
+        self.assertEqual(pages[0], pages[1])
+        self.assertIn("<aside><div><h1>Test Page</h1>", pages[0])
+
+    def test_identical_page_is_not_rewritten(self):
+        for timings in (None, PageTimings(self.markdown_path)):
+            digest, written, _ = generate_page(self.markdown_path, self.template_path, self.output_path, "/", timings)
+            self.assertTrue(written)
+            os.utime(self.output_path, ns=(0, 10**9))
+            self.assertEqual(
+                generate_page(self.markdown_path, self.template_path, self.output_path, "/", timings, old_hash=digest),
+                (digest, False, None),
+            )
+            self.assertEqual(os.stat(self.output_path).st_mtime_ns, 10**9)
+            os.remove(self.output_path)
+
+    def test_streamed_page_error_leaves_no_output(self):
+        with open(self.markdown_path, 'w') as f:
+            f.write("# Title\n\nFine paragraph\n\nBroken **bold\n")
+        with self.assertRaises(ValueError):
+            generate_page(self.markdown_path, self.template_path, self.output_path)
+        self.assertFalse(os.path.exists(self.output_path))
+
+    def test_no_title_leaves_no_output(self):
+        with open(self.markdown_path, 'w') as f:
+            f.write("Just a paragraph\n")
+        with self.assertRaises(Exception):
+            generate_page(self.markdown_path, self.template_path, self.output_path)
+        self.assertFalse(os.path.exists(self.output_path))
+
+    def test_streamed_page_title_after_content(self):
+        with open(self.markdown_path, 'w') as f:
+            f.write("Intro paragraph\n\n```\n# not the title\n```\n\n# Late Title\n\nBody\n")
+        generate_page(self.markdown_path, self.template_path, self.output_path)
+        with open(self.output_path, 'r') as f:
+            html_content = f.read()
+        self.assertIn("<title>Late Title</title>", html_content)
+        self.assertIn("<div><p>Intro paragraph</p><pre><code># not the title\n</code></pre><h1>Late Title</h1><p>Body</p></div>", html_content)
+
+
+    def test_basepath_applied_to_urls_only(self):
+        with open(self.markdown_path, 'w') as f:
+            f.write("# Title\n\n[Home](/) and `href=\"/x\"`\n\n![logo](/logo.png)\n")
+        generate_page(self.markdown_path, self.template_path, self.output_path, "/site/")
+        with open(self.output_path, 'r') as f:
+            streamed = f.read()
+        self.assertIn('<a href="/site/">Home</a> and <code>href="/x"</code>', streamed)
+        self.assertIn('<img src="/site/logo.png" alt="logo"></img>', streamed)
+
+        # The buffered path writes the same page
+        generate_page(self.markdown_path, self.template_path, self.output_path, "/site/", PageTimings(self.markdown_path))
+        with open(self.output_path, 'r') as f:
+            self.assertEqual(f.read(), streamed)
+
+
+class TestMarkdownToPage(unittest.TestCase):
+    def test_title_from_first_h1_block(self):
+        title, html_node = markdown_to_page("## Sub\n\n# First\n\n# Second")
+        self.assertEqual(title, "First")
+        self.assertEqual(html_node.to_html(), "<div><h2>Sub</h2><h1>First</h1><h1>Second</h1></div>")
+
+    def test_h1_inside_code_is_not_title(self):
+        with self.assertRaises(Exception) as context:
+            markdown_to_page("```\n# comment\n```")
+        self.assertIn("No h1 header", str(context.exception))
+
 if __name__ == "__main__":
     unittest.main()
\ No newline at end of file
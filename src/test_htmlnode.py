@@ -1,6 +1,7 @@
+import io
 import unittest
 
-from htmlnode import HTMLNode, LeafNode, ParentNode, text_node_to_html_node
+from htmlnode import HTMLNode, LeafNode, ParentNode, text_node_to_html_node, register_text_renderer, TEXT_RENDERERS
 from textnode import TextNode, TextType
 
 
@@ -58,6 +59,34 @@ class TestHTMLNode(unittest.TestCase):
             "HTMLNode(h1, Title, children: None, None)",
         )
 
+    def test_nodes_have_no_dict(self):
+        nodes = [
+            HTMLNode("div", "test"),
+            LeafNode("p", "text"),
+            ParentNode("div", [LeafNode(None, "text")]),
+        ]
+        for node in nodes:
+            self.assertFalse(hasattr(node, "__dict__"))
+            with self.assertRaises(AttributeError):
+                node.extra = 1
+
+    def test_rewrite_url_applies_to_url_props(self):
+        node = ParentNode("p", [
+            LeafNode("a", "link", {"href": "/page", "title": "/not-a-url"}),
+            LeafNode("img", "", {"src": "/a.png", "alt": "/alt"}),
+            LeafNode(None, 'text with href="/x"'),
+        ])
+        self.assertEqual(
+            node.to_html(lambda url: "/base" + url),
+            '<p><a href="/base/page" title="/not-a-url">link</a>'
+            '<img src="/base/a.png" alt="/alt"></img>text with href="/x"</p>',
+        )
+
+    def test_empty_props_shared(self):
+        node = LeafNode("p", "text", {})
+        self.assertIsNone(node.props)
+        self.assertEqual(node.to_html(), "<p>text</p>")
+
     def test_repr_with_children(self):
         child_node = HTMLNode("span", "child")
         parent_node = HTMLNode("div", None, [child_node])
@@ -148,6 +177,45 @@ class TestParentNode(unittest.TestCase):
         self.assertEqual(grandparent.to_html(), expected)
 
 
+class TestStreamingHTML(unittest.TestCase):
+    def test_iter_html_fragments(self):
+        node = ParentNode("p", [LeafNode("b", "Bold"), LeafNode(None, " text")], {"class": "x"})
+        self.assertEqual(
+            list(node.iter_html()),
+            ['<p class="x">', "<b>Bold</b>", " text", "</p>"],
+        )
+
+    def test_iter_html_joins_to_to_html(self):
+        node = ParentNode("div", [
+            ParentNode("ul", [ParentNode("li", [LeafNode("i", "one")]), ParentNode("li", [LeafNode(None, "two")])]),
+            LeafNode("a", "link", {"href": "/x"}),
+        ])
+        self.assertEqual("".join(node.iter_html()), node.to_html())
+
+    def test_write_html(self):
+        node = ParentNode("div", [ParentNode("p", [LeafNode(None, "Hello")])])
+        buffer = io.StringIO()
+        node.write_html(buffer)
+        self.assertEqual(buffer.getvalue(), "<div><p>Hello</p></div>")
+
+    def test_write_html_leaf(self):
+        buffer = io.StringIO()
+        LeafNode("code", "x = 1").write_html(buffer)
+        self.assertEqual(buffer.getvalue(), "<code>x = 1</code>")
+
+    def test_iter_html_deep_tree(self):
+        node = LeafNode(None, "leaf")
+        for _ in range(200):
+            node = ParentNode("div", [node])
+        html = node.to_html()
+        self.assertEqual(html, "<div>" * 200 + "leaf" + "</div>" * 200)
+
+    def test_write_html_invalid_child_raises(self):
+        node = ParentNode("div", [LeafNode("b", None)])
+        with self.assertRaises(ValueError):
+            node.write_html(io.StringIO())
+
+
 class TestTextNodeToHTMLNode(unittest.TestCase):
     def test_text(self):
         node = TextNode("This is a text node", TextType.TEXT)
@@ -197,6 +265,12 @@ class TestTextNodeToHTMLNode(unittest.TestCase):
             text_node_to_html_node(node)
         self.assertIn("Unsupported TextType", str(context.exception))
 
+    def test_register_text_renderer(self):
+        self.addCleanup(TEXT_RENDERERS.pop, "footnote_ref")
+        register_text_renderer("footnote_ref", lambda node: LeafNode("sup", node.text, {"id": node.url}))
+        html_node = text_node_to_html_node(TextNode("1", "footnote_ref", "fn-1"))
+        self.assertEqual(html_node.to_html(), '<sup id="fn-1">1</sup>')
+
 
 if __name__ == "__main__":
     unittest.main()
\ No newline at end of file
@@ -1,6 +1,6 @@
 import unittest
 
-from inline_markdown import split_nodes_delimiter, extract_markdown_images, extract_markdown_links, split_nodes_image, split_nodes_link, text_to_textnodes
+from inline_markdown import split_nodes_delimiter, extract_markdown_images, extract_markdown_links, split_nodes_image, split_nodes_link, text_to_textnodes, text_to_tokens, inline_cache_info, INLINE_CACHE_MAX_TEXT
 from textnode import TextNode, TextType
 
 
@@ -446,6 +446,39 @@ class TestSplitNodesLink(unittest.TestCase):
             new_nodes,
         )
 
+    def test_split_links_duplicates(self):
+        node = TextNode("[a](b) and [a](b) and [a](b)", TextType.TEXT)
+        new_nodes = split_nodes_link([node])
+        self.assertListEqual(
+            [
+                TextNode("a", TextType.LINK, "b"),
+                TextNode(" and ", TextType.TEXT),
+                TextNode("a", TextType.LINK, "b"),
+                TextNode(" and ", TextType.TEXT),
+                TextNode("a", TextType.LINK, "b"),
+            ],
+            new_nodes,
+        )
+
+    def test_split_links_keeps_image_with_same_markdown(self):
+        # The link is split at its own position, not at the first place its
+        # markdown appears inside the image
+        node = TextNode("![l](u) then [l](u)", TextType.TEXT)
+        new_nodes = split_nodes_link([node])
+        self.assertListEqual(
+            [
+                TextNode("![l](u) then ", TextType.TEXT),
+                TextNode("l", TextType.LINK, "u"),
+            ],
+            new_nodes,
+        )
+
+    def test_split_links_many_links(self):
+        text = " ".join(f"[l{i}](u{i})" for i in range(1000))
+        new_nodes = split_nodes_link([TextNode(text, TextType.TEXT)])
+        self.assertEqual(len(new_nodes), 1999)
+        self.assertEqual(new_nodes[-1], TextNode("l999", TextType.LINK, "u999"))
+
 
 class TestTextToTextNodes(unittest.TestCase):
     def test_text_to_textnodes_full_example(self):
@@ -581,5 +614,93 @@ class TestTextToTextNodes(unittest.TestCase):
         self.assertListEqual(expected, nodes)
 
 
+    def test_text_to_textnodes_unclosed_delimiter_raises(self):
+        for text in ["**bold", "*italic", "_italic", "`code", "`a*b`", "*a**b*"]:
+            with self.assertRaises(ValueError):
+                text_to_textnodes(text)
+
+    def test_text_to_textnodes_underscore_italic(self):
+        nodes = text_to_textnodes("An _italic_ word")
+        expected = [
+            TextNode("An ", TextType.TEXT),
+            TextNode("italic", TextType.ITALIC),
+            TextNode(" word", TextType.TEXT),
+        ]
+        self.assertListEqual(expected, nodes)
+
+    def test_text_to_textnodes_matches_chained_passes(self):
+        # The single-pass scanner must agree with the original split chain
+        def chained(text):
+            nodes = [TextNode(text, TextType.TEXT)]
+            nodes = split_nodes_delimiter(nodes, "**", TextType.BOLD)
+            nodes = split_nodes_delimiter(nodes, "*", TextType.ITALIC)
+            nodes = split_nodes_delimiter(nodes, "_", TextType.ITALIC)
+            nodes = split_nodes_delimiter(nodes, "`", TextType.CODE)
+            nodes = split_nodes_image(nodes)
+            nodes = split_nodes_link(nodes)
+            return nodes
+
+        def outcome(parse, text):
+            try:
+                return parse(text)
+            except ValueError:
+                return "unclosed"
+
+        samples = [
+            "***a** b*",
+            "**a*b**",
+            "*a `b` c*",
+            "`**` and **`**",
+            "![img](u)[link](v)!",
+            "!![x](y) and [a](b) and [a](b)",
+            "[a](b(c)) ![d](e) [f]",
+            "**![a](b)** and _[c](d)_",
+            "a****b",
+            "[x](**y**)",
+        ]
+        for text in samples:
+            self.assertEqual(outcome(chained, text), outcome(text_to_textnodes, text), text)
+
+
+class TestTextToTokens(unittest.TestCase):
+    def test_tokens_match_textnodes(self):
+        text = "Some **bold** and a [link](https://boot.dev) and ![img](/a.png)"
+        tokens = text_to_tokens(text)
+        self.assertIsInstance(tokens, tuple)
+        self.assertEqual(
+            [TextNode(t.text, t.text_type, t.url) for t in tokens],
+            text_to_textnodes(text),
+        )
+
+    def test_repeated_text_hits_cache(self):
+        text = "- a repeated *boilerplate* line that only this test uses"
+        before = inline_cache_info()
+        first = text_to_tokens(text)
+        second = text_to_tokens(text)
+        after = inline_cache_info()
+        self.assertIs(first, second)
+        self.assertEqual(after.misses - before.misses, 1)
+        self.assertEqual(after.hits - before.hits, 1)
+
+    def test_long_text_not_cached(self):
+        text = "word " * (INLINE_CACHE_MAX_TEXT // 5 + 1)
+        before = inline_cache_info()
+        text_to_tokens(text)
+        text_to_tokens(text)
+        after = inline_cache_info()
+        self.assertEqual(after.hits, before.hits)
+        self.assertEqual(after.misses, before.misses)
+
+    def test_tokens_are_immutable(self):
+        token = text_to_tokens("plain")[0]
+        with self.assertRaises(AttributeError):
+            token.text = "changed"
+
+    def test_errors_are_not_cached(self):
+        for _ in range(2):
+            with self.assertRaises(ValueError):
+                text_to_tokens("an **unclosed section")
+
+
 if __name__ == "__main__":
     unittest.main()
\ No newline at end of file
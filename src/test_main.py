@@ -0,0 +1,229 @@
+import unittest
+import os
+import tempfile
+import shutil
+import sys
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+from main import find_pages, page_dest_path, generate_pages_incremental, generate_pages_recursive, remove_untracked_files, \
+    check_output_dir
+from build_manifest import ChangeSet
+
+
+class TestGeneratePagesIncremental(unittest.TestCase):
+    def setUp(self):
+        self.test_dir = tempfile.mkdtemp()
+        self.content_dir = os.path.join(self.test_dir, "content")
+        self.docs_dir = os.path.join(self.test_dir, "docs")
+        os.makedirs(os.path.join(self.content_dir, "blog", "post"))
+        os.makedirs(self.docs_dir)
+
+        self.write(os.path.join(self.content_dir, "index.md"), "# Home\n\nWelcome")
+        self.write(os.path.join(self.content_dir, "blog", "post", "index.md"), "# Post\n\nHello")
+
+        self.template_path = os.path.join(self.test_dir, "template.html")
+        self.write(self.template_path, "<title>{{ Title }}</title><main>{{ Content }}</main>")
+        self.manifest_path = os.path.join(self.test_dir, ".ssg-manifest.json")
+
+    def tearDown(self):
+        shutil.rmtree(self.test_dir)
+
+    def write(self, path, content):
+        with open(path, 'w') as f:
+            f.write(content)
+
+    def read(self, path):
+        with open(path, 'r') as f:
+            return f.read()
+
+    def build(self, basepath="/", force=False, changes=None):
+        return generate_pages_incremental(
+            self.content_dir, self.template_path, self.docs_dir, self.manifest_path, basepath,
+            force=force, changes=changes,
+        )
+
+    def test_find_pages(self):
+        self.assertEqual(
+            find_pages(self.content_dir),
+            [os.path.join("blog", "post", "index.md"), "index.md"],
+        )
+
+    def test_page_dest_path(self):
+        self.assertEqual(
+            page_dest_path(os.path.join("notes.md", "a.md"), "docs"),
+            os.path.join("docs", "notes.md", "a.html"),
+        )
+
+    def test_first_build_renders_everything(self):
+        self.assertEqual(self.build(), (2, 0))
+        self.assertTrue(os.path.exists(os.path.join(self.docs_dir, "index.html")))
+        self.assertTrue(os.path.exists(os.path.join(self.docs_dir, "blog", "post", "index.html")))
+        self.assertTrue(os.path.exists(self.manifest_path))
+
+    def test_unchanged_build_renders_nothing(self):
+        self.build()
+        self.assertEqual(self.build(), (0, 0))
+
+    def test_only_changed_page_is_rendered(self):
+        self.build()
+        post_output = os.path.join(self.docs_dir, "blog", "post", "index.html")
+        post_mtime = os.stat(post_output).st_mtime_ns
+
+        self.write(os.path.join(self.content_dir, "index.md"), "# Home\n\nWelcome back")
+        self.assertEqual(self.build(), (1, 0))
+        self.assertIn("Welcome back", self.read(os.path.join(self.docs_dir, "index.html")))
+        self.assertEqual(os.stat(post_output).st_mtime_ns, post_mtime)
+
+    def test_edited_output_is_rendered_again(self):
+        self.build()
+        post_output = os.path.join(self.docs_dir, "blog", "post", "index.html")
+        expected = self.read(post_output)
+        for force in (False, True):
+            self.write(post_output, "edited by hand")
+            self.assertEqual(self.build(force=force), (1 if not force else 2, 0))
+            self.assertEqual(self.read(post_output), expected)
+
+    def test_same_size_edit_is_rendered_again(self):
+        # An edit that keeps the size is still caught by the mtime
+        self.build()
+        post_output = os.path.join(self.docs_dir, "blog", "post", "index.html")
+        expected = self.read(post_output)
+        self.write(post_output, expected.replace("Hello", "Jello"))
+        self.build(force=True)
+        self.assertEqual(self.read(post_output), expected)
+
+    def test_missing_output_is_rendered(self):
+        self.build()
+        os.remove(os.path.join(self.docs_dir, "index.html"))
+        self.assertEqual(self.build(), (1, 0))
+        self.assertTrue(os.path.exists(os.path.join(self.docs_dir, "index.html")))
+
+    def test_template_change_rebuilds_everything(self):
+        self.build()
+        self.write(self.template_path, "<h1>{{ Title }}</h1>{{ Content }}")
+        self.assertEqual(self.build(), (2, 0))
+
+    def test_basepath_change_rebuilds_everything(self):
+        self.build()
+        self.assertEqual(self.build("/site/"), (2, 0))
+
+    def test_removed_source_deletes_output(self):
+        self.build()
+        os.remove(os.path.join(self.content_dir, "blog", "post", "index.md"))
+        self.assertEqual(self.build(), (0, 1))
+        self.assertFalse(os.path.exists(os.path.join(self.docs_dir, "blog")))
+        self.assertTrue(os.path.exists(os.path.join(self.docs_dir, "index.html")))
+
+    def test_removal_keeps_other_files(self):
+        self.build()
+        asset = os.path.join(self.docs_dir, "blog", "post", "photo.png")
+        self.write(asset, "png")
+        os.remove(os.path.join(self.content_dir, "blog", "post", "index.md"))
+        self.build()
+        self.assertTrue(os.path.exists(asset))
+
+    def test_corrupt_manifest_rebuilds_everything(self):
+        self.build()
+        self.write(self.manifest_path, "not json")
+        self.assertEqual(self.build(), (2, 0))
+
+    def test_forced_build_skips_identical_outputs(self):
+        self.build()
+        index_output = os.path.join(self.docs_dir, "index.html")
+        index_mtime = os.stat(index_output).st_mtime_ns
+        self.write(os.path.join(self.content_dir, "blog", "post", "index.md"), "# Post\n\nHello again")
+
+        changes = ChangeSet()
+        self.assertEqual(self.build(force=True, changes=changes), (2, 0))
+        self.assertEqual(os.stat(index_output).st_mtime_ns, index_mtime)
+        self.assertEqual(changes.changed, {"blog/post/index.html"})
+
+    def test_changes_record_written_and_removed_pages(self):
+        changes = ChangeSet()
+        self.build(changes=changes)
+        self.assertEqual(changes.changed, {"index.html", "blog/post/index.html"})
+
+        changes = ChangeSet()
+        os.remove(os.path.join(self.content_dir, "blog", "post", "index.md"))
+        self.build(changes=changes)
+        self.assertEqual((changes.changed, changes.deleted), (set(), {"blog/post/index.html"}))
+
+    def test_remove_untracked_files(self):
+        self.build()
+        self.write(os.path.join(self.docs_dir, "blog", "old.html"), "stale")
+        changes = ChangeSet()
+        removed = remove_untracked_files(self.docs_dir, ["index.html", os.path.join("blog", "post", "index.html")], changes)
+        self.assertEqual(removed, 1)
+        self.assertEqual(changes.deleted, {"blog/old.html"})
+        self.assertTrue(os.path.exists(os.path.join(self.docs_dir, "blog", "post", "index.html")))
+
+    def test_check_output_dir(self):
+        check_output_dir(self.docs_dir, self.test_dir)
+        check_output_dir(os.path.join(self.test_dir, "missing"), self.test_dir)
+        for dest_dir in (self.test_dir, os.path.dirname(self.test_dir), os.path.join(self.docs_dir, "..")):
+            with self.assertRaises(ValueError):
+                check_output_dir(dest_dir, self.test_dir)
+        # A directory that looks like a project of its own
+        other_dir = os.path.join(self.test_dir, "other")
+        os.makedirs(os.path.join(other_dir, "src"))
+        with self.assertRaises(ValueError):
+            check_output_dir(other_dir, self.test_dir)
+
+    def test_change_set_write(self):
+        changes = ChangeSet()
+        changes.mark_changed("b.html")
+        changes.mark_changed(os.path.join("a", "index.html"))
+        changes.mark_deleted("b.html")
+        changes.mark_deleted("c.css")
+        changed_path = os.path.join(self.test_dir, "changed.txt")
+        deleted_path = os.path.join(self.test_dir, "deleted.txt")
+        changes.write(changed_path, deleted_path)
+        self.assertEqual(self.read(changed_path), "a/index.html\n")
+        self.assertEqual(self.read(deleted_path), "b.html\nc.css\n")
+
+
+class TestGeneratePagesParallel(unittest.TestCase):
+    def setUp(self):
+        self.test_dir = tempfile.mkdtemp()
+        self.content_dir = os.path.join(self.test_dir, "content")
+        self.template_path = os.path.join(self.test_dir, "template.html")
+        for i in range(12):
+            page_dir = os.path.join(self.content_dir, f"post{i}")
+            os.makedirs(page_dir)
+            with open(os.path.join(page_dir, "index.md"), 'w') as f:
+                f.write(f"# Post {i}\n\nSome **bold** text and a [link](/post{i}).")
+        with open(self.template_path, 'w') as f:
+            f.write('<title>{{ Title }}</title><link href="/index.css">{{ Content }}')
+
+    def tearDown(self):
+        shutil.rmtree(self.test_dir)
+
+    def read_tree(self, root):
+        files = {}
+        for dirpath, _, filenames in os.walk(root):
+            for filename in filenames:
+                path = os.path.join(dirpath, filename)
+                with open(path, 'rb') as f:
+                    files[os.path.relpath(path, root)] = f.read()
+        return files
+
+    def test_parallel_output_matches_serial(self):
+        serial_dir = os.path.join(self.test_dir, "serial")
+        parallel_dir = os.path.join(self.test_dir, "parallel")
+        generate_pages_recursive(self.content_dir, self.template_path, serial_dir, "/site/")
+        generate_pages_recursive(self.content_dir, self.template_path, parallel_dir, "/site/", jobs=3)
+        serial = self.read_tree(serial_dir)
+        self.assertEqual(len(serial), 12)
+        self.assertEqual(serial, self.read_tree(parallel_dir))
+
+    def test_parallel_error_names_source(self):
+        broken = os.path.join(self.content_dir, "post5", "index.md")
+        with open(broken, 'w') as f:
+            f.write("No title here")
+        with self.assertRaises(RuntimeError) as cm:
+            generate_pages_recursive(self.content_dir, self.template_path,
+                                     os.path.join(self.test_dir, "out"), jobs=3)
+        self.assertIn(broken, str(cm.exception))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,105 @@
+import unittest
+import hashlib
+import os
+import tempfile
+import shutil
+import sys
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+from output_writer import write_output, AtomicOutput, FLUSH_CHARS, output_entry, recorded_hash
+
+
+class TestWriteOutput(unittest.TestCase):
+    def setUp(self):
+        self.test_dir = tempfile.mkdtemp()
+        self.dest_path = os.path.join(self.test_dir, "out", "index.html")
+
+    def tearDown(self):
+        shutil.rmtree(self.test_dir)
+
+    def read(self):
+        with open(self.dest_path, 'r', encoding='utf-8') as f:
+            return f.read()
+
+    def backdate(self):
+        os.utime(self.dest_path, ns=(0, 10**9))
+
+    def test_writes_and_returns_hash(self):
+        digest, written = write_output(self.dest_path, "<p>héllo</p>")
+        self.assertTrue(written)
+        self.assertEqual(digest, hashlib.sha256("<p>héllo</p>".encode("utf-8")).hexdigest())
+        self.assertEqual(self.read(), "<p>héllo</p>")
+        self.assertEqual(os.listdir(os.path.dirname(self.dest_path)), ["index.html"])
+
+    def test_identical_output_is_not_written(self):
+        digest, _ = write_output(self.dest_path, "<p>same</p>")
+        self.backdate()
+        self.assertEqual(write_output(self.dest_path, "<p>same</p>", digest), (digest, False))
+        self.assertEqual(os.stat(self.dest_path).st_mtime_ns, 10**9)
+
+    def test_changed_output_is_written(self):
+        digest, _ = write_output(self.dest_path, "<p>old</p>")
+        _, written = write_output(self.dest_path, "<p>new</p>", digest)
+        self.assertTrue(written)
+        self.assertEqual(self.read(), "<p>new</p>")
+
+    def test_missing_file_is_written_despite_hash(self):
+        digest, _ = write_output(self.dest_path, "<p>same</p>")
+        os.remove(self.dest_path)
+        self.assertEqual(write_output(self.dest_path, "<p>same</p>", digest), (digest, True))
+        self.assertEqual(self.read(), "<p>same</p>")
+
+    def test_recorded_hash(self):
+        digest, _ = write_output(self.dest_path, "<p>same</p>")
+        entry = output_entry(self.dest_path, digest)
+        self.assertEqual(recorded_hash(self.dest_path, entry), digest)
+        self.assertIsNone(recorded_hash(self.dest_path, None))
+        # An old manifest recorded the bare hash
+        self.assertIsNone(recorded_hash(self.dest_path, digest))
+
+        stat = os.stat(self.dest_path)
+        os.utime(self.dest_path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1))
+        self.assertIsNone(recorded_hash(self.dest_path, entry))
+        os.remove(self.dest_path)
+        self.assertIsNone(recorded_hash(self.dest_path, entry))
+
+
+class TestAtomicOutput(unittest.TestCase):
+    def setUp(self):
+        self.test_dir = tempfile.mkdtemp()
+        self.dest_path = os.path.join(self.test_dir, "index.html")
+
+    def tearDown(self):
+        shutil.rmtree(self.test_dir)
+
+    def test_matches_write_output(self):
+        text = "<p>" + "x" * FLUSH_CHARS + "ü</p>"
+        with AtomicOutput(self.dest_path) as output:
+            output.write(text[:10])
+            output.writelines([text[10:FLUSH_CHARS], text[FLUSH_CHARS:]])
+        self.assertTrue(output.written)
+        self.assertEqual(output.digest, hashlib.sha256(text.encode("utf-8")).hexdigest())
+        with open(self.dest_path, 'r', encoding='utf-8') as f:
+            self.assertEqual(f.read(), text)
+
+    def test_identical_output_is_not_replaced(self):
+        digest, _ = write_output(self.dest_path, "<p>same</p>")
+        os.utime(self.dest_path, ns=(0, 10**9))
+        with AtomicOutput(self.dest_path, digest) as output:
+            output.write("<p>same</p>")
+        self.assertFalse(output.written)
+        self.assertEqual(os.stat(self.dest_path).st_mtime_ns, 10**9)
+        self.assertEqual(os.listdir(self.test_dir), ["index.html"])
+
+    def test_error_keeps_old_file(self):
+        write_output(self.dest_path, "<p>old</p>")
+        with self.assertRaises(ValueError):
+            with AtomicOutput(self.dest_path) as output:
+                output.write("<p>half")
+                raise ValueError("render failed")
+        with open(self.dest_path, 'r') as f:
+            self.assertEqual(f.read(), "<p>old</p>")
+        self.assertEqual(os.listdir(self.test_dir), ["index.html"])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,93 @@
+import unittest
+import json
+import os
+import tempfile
+import shutil
+import sys
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+import page_cache
+from page_cache import PageCache
+
+
+class TestPageCache(unittest.TestCase):
+    def setUp(self):
+        self.cache_dir = tempfile.mkdtemp()
+        self.cache = PageCache(self.cache_dir)
+
+    def tearDown(self):
+        shutil.rmtree(self.cache_dir)
+
+    def test_miss(self):
+        self.assertIsNone(self.cache.get(self.cache.key("# Title")))
+
+    def test_put_and_get(self):
+        key = self.cache.key("# Title")
+        self.cache.put(key, "Title", "<div><h1>Title</h1></div>")
+        self.assertEqual(self.cache.get(key), ("Title", "<div><h1>Title</h1></div>", None))
+
+    def test_put_and_get_terms(self):
+        key = self.cache.key("# Title")
+        self.cache.put(key, "Title", "<div><h1>Title</h1></div>", ["title"])
+        self.assertEqual(self.cache.get(key), ("Title", "<div><h1>Title</h1></div>", ["title"]))
+
+    def test_key_depends_on_markdown(self):
+        self.assertEqual(self.cache.key("a"), self.cache.key("a"))
+        self.assertNotEqual(self.cache.key("a"), self.cache.key("b"))
+
+    def test_key_depends_on_basepath(self):
+        self.assertNotEqual(self.cache.key("# Hi"), self.cache.key("# Hi", "/site/"))
+
+    def test_key_depends_on_assets(self):
+        self.assertEqual(self.cache.key("# Hi"), self.cache.key("# Hi", "/", None))
+        self.assertNotEqual(self.cache.key("# Hi", "/", "abc"), self.cache.key("# Hi", "/", "def"))
+
+    def test_key_depends_on_parser_version(self):
+        key = self.cache.key("a")
+        original = page_cache.PARSER_VERSION
+        page_cache.PARSER_VERSION = original + "-next"
+        try:
+            self.assertNotEqual(self.cache.key("a"), key)
+        finally:
+            page_cache.PARSER_VERSION = original
+
+    def test_corrupt_entry_is_a_miss(self):
+        key = self.cache.key("a")
+        self.cache.put(key, "A", "<p>a</p>")
+        with open(self.cache.entry_path(key), 'w') as f:
+            f.write("{broken")
+        self.assertIsNone(self.cache.get(key))
+
+    def test_entry_of_another_shape_is_a_miss(self):
+        key = self.cache.key("a")
+        for entry in ({}, [], "a", {"title": "A"}, {"title": "A", "html": 1}, {"title": "A", "html": "", "terms": 1}):
+            self.cache.put(key, "A", "<p>a</p>")
+            with open(self.cache.entry_path(key), 'w') as f:
+                json.dump(entry, f)
+            self.assertIsNone(self.cache.get(key))
+
+    def test_prune_evicts_least_recently_used(self):
+        keys = [self.cache.key(str(i)) for i in range(3)]
+        for i, key in enumerate(keys):
+            self.cache.put(key, "T", "x" * 100)
+            # Distinct, increasing mtimes without sleeping
+            os.utime(self.cache.entry_path(key), ns=(0, (i + 1) * 10**9))
+        entry_size = os.path.getsize(self.cache.entry_path(keys[0]))
+
+        # Using the oldest entry makes it the most recently used
+        self.cache.get(keys[0])
+        self.cache.max_bytes = entry_size * 2
+        entries, size = self.cache.prune()
+
+        self.assertEqual(entries, 2)
+        self.assertEqual(size, entry_size * 2)
+        self.assertIsNotNone(self.cache.get(keys[0]))
+        self.assertIsNone(self.cache.get(keys[1]))
+        self.assertIsNotNone(self.cache.get(keys[2]))
+
+    def test_prune_missing_directory(self):
+        cache = PageCache(os.path.join(self.cache_dir, "missing"))
+        self.assertEqual(cache.prune(), (0, 0))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,81 @@
+import unittest
+import os
+import tempfile
+import shutil
+import sys
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+from main import generate_pages_recursive
+from build_report import BuildReport
+from page_cache import PageCache
+
+
+class TestPipeline(unittest.TestCase):
+    def setUp(self):
+        self.test_dir = tempfile.mkdtemp()
+        self.content_dir = os.path.join(self.test_dir, "content")
+        self.template_path = os.path.join(self.test_dir, "template.html")
+        for i in range(20):
+            page_dir = os.path.join(self.content_dir, f"post{i}")
+            os.makedirs(page_dir)
+            with open(os.path.join(page_dir, "index.md"), 'w') as f:
+                f.write(f"# Post {i}\n\nSome **bold** text and a [link](/post{i}).")
+        with open(self.template_path, 'w') as f:
+            f.write('<title>{{ Title }}</title><link href="/index.css">{{ Content }}')
+
+    def tearDown(self):
+        shutil.rmtree(self.test_dir)
+
+    def read_tree(self, root):
+        files = {}
+        for dirpath, _, filenames in os.walk(root):
+            for filename in filenames:
+                path = os.path.join(dirpath, filename)
+                with open(path, 'rb') as f:
+                    files[os.path.relpath(path, root)] = f.read()
+        return files
+
+    def build(self, name, **kwargs):
+        out_dir = os.path.join(self.test_dir, name)
+        generate_pages_recursive(self.content_dir, self.template_path, out_dir, "/site/", **kwargs)
+        return self.read_tree(out_dir)
+
+    def test_output_matches_serial(self):
+        serial = self.build("serial")
+        self.assertEqual(len(serial), 20)
+        self.assertEqual(self.build("threaded", io_threads=4), serial)
+        self.assertEqual(self.build("processes", io_threads=4, jobs=2), serial)
+
+    def test_report_and_cache(self):
+        report = BuildReport()
+        cache = PageCache(os.path.join(self.test_dir, "cache"))
+        self.build("out", io_threads=3, report=report, cache=cache)
+        self.assertEqual(len(report.pages), 20)
+        self.assertEqual(report.counter_totals()["page_cache_misses"], 20)
+        for timings in report.pages:
+            self.assertIn("read", timings.wall)
+            self.assertIn("write", timings.wall)
+
+        report = BuildReport()
+        self.build("out", io_threads=3, jobs=2, report=report, cache=cache)
+        self.assertEqual(report.counter_totals()["page_cache_hits"], 20)
+
+    def test_error_names_source(self):
+        broken = os.path.join(self.content_dir, "post5", "index.md")
+        with open(broken, 'w') as f:
+            f.write("No title here")
+        for jobs in (1, 2):
+            with self.assertRaises(RuntimeError) as cm:
+                self.build("out", io_threads=4, jobs=jobs)
+            self.assertIn(broken, str(cm.exception))
+
+    def test_unreadable_source(self):
+        unreadable = os.path.join(self.content_dir, "post3", "index.md")
+        with open(unreadable, 'wb') as f:
+            f.write(b"# Not UTF-8 \xff\xfe")
+        with self.assertRaises(RuntimeError) as cm:
+            self.build("out", io_threads=2)
+        self.assertIn(unreadable, str(cm.exception))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,94 @@
+import unittest
+import gzip
+import io
+import os
+import tempfile
+import shutil
+import sys
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+from contextlib import redirect_stdout
+from build_manifest import ChangeSet
+from precompress import precompress_files, remove_stale_siblings, compressed_siblings, available_suffixes
+
+
+class TestPrecompress(unittest.TestCase):
+    def setUp(self):
+        self.test_dir = tempfile.mkdtemp()
+        os.makedirs(os.path.join(self.test_dir, "blog"))
+        self.files = ["index.html", "index.css", os.path.join("blog", "index.html"), "logo.png"]
+        for relative_path in self.files:
+            self.write(relative_path, f"<p>{relative_path}</p>" * 50)
+
+    def tearDown(self):
+        shutil.rmtree(self.test_dir)
+
+    def path(self, relative_path):
+        return os.path.join(self.test_dir, relative_path)
+
+    def write(self, relative_path, content):
+        with open(self.path(relative_path), 'w') as f:
+            f.write(content)
+
+    def precompress(self, jobs=1, changes=None):
+        with redirect_stdout(io.StringIO()):
+            return precompress_files(self.test_dir, self.files, [".gz"], jobs, changes)
+
+    def test_writes_gzip_siblings_of_text_files(self):
+        self.assertEqual(self.precompress(), 3)
+        with gzip.open(self.path("index.css.gz"), 'rt') as f:
+            self.assertEqual(f.read(), "<p>index.css</p>" * 50)
+        self.assertTrue(os.path.exists(self.path(os.path.join("blog", "index.html.gz"))))
+        self.assertFalse(os.path.exists(self.path("logo.png.gz")))
+
+    def test_output_is_deterministic(self):
+        self.precompress()
+        with open(self.path("index.html.gz"), 'rb') as f:
+            first = f.read()
+        os.remove(self.path("index.html.gz"))
+        self.precompress()
+        with open(self.path("index.html.gz"), 'rb') as f:
+            self.assertEqual(f.read(), first)
+
+    def test_newer_sibling_is_skipped(self):
+        self.precompress()
+        self.assertEqual(self.precompress(), 0)
+
+        # The source is newer than its sibling again
+        source = self.path("index.html")
+        stat = os.stat(self.path("index.html.gz"))
+        os.utime(source, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10**9))
+        changes = ChangeSet()
+        self.assertEqual(self.precompress(changes=changes), 1)
+        self.assertEqual(changes.changed, {"index.html.gz"})
+
+    def test_changed_file_is_compressed_despite_old_mtime(self):
+        self.precompress()
+        os.utime(self.path("index.css"), ns=(0, 10**9))
+        changes = ChangeSet()
+        changes.mark_changed("index.css")
+        self.assertEqual(self.precompress(changes=changes), 1)
+
+    def test_process_pool(self):
+        self.assertEqual(self.precompress(jobs=2), 3)
+        self.assertEqual(self.precompress(jobs=2), 0)
+
+    def test_remove_stale_siblings(self):
+        self.precompress()
+        self.write("archive.tar.gz", "static")
+        self.write("notes.txt.gz", "static")
+        os.remove(self.path(os.path.join("blog", "index.html")))
+        changes = ChangeSet()
+        self.assertEqual(remove_stale_siblings(self.test_dir, ["notes.txt.gz"], changes), 1)
+        self.assertEqual(changes.deleted, {"blog/index.html.gz"})
+        self.assertFalse(os.path.exists(self.path("blog")))
+        self.assertTrue(os.path.exists(self.path("archive.tar.gz")))
+        self.assertTrue(os.path.exists(self.path("index.html.gz")))
+
+    def test_compressed_siblings(self):
+        self.assertEqual(compressed_siblings("a.css", [".gz", ".br"]), ["a.css.gz", "a.css.br"])
+        self.assertEqual(compressed_siblings("a.png"), [])
+        self.assertEqual(available_suffixes()[0], ".gz")
+
+
+if __name__ == "__main__":
+    unittest.main()
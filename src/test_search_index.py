@@ -0,0 +1,220 @@
+import unittest
+import io
+import json
+import os
+import tempfile
+import shutil
+import sys
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+from contextlib import redirect_stdout
+from unittest import mock
+import search_index
+from search_index import SearchIndex, PageTerms, tokenize, term_shard, page_url, SEARCH_DIR
+from block_markdown import markdown_to_html_node
+from build_manifest import ChangeSet
+from main import generate_pages_incremental
+
+
+class TestPageTerms(unittest.TestCase):
+    def test_tokenize(self):
+        self.assertEqual(list(tokenize("Tom's *Hobbit*, a HOBBIT-hole!")), ["tom", "hobbit", "hobbit", "hole"])
+        self.assertEqual(list(tokenize("x" * 33 + " ok")), ["ok"])
+
+    def test_terms_from_text_nodes(self):
+        node = markdown_to_html_node(
+            "# The Title\n\nSome **bold** and [a link](/x) text\n\n![Alt words](/img.png)\n\n```\ncode_here\n```"
+        )
+        terms = PageTerms().add_node_terms(node)
+        self.assertEqual(terms, ["alt", "and", "bold", "code_here", "link", "some", "text", "the", "title", "words"])
+        # URLs are not text
+        self.assertNotIn("img", terms)
+
+    def test_term_shard_is_stable(self):
+        # Fixed values, the browser computes the same FNV-1a hash
+        self.assertEqual(term_shard("a", 2 ** 32), 0xe40c292c)
+        self.assertEqual(term_shard("hobbit", 8), term_shard("hobbit", 8))
+        self.assertEqual(term_shard("élan", 1), 0)
+
+    def test_page_url(self):
+        self.assertEqual(page_url("index.html"), "/")
+        self.assertEqual(page_url(os.path.join("blog", "tom", "index.html"), "/site/"), "/site/blog/tom/")
+        self.assertEqual(page_url("notes/a.html"), "/notes/a.html")
+
+
+class TestSearchIndex(unittest.TestCase):
+    def setUp(self):
+        self.test_dir = tempfile.mkdtemp()
+        self.dest_dir = os.path.join(self.test_dir, "docs")
+        self.state_path = os.path.join(self.test_dir, ".ssg-search.json")
+
+    def tearDown(self):
+        shutil.rmtree(self.test_dir)
+
+    def index(self):
+        return SearchIndex(self.dest_dir, self.state_path)
+
+    def write(self, index, changes=None):
+        with redirect_stdout(io.StringIO()):
+            return index.write(changes)
+
+    def load(self, relative_path):
+        with open(os.path.join(self.dest_dir, relative_path)) as f:
+            return json.load(f)
+
+    def postings(self, index):
+        terms = {}
+        for i in range(index.shard_count):
+            terms.update(self.load(index.term_file(i)))
+        return terms
+
+    def test_write_and_lookup(self):
+        index = self.index()
+        index.update_page("a.md", "/a.html", "A", ["hobbit", "ring"])
+        index.update_page("b.md", "/b.html", "B", ["ring"])
+        files = self.write(index)
+        self.assertIn(f"{SEARCH_DIR}/index.json", files)
+        self.assertEqual(self.postings(index), {"hobbit": [0], "ring": [0, 1]})
+        self.assertEqual(self.load(index.docs_file(0)), [["/a.html", "A"], ["/b.html", "B"]])
+        self.assertEqual(self.load(f"{SEARCH_DIR}/index.json")["term_shards"], 1)
+
+    def test_incremental_update_patches_postings(self):
+        index = self.index()
+        index.update_page("a.md", "/a.html", "A", ["hobbit", "ring"])
+        index.update_page("b.md", "/b.html", "B", ["ring"])
+        self.write(index)
+
+        index = self.index()
+        index.update_page("b.md", "/b.html", "B", ["ring"])
+        changes = ChangeSet()
+        with mock.patch.object(SearchIndex, "build_shards") as build_mock:
+            self.write(index, changes)
+        build_mock.assert_not_called()
+        self.assertEqual(changes.changed, set())
+
+        index = self.index()
+        index.update_page("b.md", "/b.html", "B2", ["ring", "wizard"])
+        index.remove_page("a.md")
+        changes = ChangeSet()
+        with mock.patch.object(SearchIndex, "build_shards") as build_mock:
+            self.write(index, changes)
+        build_mock.assert_not_called()
+        self.assertEqual(self.postings(index), {"ring": [1], "wizard": [1]})
+        self.assertEqual(self.load(index.docs_file(0)), [None, ["/b.html", "B2"]])
+        self.assertEqual(changes.changed, {index.term_file(0), index.docs_file(0), f"{SEARCH_DIR}/index.json"})
+
+        # The id of a removed page is reused
+        index = self.index()
+        index.update_page("c.md", "/c.html", "C", ["ring"])
+        self.write(index)
+        self.assertEqual(self.postings(index)["ring"], [0, 1])
+
+    def test_edited_files_are_rebuilt(self):
+        index = self.index()
+        index.update_page("a.md", "/a.html", "A", ["hobbit"])
+        self.write(index)
+        with open(os.path.join(self.dest_dir, index.term_file(0)), 'w') as f:
+            f.write('{"edited":[0]}')
+        index = self.index()
+        index.update_page("b.md", "/b.html", "B", ["ring"])
+        self.write(index)
+        self.assertEqual(self.postings(index), {"hobbit": [0], "ring": [1]})
+
+    def test_missing_files_are_rebuilt(self):
+        index = self.index()
+        index.update_page("a.md", "/a.html", "A", ["hobbit"])
+        self.write(index)
+        shutil.rmtree(self.dest_dir)
+        index = self.index()
+        index.update_page("b.md", "/b.html", "B", ["ring"])
+        self.write(index)
+        self.assertEqual(self.postings(index), {"hobbit": [0], "ring": [1]})
+
+    def test_shards_are_size_bounded(self):
+        index = self.index()
+        for i in range(300):
+            index.update_page(f"p{i}.md", f"/p{i}.html", f"Page {i}", [f"term{j}" for j in range(i % 50, i % 50 + 40)])
+        with mock.patch.object(search_index, "MAX_SHARD_BYTES", 2048):
+            files = self.write(index)
+            self.assertGreater(index.shard_count, 1)
+            for relative_path in [path for path in files if "/terms-" in path]:
+                self.assertLessEqual(os.path.getsize(os.path.join(self.dest_dir, relative_path)), 2048)
+
+            # Stale shards of the old count are removed
+            self.assertEqual(sorted(os.listdir(os.path.join(self.dest_dir, SEARCH_DIR))),
+                             sorted(os.path.basename(path) for path in files))
+        for term, ids in self.postings(index).items():
+            self.assertEqual(term_shard(term, index.shard_count), [i for i in range(index.shard_count)
+                             if term in self.load(index.term_file(i))][0])
+        self.assertEqual(self.postings(index)["term45"], [i for i in range(300) if i % 50 <= 45 < i % 50 + 40])
+
+
+class TestSearchIndexBuild(unittest.TestCase):
+    def setUp(self):
+        self.test_dir = tempfile.mkdtemp()
+        self.content_dir = os.path.join(self.test_dir, "content")
+        self.docs_dir = os.path.join(self.test_dir, "docs")
+        os.makedirs(os.path.join(self.content_dir, "blog"))
+        self.write(os.path.join(self.content_dir, "index.md"), "# Home\n\nWelcome hobbits")
+        self.write(os.path.join(self.content_dir, "blog", "index.md"), "# Blog\n\nAbout **wizards**")
+        self.template_path = os.path.join(self.test_dir, "template.html")
+        self.write(self.template_path, "<title>{{ Title }}</title>{{ Content }}")
+
+    def tearDown(self):
+        shutil.rmtree(self.test_dir)
+
+    def write(self, path, content):
+        with open(path, 'w') as f:
+            f.write(content)
+
+    def build(self, **kwargs):
+        search = SearchIndex(self.docs_dir, os.path.join(self.test_dir, ".ssg-search.json"))
+        with redirect_stdout(io.StringIO()):
+            rendered = generate_pages_incremental(
+                self.content_dir, self.template_path, self.docs_dir, os.path.join(self.test_dir, ".ssg-manifest.json"),
+                "/site/", search=search, **kwargs
+            )
+            search.write()
+        return rendered, search
+
+    def test_pages_are_indexed_incrementally(self):
+        for kwargs in ({}, {"jobs": 2}, {"io_threads": 2}):
+            # Every way of rendering collects the same terms
+            shutil.rmtree(self.docs_dir, ignore_errors=True)
+            _, search = self.build(force=True, **kwargs)
+            self.assertEqual(search.pages["blog/index.md"]["url"], "/site/blog/")
+            self.assertEqual(search.pages["blog/index.md"]["title"], "Blog")
+            self.assertEqual(search.pages["blog/index.md"]["terms"], ["about", "blog", "wizards"])
+
+        self.write(os.path.join(self.content_dir, "index.md"), "# Home\n\nWelcome elves")
+        rendered, search = self.build()
+        self.assertEqual(rendered, (1, 0))
+        self.assertEqual(search.pages["index.md"]["terms"], ["elves", "home", "welcome"])
+        self.assertIn("wizards", search.pages["blog/index.md"]["terms"])
+
+        os.remove(os.path.join(self.content_dir, "blog", "index.md"))
+        _, search = self.build()
+        self.assertEqual(list(search.pages), ["index.md"])
+
+    def build_without_index(self):
+        with redirect_stdout(io.StringIO()):
+            generate_pages_incremental(self.content_dir, self.template_path, self.docs_dir,
+                                       os.path.join(self.test_dir, ".ssg-manifest.json"), "/site/")
+
+    def test_pages_missing_from_index_are_rendered(self):
+        self.build_without_index()
+        rendered, search = self.build()
+        self.assertEqual(rendered, (2, 0))
+        self.assertEqual(len(search.pages), 2)
+
+    def test_pages_changed_without_index_are_rendered(self):
+        self.build()
+        self.write(os.path.join(self.content_dir, "index.md"), "# Home\n\nWelcome elves")
+        self.build_without_index()
+        rendered, search = self.build()
+        self.assertEqual(rendered, (1, 0))
+        self.assertIn("elves", search.pages["index.md"]["terms"])
+        self.assertEqual(self.build()[0], (0, 0))
+
+
+if __name__ == "__main__":
+    unittest.main()
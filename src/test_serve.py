@@ -0,0 +1,104 @@
+import unittest
+import os
+import tempfile
+import shutil
+import sys
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+from serve import DevSite, LiveReload, inject_livereload, LIVERELOAD_SCRIPT
+
+
+class TestDevSite(unittest.TestCase):
+    def setUp(self):
+        self.test_dir = tempfile.mkdtemp()
+        self.content_dir = os.path.join(self.test_dir, "content")
+        self.static_dir = os.path.join(self.test_dir, "static")
+        self.docs_dir = os.path.join(self.test_dir, "docs")
+        os.makedirs(os.path.join(self.content_dir, "blog"))
+        os.makedirs(self.static_dir)
+        self.template_path = os.path.join(self.test_dir, "template.html")
+
+        self.home = os.path.join(self.content_dir, "index.md")
+        self.post = os.path.join(self.content_dir, "blog", "index.md")
+        self.write(self.home, "# Home\n\nWelcome")
+        self.write(self.post, "# Post\n\nHello")
+        self.write(os.path.join(self.static_dir, "index.css"), "body {}")
+        self.write(self.template_path, "<title>{{ Title }}</title>{{ Content }}")
+
+        self.site = DevSite(self.content_dir, self.static_dir, self.template_path, self.docs_dir,
+                            os.path.join(self.test_dir, ".ssg-static.json"))
+        self.site.build()
+
+    def tearDown(self):
+        shutil.rmtree(self.test_dir)
+
+    def write(self, path, content):
+        with open(path, 'w') as f:
+            f.write(content)
+
+    def read(self, *parts):
+        with open(os.path.join(self.docs_dir, *parts), 'r') as f:
+            return f.read()
+
+    def test_build(self):
+        self.assertEqual(self.read("index.html"), "<title>Home</title><div><h1>Home</h1><p>Welcome</p></div>")
+        self.assertEqual(self.read("index.css"), "body {}")
+        self.assertEqual(set(self.site.pages), {"index.md", os.path.join("blog", "index.md")})
+
+    def test_markdown_change_renders_only_that_page(self):
+        self.write(os.path.join(self.docs_dir, "blog", "index.html"), "untouched")
+        self.write(self.home, "# Home\n\nChanged")
+        self.assertTrue(self.site.apply_changes({self.home}))
+        self.assertIn("Changed", self.read("index.html"))
+        self.assertEqual(self.read("blog", "index.html"), "untouched")
+
+    def test_template_change_does_not_parse_markdown(self):
+        # Changing the markdown without reporting it proves the cached content is used
+        self.write(self.home, "# Other\n\nNot parsed")
+        self.write(self.template_path, "<h1>{{ Title }}</h1>{{ Content }}")
+        self.assertTrue(self.site.apply_changes({self.template_path}))
+        self.assertEqual(self.read("index.html"), "<h1>Home</h1><div><h1>Home</h1><p>Welcome</p></div>")
+
+    def test_new_directory(self):
+        new_dir = os.path.join(self.content_dir, "new")
+        os.makedirs(new_dir)
+        self.write(os.path.join(new_dir, "index.md"), "# New")
+        self.site.apply_changes({new_dir})
+        self.assertIn("<h1>New</h1>", self.read("new", "index.html"))
+
+    def test_removed_directory(self):
+        shutil.rmtree(os.path.join(self.content_dir, "blog"))
+        self.site.apply_changes({os.path.join(self.content_dir, "blog")})
+        self.assertFalse(os.path.exists(os.path.join(self.docs_dir, "blog")))
+        self.assertEqual(list(self.site.pages), ["index.md"])
+
+    def test_static_change(self):
+        css = os.path.join(self.static_dir, "index.css")
+        self.write(css, "body { color: red }")
+        stat = os.stat(css)
+        os.utime(css, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10**9))
+        self.assertTrue(self.site.apply_changes({css}))
+        self.assertEqual(self.read("index.css"), "body { color: red }")
+
+    def test_unrelated_change(self):
+        self.assertFalse(self.site.apply_changes({os.path.join(self.test_dir, "notes.txt")}))
+
+
+class TestLiveReload(unittest.TestCase):
+    def test_inject_before_body_end(self):
+        self.assertEqual(
+            inject_livereload("<body><p>x</p></body></html>"),
+            "<body><p>x</p>" + LIVERELOAD_SCRIPT + "</body></html>",
+        )
+
+    def test_inject_without_body(self):
+        self.assertEqual(inject_livereload("<p>x</p>"), "<p>x</p>" + LIVERELOAD_SCRIPT)
+
+    def test_wait_returns_new_version(self):
+        livereload = LiveReload()
+        livereload.notify()
+        self.assertEqual(livereload.wait(0, timeout=0.01), 1)
+        self.assertEqual(livereload.wait(1, timeout=0.01), 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,141 @@
+import argparse
+import unittest
+import io
+import os
+import tempfile
+import shutil
+import sys
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+from contextlib import redirect_stdout
+from main import generate_pages_recursive, find_pages, page_dest_path
+from shard import parse_shard, shard_of, in_shard, write_shard_manifest, merge_shards
+
+
+class TestShardPartition(unittest.TestCase):
+    def test_parse_shard(self):
+        self.assertEqual(parse_shard("2/4"), (2, 4))
+        for value in ("0/4", "5/4", "1", "a/b", "1/0"):
+            with self.assertRaises(argparse.ArgumentTypeError):
+                parse_shard(value)
+
+    def test_shard_of_is_stable(self):
+        # Fixed values, the partition must not change between machines or runs
+        self.assertEqual([shard_of(p, 4) for p in ["index.md", "blog/tom/index.md", "a.md"]], [4, 1, 2])
+        self.assertEqual(shard_of(os.path.join("blog", "tom", "index.md"), 4), 1)
+
+    def test_every_page_in_exactly_one_shard(self):
+        paths = [f"section{i % 7}/page{i}.md" for i in range(500)]
+        for count in (1, 2, 5):
+            owners = [[index for index in range(1, count + 1) if in_shard(path, (index, count))] for path in paths]
+            self.assertTrue(all(len(owner) == 1 for owner in owners))
+        self.assertTrue(all(in_shard(path, None) for path in paths))
+
+
+class TestMergeShards(unittest.TestCase):
+    def setUp(self):
+        self.test_dir = tempfile.mkdtemp()
+        self.content_dir = os.path.join(self.test_dir, "content")
+        self.template_path = os.path.join(self.test_dir, "template.html")
+        for i in range(10):
+            page_dir = os.path.join(self.content_dir, f"post{i}")
+            os.makedirs(page_dir)
+            with open(os.path.join(page_dir, "index.md"), 'w') as f:
+                f.write(f"# Post {i}\n\nText of post {i}.")
+        with open(self.template_path, 'w') as f:
+            f.write("<title>{{ Title }}</title>{{ Content }}")
+
+    def tearDown(self):
+        shutil.rmtree(self.test_dir)
+
+    def build_shard(self, index, count):
+        shard = (index, count)
+        out_dir = os.path.join(self.test_dir, f"shard{index}")
+        with redirect_stdout(io.StringIO()):
+            generate_pages_recursive(self.content_dir, self.template_path, out_dir, shard=shard)
+        os.makedirs(out_dir, exist_ok=True)
+        static_files = []
+        if index == 1:
+            with open(os.path.join(out_dir, "index.css"), 'w') as f:
+                f.write("body {}")
+            static_files = ["index.css"]
+        pages = find_pages(self.content_dir)
+        write_shard_manifest(
+            out_dir, shard,
+            [page_dest_path(page, "") for page in pages],
+            [page_dest_path(page, "") for page in pages if in_shard(page, shard)],
+            static_files,
+        )
+        return out_dir
+
+    def merge(self, shard_dirs, dest_dir=None):
+        dest_dir = os.path.join(self.test_dir, "merged") if dest_dir is None else dest_dir
+        with redirect_stdout(io.StringIO()):
+            merged = merge_shards(shard_dirs, dest_dir)
+        return dest_dir, merged
+
+    def test_merge_matches_unsharded_build(self):
+        full_dir = os.path.join(self.test_dir, "full")
+        with redirect_stdout(io.StringIO()):
+            generate_pages_recursive(self.content_dir, self.template_path, full_dir)
+
+        dest_dir, merged = self.merge([self.build_shard(i, 3) for i in (1, 2, 3)])
+        self.assertEqual(merged, 11)
+        self.assertFalse(os.path.exists(os.path.join(dest_dir, ".ssg-shard.json")))
+        for page in find_pages(self.content_dir):
+            with open(page_dest_path(page, full_dir)) as f:
+                expected = f.read()
+            with open(page_dest_path(page, dest_dir)) as f:
+                self.assertEqual(f.read(), expected)
+
+    def test_missing_shard(self):
+        with self.assertRaises(ValueError) as cm:
+            self.merge([self.build_shard(1, 3), self.build_shard(3, 3)])
+        self.assertIn("shard 2/3 is missing", str(cm.exception))
+        self.assertFalse(os.path.exists(os.path.join(self.test_dir, "merged")))
+
+    def test_duplicate_shard(self):
+        first = self.build_shard(1, 2)
+        copy = os.path.join(self.test_dir, "copy")
+        shutil.copytree(first, copy)
+        with self.assertRaises(ValueError) as cm:
+            self.merge([first, self.build_shard(2, 2), copy])
+        self.assertIn("appears twice", str(cm.exception))
+
+    def test_duplicate_path(self):
+        shard_dirs = [self.build_shard(i, 2) for i in (1, 2)]
+        with open(os.path.join(shard_dirs[1], "index.css"), 'w') as f:
+            f.write("stray")
+        with self.assertRaises(ValueError) as cm:
+            self.merge(shard_dirs)
+        self.assertIn("index.css is in both", str(cm.exception))
+
+    def test_missing_page_file(self):
+        shard_dirs = [self.build_shard(i, 2) for i in (1, 2)]
+        page = find_pages(self.content_dir)[0]
+        owner = shard_dirs[shard_of(page, 2) - 1]
+        os.remove(page_dest_path(page, owner))
+        with self.assertRaises(ValueError) as cm:
+            self.merge(shard_dirs)
+        self.assertIn("is missing from", str(cm.exception))
+
+    def test_output_overlapping_a_shard(self):
+        shard_dirs = [self.build_shard(i, 2) for i in (1, 2)]
+        for dest_dir in (shard_dirs[0], os.path.join(shard_dirs[1], "site"), self.test_dir):
+            with self.assertRaises(ValueError) as cm:
+                self.merge(shard_dirs, dest_dir)
+            self.assertIn("overlaps shard directory", str(cm.exception))
+        self.assertTrue(os.path.exists(os.path.join(shard_dirs[0], "index.css")))
+        self.assertFalse(os.path.exists(os.path.join(shard_dirs[1], "site")))
+
+    def test_shards_from_different_sites(self):
+        first = self.build_shard(1, 2)
+        with open(os.path.join(self.content_dir, "new.md"), 'w') as f:
+            f.write("# New")
+        second = self.build_shard(2, 2)
+        with self.assertRaises(ValueError) as cm:
+            self.merge([first, second])
+        self.assertIn("different set of pages", str(cm.exception))
+
+
+if __name__ == "__main__":
+    unittest.main()
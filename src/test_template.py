@@ -0,0 +1,130 @@
+import unittest
+import pickle
+import io
+import os
+import tempfile
+import shutil
+import sys
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+from template import Template, load_template, ensure_template, basepath_rewriter, rewrite_urls
+from htmlnode import ParentNode, LeafNode
+from fingerprint import AssetMap
+
+
+class TestTemplate(unittest.TestCase):
+    def test_render(self):
+        template = Template("<title>{{ Title }}</title><body>{{ Content }}</body>")
+        self.assertEqual(
+            template.render("Hello", "<p>Hi</p>"),
+            "<title>Hello</title><body><p>Hi</p></body>",
+        )
+
+    def test_render_matches_replace(self):
+        source = "<h1>{{ Title }}</h1>{{ Content }}<footer>{{ Title }}</footer>"
+        expected = source.replace("{{ Title }}", "T").replace("{{ Content }}", "C")
+        self.assertEqual(Template(source).render("T", "C"), expected)
+
+    def test_no_placeholders(self):
+        template = Template("<p>static</p>")
+        self.assertEqual(template.slots, [])
+        self.assertEqual(template.render("T", "C"), "<p>static</p>")
+
+    def test_placeholder_values_not_reinterpreted(self):
+        template = Template("{{ Title }}|{{ Content }}")
+        self.assertEqual(template.render("{{ Content }}", "x"), "{{ Content }}|x")
+
+    def test_basepath_applied_to_static_segments(self):
+        template = Template('<link href="/index.css"><img src="/logo.png">{{ Content }}', "/site/")
+        self.assertEqual(
+            template.render("T", "<p></p>"),
+            '<link href="/site/index.css"><img src="/site/logo.png"><p></p>',
+        )
+
+    def test_default_basepath_leaves_paths(self):
+        template = Template('<link href="/index.css">')
+        self.assertEqual(template.render("T", "C"), '<link href="/index.css">')
+
+    def test_basepath_rewriter(self):
+        rewrite_url = basepath_rewriter("/base/")
+        self.assertEqual(rewrite_url("/x"), "/base/x")
+        self.assertEqual(rewrite_url("https://y"), "https://y")
+        self.assertIsNone(basepath_rewriter("/"))
+
+    def test_rewrite_urls(self):
+        self.assertEqual(
+            rewrite_urls('<a href="/x">x</a><a href="https://y">y</a>', basepath_rewriter("/base/")),
+            '<a href="/base/x">x</a><a href="https://y">y</a>',
+        )
+
+    def test_write_applies_basepath_to_content(self):
+        template = Template('<link href="/a.css"><title>{{ Title }}</title>{{ Content }}', "/base/")
+        node = ParentNode("p", [
+            LeafNode("a", "home", {"href": "/"}),
+            LeafNode("code", 'href="/literal"'),
+        ])
+        buffer = io.StringIO()
+        template.write(buffer, "T", node)
+        self.assertEqual(
+            buffer.getvalue(),
+            '<link href="/base/a.css"><title>T</title><p><a href="/base/">home</a><code>href="/literal"</code></p>',
+        )
+
+    def test_write_streams_content_node(self):
+        template = Template("<title>{{ Title }}</title><main>{{ Content }}</main>")
+        node = ParentNode("div", [ParentNode("p", [LeafNode("b", "Hi")])])
+        buffer = io.StringIO()
+        template.write(buffer, "Page", node)
+        self.assertEqual(buffer.getvalue(), template.render("Page", node.to_html()))
+
+    def test_write_needs_one_content_slot(self):
+        node = ParentNode("div", [LeafNode("p", "Hi")])
+        for source in ("{{ Content }}{{ Content }}", "<title>{{ Title }}</title>"):
+            with self.assertRaises(ValueError):
+                Template(source).write(io.StringIO(), "Page", node)
+
+    def test_hash_depends_on_source(self):
+        self.assertEqual(Template("a").hash, Template("a").hash)
+        self.assertNotEqual(Template("a").hash, Template("b").hash)
+
+    def test_assets_rewrite_template_and_content(self):
+        assets = AssetMap({"index.css": "index.0123456789.css", "images/a.png": "images/a.abcdefabcd.png"})
+        template = Template('<link href="/index.css?v=1"><a href="/other.css">{{ Content }}', "/base/", assets)
+        node = ParentNode("p", [LeafNode("img", "", {"src": "/images/a.png", "alt": "/images/a.png"})])
+        self.assertEqual(
+            template.render("T", node.to_html(template.rewrite_url)),
+            '<link href="/base/index.0123456789.css?v=1"><a href="/base/other.css">'
+            '<p><img src="/base/images/a.abcdefabcd.png" alt="/images/a.png"></img></p>',
+        )
+        # Pickled for worker processes
+        self.assertEqual(pickle.loads(pickle.dumps(template)).rewrite_url("/index.css"), "/base/index.0123456789.css")
+
+    def test_hash_depends_on_assets(self):
+        plain = Template("a")
+        with_assets = Template("a", "/", AssetMap({"x.css": "x.1.css"}))
+        self.assertNotEqual(plain.hash, with_assets.hash)
+        self.assertNotEqual(with_assets.hash, Template("a", "/", AssetMap({"x.css": "x.2.css"})).hash)
+        self.assertIsNone(plain.assets_digest)
+
+
+class TestLoadTemplate(unittest.TestCase):
+    def setUp(self):
+        self.test_dir = tempfile.mkdtemp()
+        self.template_path = os.path.join(self.test_dir, "template.html")
+        with open(self.template_path, 'w') as f:
+            f.write("<title>{{ Title }}</title>{{ Content }}")
+
+    def tearDown(self):
+        shutil.rmtree(self.test_dir)
+
+    def test_load_template(self):
+        template = load_template(self.template_path)
+        self.assertEqual(template.render("A", "B"), "<title>A</title>B")
+
+    def test_ensure_template_reuses_compiled(self):
+        template = load_template(self.template_path)
+        self.assertIs(ensure_template(template), template)
+        self.assertEqual(ensure_template(self.template_path).source, template.source)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,81 @@
+import unittest
+import os
+import tempfile
+import shutil
+import sys
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+from watcher import InotifyWatcher, PollingWatcher, make_watcher
+
+
+class WatcherTests:
+    def make_watcher(self, paths):
+        raise NotImplementedError
+
+    def setUp(self):
+        self.test_dir = tempfile.mkdtemp()
+        self.content_dir = os.path.join(self.test_dir, "content")
+        os.makedirs(os.path.join(self.content_dir, "blog"))
+        self.page = os.path.join(self.content_dir, "blog", "index.md")
+        self.template = os.path.join(self.test_dir, "template.html")
+        self.other = os.path.join(self.test_dir, "other.txt")
+        for path in (self.page, self.template):
+            self.write(path, "original")
+        self.watcher = self.make_watcher([self.content_dir, self.template])
+
+    def tearDown(self):
+        self.watcher.close()
+        shutil.rmtree(self.test_dir)
+
+    def write(self, path, content):
+        with open(path, 'w') as f:
+            f.write(content)
+
+    def test_no_changes(self):
+        self.assertEqual(self.watcher.poll(0.05), set())
+
+    def test_modified_file(self):
+        self.write(self.page, "changed content")
+        self.assertIn(self.page, self.watcher.poll(1))
+
+    def test_new_file_in_new_directory(self):
+        new_dir = os.path.join(self.content_dir, "new")
+        os.makedirs(new_dir)
+        self.watcher.poll(1)
+        new_page = os.path.join(new_dir, "index.md")
+        self.write(new_page, "hello")
+        self.assertIn(new_page, self.watcher.poll(1))
+
+    def test_deleted_file(self):
+        os.remove(self.page)
+        self.assertIn(self.page, self.watcher.poll(1))
+
+    def test_watched_file_replaced(self):
+        replacement = self.template + ".tmp"
+        self.write(replacement, "replaced template")
+        os.replace(replacement, self.template)
+        self.assertIn(self.template, self.watcher.poll(1))
+
+    def test_unwatched_sibling_ignored(self):
+        self.write(self.other, "not watched")
+        self.assertNotIn(self.other, self.watcher.poll(0.1))
+
+
+class TestPollingWatcher(WatcherTests, unittest.TestCase):
+    def make_watcher(self, paths):
+        return PollingWatcher(paths, interval=0.01)
+
+
+@unittest.skipUnless(sys.platform.startswith("linux"), "inotify is Linux only")
+class TestInotifyWatcher(WatcherTests, unittest.TestCase):
+    def make_watcher(self, paths):
+        return InotifyWatcher(paths)
+
+
+class TestMakeWatcher(unittest.TestCase):
+    def test_polling_requested(self):
+        watcher = make_watcher([tempfile.gettempdir()], polling=True)
+        self.assertIsInstance(watcher, PollingWatcher)
+
+
+if __name__ == "__main__":
+    unittest.main()
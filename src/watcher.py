@@ -0,0 +1,169 @@
+import ctypes
+import ctypes.util
+import os
+import select
+import struct
+import time
+
+# inotify(7) event bits
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_FROM = 0x00000040
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_DELETE = 0x00000200
+IN_DELETE_SELF = 0x00000400
+IN_Q_OVERFLOW = 0x00004000
+IN_IGNORED = 0x00008000
+IN_ISDIR = 0x40000000
+
+# Files are reported once written and closed, or moved into place by an editor
+WATCH_MASK = IN_CLOSE_WRITE | IN_MOVED_FROM | IN_MOVED_TO | IN_CREATE | IN_DELETE | IN_DELETE_SELF
+EVENT_HEADER = struct.Struct("iIII")
+
+# After the first event, keep collecting for this long so a save that touches
+# several files is handled as one batch
+SETTLE_SECONDS = 0.02
+
+
+class InotifyWatcher:
+    """
+    Reports changed paths below the watched directories using Linux inotify.
+    A watched file is followed through its directory, so editors that save by
+    replacing the file are still seen.
+    """
+
+    def __init__(self, paths):
+        libc_name = ctypes.util.find_library("c") or "libc.so.6"
+        self.libc = ctypes.CDLL(libc_name, use_errno=True)
+        self.fd = self.libc.inotify_init1(os.O_NONBLOCK | os.O_CLOEXEC)
+        if self.fd < 0:
+            raise OSError(ctypes.get_errno(), "inotify_init1 failed")
+        self.watches = {}
+        self.files = {}
+        self.roots = [os.path.abspath(path) for path in paths]
+        for root in self.roots:
+            if os.path.isdir(root):
+                self.add_tree(root)
+            else:
+                wd = self.add_watch(os.path.dirname(root))
+                self.files.setdefault(wd, set()).add(root)
+
+    def add_watch(self, path):
+        wd = self.libc.inotify_add_watch(self.fd, os.fsencode(path), WATCH_MASK)
+        if wd < 0:
+            raise OSError(ctypes.get_errno(), f"inotify_add_watch failed for {path}")
+        self.watches[wd] = path
+        return wd
+
+    def add_tree(self, root):
+        # inotify is not recursive, every directory needs its own watch
+        for dirpath, _, _ in os.walk(root):
+            self.add_watch(dirpath)
+
+    def poll(self, timeout=None):
+        """
+        Wait up to timeout seconds (forever if None) and return the set of
+        changed paths, empty if nothing changed.
+        """
+        ready, _, _ = select.select([self.fd], [], [], timeout)
+        if not ready:
+            return set()
+
+        changed = set()
+        deadline = time.monotonic() + SETTLE_SECONDS
+        while True:
+            changed |= self.read_events()
+            remaining = deadline - time.monotonic()
+            if remaining <= 0 or not select.select([self.fd], [], [], remaining)[0]:
+                return changed
+
+    def read_events(self):
+        changed = set()
+        try:
+            data = os.read(self.fd, 1 << 16)
+        except BlockingIOError:
+            return changed
+
+        offset = 0
+        while offset < len(data):
+            wd, mask, _, name_length = EVENT_HEADER.unpack_from(data, offset)
+            offset += EVENT_HEADER.size
+            name = data[offset:offset + name_length].rstrip(b"\0")
+            offset += name_length
+
+            if mask & IN_Q_OVERFLOW:
+                # Events were dropped, report the roots so everything is rechecked
+                changed.update(self.roots)
+                continue
+            if mask & IN_IGNORED:
+                self.watches.pop(wd, None)
+                continue
+
+            directory = self.watches.get(wd)
+            if directory is None:
+                continue
+            path = os.path.join(directory, os.fsdecode(name)) if name else directory
+            if wd in self.files and path not in self.files[wd]:
+                # Directory watched for a single file, ignore its other entries
+                continue
+            if mask & IN_ISDIR and mask & (IN_CREATE | IN_MOVED_TO):
+                self.add_tree(path)
+            changed.add(path)
+        return changed
+
+    def close(self):
+        os.close(self.fd)
+
+
+class PollingWatcher:
+    """
+    Fallback watcher that compares (mtime, size) snapshots of the watched trees.
+    """
+
+    def __init__(self, paths, interval=0.1):
+        self.roots = [os.path.abspath(path) for path in paths]
+        self.interval = interval
+        self.snapshot = self.scan()
+
+    def scan(self):
+        snapshot = {}
+        for root in self.roots:
+            paths = [root]
+            if os.path.isdir(root):
+                paths = [os.path.join(dirpath, filename)
+                         for dirpath, _, filenames in os.walk(root) for filename in filenames]
+            for path in paths:
+                try:
+                    stat = os.stat(path)
+                except FileNotFoundError:
+                    continue
+                snapshot[path] = (stat.st_mtime_ns, stat.st_size)
+        return snapshot
+
+    def poll(self, timeout=None):
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            snapshot = self.scan()
+            changed = {
+                path for path in snapshot.keys() | self.snapshot.keys()
+                if snapshot.get(path) != self.snapshot.get(path)
+            }
+            self.snapshot = snapshot
+            if changed:
+                return changed
+            if deadline is not None and time.monotonic() >= deadline:
+                return set()
+            time.sleep(self.interval)
+
+    def close(self):
+        pass
+
+
+def make_watcher(paths, polling=False, interval=0.1):
+    # inotify when the platform has it, polling otherwise
+    if not polling:
+        try:
+            return InotifyWatcher(paths)
+        except (OSError, AttributeError):
+            pass
+    return PollingWatcher(paths, interval)